@@ -1,12 +1,21 @@
 """JWT authentication utilities."""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, defer
+from config import settings
+from database import get_db, get_async_db
+from services import metrics_service
 
 # ── Config ────────────────────────────────────────────────────────────────────
 SECRET_KEY = "trustai-super-secret-key-change-in-production-2024"
@@ -19,7 +28,7 @@ oauth2_optional = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=Fa
 
 # ── Password helpers ──────────────────────────────────────────────────────────
 def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)).decode("utf-8")
 
 
 def verify_password(plain: str, hashed: str) -> bool:
@@ -29,6 +38,59 @@ def verify_password(plain: str, hashed: str) -> bool:
         return False
 
 
+# bcrypt is deliberately slow; keep it off the event loop and off the shared
+# request threadpool so a login burst can only saturate its own workers.
+_hash_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_hash_pending = 0
+_hash_pending_lock = threading.Lock()
+
+HASH_SECONDS = metrics_service.histogram(
+    "trustai_password_hash_seconds", "bcrypt CPU time per call", ["op"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+HASH_WAIT_SECONDS = metrics_service.histogram(
+    "trustai_password_hash_wait_seconds", "Time from submit to result, including queueing", ["op"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+HASH_REJECTED = metrics_service.counter(
+    "trustai_password_hash_rejected_total", "Hash/verify calls shed because the queue was full", ["op"],
+)
+
+
+def _timed(op: str, fn, *args):
+    with HASH_SECONDS.time(op=op):
+        return fn(*args)
+
+
+async def _run_hashing(op: str, fn, *args):
+    global _hash_pending
+    with _hash_pending_lock:
+        if _hash_pending >= settings.PASSWORD_HASH_MAX_PENDING:
+            HASH_REJECTED.inc(op=op)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy. Please try again in a moment.",
+                headers={"Retry-After": "2"},
+            )
+        _hash_pending += 1
+    start = time.perf_counter()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, _timed, op, fn, *args)
+    finally:
+        HASH_WAIT_SECONDS.observe(time.perf_counter() - start, op=op)
+        with _hash_pending_lock:
+            _hash_pending -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_hashing("hash", hash_password, password)
+
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    return await _run_hashing("verify", verify_password, plain, hashed)
+
+
 # ── JWT helpers ───────────────────────────────────────────────────────────────
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
@@ -44,19 +106,145 @@ def decode_token(token: str) -> dict:
         return {}
 
 
+# ── Per-process auth caches ──────────────────────────────────────────────────
+# token -> (exp timestamp, user_id): skips signature verification on repeat calls
+_token_cache: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+TOKEN_CACHE_MAX = 10_000
+# user_id -> (expires_at, detached User without the avatar column loaded), LRU
+_user_cache: "OrderedDict[int, Tuple[float, object]]" = OrderedDict()
+USER_CACHE_MAX = 10_000
+# A load only stores its snapshot if the user wasn't invalidated after it began:
+# invalidate_user stamps the user with the next generation. Users dropped from
+# this bounded map count as invalidated at _invalidated_floor (conservative).
+_generation = 0
+_invalidated: "OrderedDict[int, int]" = OrderedDict()
+_invalidated_floor = 0
+_cache_lock = threading.Lock()
+
+
+def _user_id_from_token(token: str) -> Optional[int]:
+    now = time.time()
+    with _cache_lock:
+        hit = _token_cache.get(token)
+        if hit and hit[0] > now:
+            _token_cache.move_to_end(token)
+            return hit[1]
+    payload = decode_token(token)
+    sub = payload.get("sub")
+    if not sub:
+        return None
+    user_id = int(sub)
+    with _cache_lock:
+        _token_cache[token] = (float(payload.get("exp", now)), user_id)
+        if len(_token_cache) > TOKEN_CACHE_MAX:
+            _token_cache.popitem(last=False)
+    return user_id
+
+
+def _cached_user(user_id: int):
+    """Fresh cached snapshot, or None. Caller holds _cache_lock."""
+    hit = _user_cache.get(user_id)
+    if hit is None:
+        return None
+    if hit[0] <= time.time():
+        del _user_cache[user_id]
+        return None
+    _user_cache.move_to_end(user_id)
+    return hit[1]
+
+
+def _store_user(user_id: int, user, loaded_at_generation: int) -> None:
+    with _cache_lock:
+        if _invalidated.get(user_id, _invalidated_floor) > loaded_at_generation:
+            return                        # changed while we were loading – snapshot is stale
+        _user_cache[user_id] = (time.time() + settings.USER_CACHE_TTL_SECONDS, user)
+        _user_cache.move_to_end(user_id)
+        if len(_user_cache) > USER_CACHE_MAX:
+            _user_cache.popitem(last=False)
+
+
+def _load_user(db: Session, user_id: int):
+    """
+    Return the user attached to `db`. Served from a short-TTL snapshot when
+    possible: merge(load=False) attaches a copy without issuing a SELECT, so
+    handlers can still modify and commit it. The heavy `avatar` column is
+    deferred and only loaded if a handler touches it.
+    """
+    from models import User
+    with _cache_lock:
+        cached = _cached_user(user_id)
+        generation = _generation
+    if cached is not None:
+        return db.merge(cached, load=False)
+
+    user = db.query(User).options(defer(User.avatar)).filter(User.id == user_id).first()
+    if not user:
+        return None
+    db.expunge(user)                      # the cached snapshot never belongs to a request session
+    _store_user(user_id, user, generation)
+    return db.merge(user, load=False)
+
+
+async def _load_user_async(db: AsyncSession, user_id: int):
+    """AsyncSession variant of _load_user, sharing the same snapshot cache."""
+    from models import User
+    with _cache_lock:
+        cached = _cached_user(user_id)
+        generation = _generation
+    if cached is not None:
+        return await db.merge(cached, load=False)
+
+    result = await db.execute(select(User).options(defer(User.avatar)).where(User.id == user_id))
+    user = result.scalars().first()
+    if not user:
+        return None
+    db.expunge(user)
+    _store_user(user_id, user, generation)
+    return await db.merge(user, load=False)
+
+
+def invalidate_user(user_id: int) -> None:
+    """Drop the cached snapshot — call after committing changes to the user row."""
+    global _generation, _invalidated_floor
+    with _cache_lock:
+        _user_cache.pop(user_id, None)
+        _generation += 1
+        _invalidated[user_id] = _generation
+        _invalidated.move_to_end(user_id)
+        if len(_invalidated) > USER_CACHE_MAX:
+            _invalidated_floor = _invalidated.popitem(last=False)[1]
+
+
 # ── FastAPI dependencies ──────────────────────────────────────────────────────
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    from models import User
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid or expired token. Please log in again.",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    payload = decode_token(token)
-    user_id: int = payload.get("sub")
+    user_id = _user_id_from_token(token)
     if not user_id:
         raise credentials_exception
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    user = _load_user(db, user_id)
+    if not user:
+        raise credentials_exception
+    return user
+
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    """
+    get_current_user for async def handlers. The avatar column is deferred and
+    cannot lazy-load under asyncio – use `await db.refresh(user, ["avatar"])`.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired token. Please log in again.",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    user_id = _user_id_from_token(token)
+    if not user_id:
+        raise credentials_exception
+    user = await _load_user_async(db, user_id)
     if not user:
         raise credentials_exception
     return user
@@ -66,9 +254,7 @@ def get_optional_user(token: Optional[str] = Depends(oauth2_optional), db: Sessi
     """Returns user or None if no/invalid token."""
     if not token:
         return None
-    from models import User
-    payload = decode_token(token)
-    user_id = payload.get("sub")
+    user_id = _user_id_from_token(token)
     if not user_id:
         return None
-    return db.query(User).filter(User.id == int(user_id)).first()
+    return _load_user(db, user_id)
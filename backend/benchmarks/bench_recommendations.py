@@ -0,0 +1,229 @@
+"""
+Recommendation pipeline benchmark – loads synthetic catalogs of each size,
+replays synthetic users through the same steps as POST /api/recommendations
+and times every stage separately:
+
+  embed, search, db_fetch (catalog snapshot lookup), filter, diversity,
+  rank (scoring + MMR), explain (3 LLM calls against a fake Ollama)
+
+plus one cold catalog snapshot build per size. Results are written as JSON;
+pass --compare with an earlier file to flag stages that got slower.
+
+Run: python benchmarks/bench_recommendations.py [--items 1000 10000 100000] [--requests 200]
+     [--out bench.json] [--compare baseline.json] [--ollama-latency-ms 0]   (from the backend/ directory)
+
+Uses its own SQLite database (--db-url) – never point it at real data, the
+recommendations table is replaced. 1M items needs a few GB of RAM for the
+embeddings and a couple of minutes to load.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+STAGES = ("embed", "search", "db_fetch", "filter", "diversity", "rank", "explain")
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="Recommendation pipeline stage benchmark")
+    parser.add_argument("--items", type=int, nargs="+", default=[1_000, 10_000, 100_000],
+                        help="catalog sizes to run (1k – 1M)")
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per catalog size")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--candidates", type=int, default=20,
+                        help="FAISS hits per request (the route uses 20)")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--db-url", default=f"sqlite:///{os.path.join(tempfile.gettempdir(), 'trustai_bench.db')}")
+    parser.add_argument("--ollama-latency-ms", type=float, default=0.0, help="fake Ollama reply delay")
+    parser.add_argument("--ollama-port", type=int, default=11435)
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--compare", help="earlier results JSON to compare p50s against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="relative p50 slowdown reported as a regression")
+    return parser.parse_args()
+
+
+args = _parse_args()
+# Settings are read at import time – point the app at the bench DB and fake Ollama first
+os.environ["DATABASE_URL"] = args.db_url
+os.environ["OLLAMA_BASE_URL"] = f"http://127.0.0.1:{args.ollama_port}"
+os.environ["CATALOG_MAX_AGE_SECONDS"] = str(10 ** 9)
+
+import numpy as np  # noqa: E402
+
+import migrate  # noqa: E402
+from database import engine  # noqa: E402
+from services import (  # noqa: E402
+    campus_graph_service, catalog_service, diversity_service, faiss_service,
+    llm_service, location_service, optimization_service,
+)
+import fake_ollama  # noqa: E402
+import synthetic  # noqa: E402
+
+
+def _summary(samples):
+    ms = sorted(s * 1000 for s in samples)
+    return {
+        "p50_ms": round(statistics.median(ms), 4),
+        "p95_ms": round(ms[max(0, int(len(ms) * 0.95) - 1)], 4),
+        "mean_ms": round(statistics.fmean(ms), 4),
+    }
+
+
+async def _request(user: dict, timings: dict, top_k: int, n_candidates: int):
+    """One pass of routers/recommendations.get_recommendations, stage by stage."""
+    t = time.perf_counter
+
+    t0 = t()
+    query = f"{' '.join(user['preferences'])} {user['location']} {user['time_of_day']}"
+    q_vec = faiss_service.embed([query])
+    t1 = t()
+    hits = faiss_service.search_vector(q_vec, top_k=n_candidates)
+    t2 = t()
+    catalog = catalog_service.get_snapshot()
+    candidates = catalog.by_ids(meta["id"] for meta, _ in hits)
+    t3 = t()
+
+    if user["categories"]:
+        candidates = [c for c in candidates if c["category"] in user["categories"]]
+    affordable = [c for c in candidates if c["cost"] <= user["budget"]] or candidates[:10]
+    location_service.register_catalog(catalog)
+    accepted = location_service.accepted_ids(user["location"])
+    location_valid = affordable if accepted is None else [
+        c for c in affordable if location_service.resolve(c["location"]) in accepted
+    ]
+    if len(location_valid) >= 3:
+        affordable = location_valid
+    t4 = t()
+
+    window = diversity_service.HistoryWindow(user["history"])
+    div_scores = diversity_service.compute_diversity_scores(affordable, window)
+    bubble = diversity_service.detect_filter_bubble(window)
+    t5 = t()
+
+    graph = campus_graph_service.default_graph()
+    full_ranked = optimization_service.rank_recommendations(
+        affordable, budget=user["budget"], free_time_minutes=user["free_time_minutes"],
+        user_preferences=user["preferences"], user_location=user["location"],
+        time_of_day=user["time_of_day"], diversity_scores=div_scores,
+        top_k=len(affordable), distance=graph.distance,
+    )
+    embeddings = faiss_service.embeddings_for(r["id"] for r in full_ranked)
+    ranked = diversity_service.mmr_rerank(
+        full_ranked, embeddings, top_k, lam=diversity_service.mmr_lambda(user["exploration_level"]),
+    )
+    t6 = t()
+
+    for rec in ranked[:3]:
+        rec["explanation"] = await llm_service.generate_explanation(rec["name"], rec["score_breakdown"], [])
+    diversity_service.get_diversity_injection_note(window, ranked[0]["sub_category"] if ranked else "", bubble=bubble)
+    t7 = t()
+
+    for stage, start, end in zip(STAGES, (t0, t1, t2, t3, t4, t5, t6), (t1, t2, t3, t4, t5, t6, t7)):
+        timings[stage].append(end - start)
+    timings["total"].append(t7 - t0)
+
+
+async def _run_size(n_items: int, users: list) -> dict:
+    print(f"── {n_items:,} items", flush=True)
+    t0 = time.perf_counter()
+    rows = synthetic.catalog(n_items, seed=args.seed)
+    synthetic.write_catalog(engine, rows)
+    dim = faiss_service.embed(["probe"]).shape[1]
+    faiss_service.use_embeddings(
+        synthetic.embeddings(rows, dim, seed=args.seed),
+        [{"id": r["id"], "name": r["name"]} for r in rows],
+    )
+    del rows
+    load_seconds = time.perf_counter() - t0
+
+    catalog_service.invalidate()
+    t0 = time.perf_counter()
+    catalog_service.get_snapshot()
+    snapshot_seconds = time.perf_counter() - t0
+    faiss_service.embeddings_for([])              # build the id → vector table outside the timings
+
+    timings = defaultdict(list)
+    for i in range(args.warmup):
+        await _request(users[i % len(users)], defaultdict(list), args.top_k, args.candidates)
+    for i in range(args.requests):
+        await _request(users[i % len(users)], timings, args.top_k, args.candidates)
+
+    result = {
+        "items": n_items,
+        "load_seconds": round(load_seconds, 3),
+        "snapshot_build_ms": round(snapshot_seconds * 1000, 3),
+        "stages": {stage: _summary(timings[stage]) for stage in (*STAGES, "total")},
+    }
+    print(f"   loaded in {load_seconds:.1f}s, snapshot build {snapshot_seconds * 1000:.1f} ms")
+    print(f"   {'stage':<11}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}")
+    for stage, s in result["stages"].items():
+        print(f"   {stage:<11}{s['p50_ms']:>10.3f}{s['p95_ms']:>10.3f}{s['mean_ms']:>10.3f}")
+    return result
+
+
+def _compare(results: dict, baseline_path: str, tolerance: float) -> int:
+    with open(baseline_path) as f:
+        baseline = {run["items"]: run for run in json.load(f)["runs"]}
+    regressions = 0
+    print(f"\nvs {baseline_path} (p50, regression if > +{tolerance:.0%})")
+    for run in results["runs"]:
+        old = baseline.get(run["items"])
+        if not old:
+            continue
+        for stage, s in run["stages"].items():
+            before = old["stages"].get(stage, {}).get("p50_ms")
+            if not before:
+                continue
+            change = s["p50_ms"] / before - 1.0
+            flag = "  REGRESSION" if change > tolerance else ""
+            regressions += bool(flag)
+            print(f"   {run['items']:>9,} {stage:<11}{before:>10.3f} → {s['p50_ms']:<10.3f}{change:+7.1%}{flag}")
+    return regressions
+
+
+async def _main() -> int:
+    migrate.upgrade(args.db_url)
+    fake_ollama.start_in_thread(args.ollama_port, fake_ollama.FakeConfig(ttft_ms=args.ollama_latency_ms))
+    users = synthetic.users(args.users, seed=args.seed)
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "faiss": faiss_service.FAISS_AVAILABLE,
+            "sentence_transformers": faiss_service.SBERT_AVAILABLE,
+            "db": engine.dialect.name,
+            "requests": args.requests,
+            "candidates": args.candidates,
+            "top_k": args.top_k,
+            "ollama_latency_ms": args.ollama_latency_ms,
+            "seed": args.seed,
+        },
+        "runs": [await _run_size(n, users) for n in args.items],
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nwrote {args.out}")
+    if args.compare:
+        return 1 if _compare(results, args.compare, args.tolerance) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main()))
@@ -0,0 +1,188 @@
+"""
+LLM output sanitizer benchmark + fuzz – times services/text_sanitizer on
+adversarial inputs (unclosed JSON blobs, whitespace-only lines, asterisk
+runs, unclosed <data> tags, …) at --size and --size/16, and fails if any case
+blows the time budget or grows faster than linearly. Each case is run on the
+whole text and streamed in token-sized chunks.
+
+The fuzz pass feeds random token soups in random chunkings and checks that
+streamed output equals whole-text output and is trimmed and collapsed.
+
+Run: python benchmarks/bench_sanitizer.py [--size 100000] [--budget-ms 250]
+     [--fuzz 5000] [--legacy] [--out sanitizer.json]   (from the backend/ directory)
+
+--legacy also times the old six-regex chain for comparison; on the blob and
+whitespace cases it takes seconds (quadratic backtracking).
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import re
+import sys
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+from services.text_sanitizer import StreamSanitizer, sanitize  # noqa: E402
+
+CHUNK = 4                     # ~ one token per streamed chunk
+SCALE = 16                    # growth is measured from size/SCALE to size
+
+CASES = {
+    "unclosed_blobs":   lambda n: "[x\n" * (n // 3),
+    "blank_ws_lines":   lambda n: (" " * 20 + "\n") * (n // 21),
+    "held_ws_lines":    lambda n: "a\n" + " \n" * ((n - 2) // 2),   # trailing whitespace held after text
+    "star_run":         lambda n: "*" * n,
+    "unpaired_stars":   lambda n: "a *b " * (n // 5),
+    "data_opens":       lambda n: "<data>" * (n // 6),
+    "unclosed_data":    lambda n: "ok <data>" + "{x}\n" * ((n - 9) // 4),
+    "header_runs":      lambda n: "####### #\n" * (n // 10),
+    "bullets":          lambda n: "- \n•\n" * (n // 5),
+    "one_long_line":    lambda n: "word " * (n // 5),
+    "reply_like":       lambda n: ("Sure! **Great** pick.\n## Why\n- cheap\n- close\n{\"intent\": 1}\n\n\n" * (n // 70)),
+}
+
+FUZZ_TOKENS = ["**", "*", "#", "## ", "- ", "• ", "{", "}", "[", "]", "\n", "\n\n", " ", "\t",
+               "word", "<data>", "</data>", "<da", "ta>", "x."]
+
+
+def legacy_clean(text: str) -> str:
+    """The regex chain services/llm_service used before text_sanitizer."""
+    text = re.sub(r'<data>.*?</data>', '', text, flags=re.DOTALL)
+    text = re.sub(r'\*{1,3}(.*?)\*{1,3}', r'\1', text)
+    text = re.sub(r'^#{1,6}\s+', '', text, flags=re.MULTILINE)
+    text = re.sub(r'^\s*[\[{].*?[\]}]\s*$', '', text, flags=re.MULTILINE | re.DOTALL)
+    text = re.sub(r'^\s*[-•]\s+', '', text, flags=re.MULTILINE)
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    return text.strip()
+
+
+def streamed(text: str, chunk: int = CHUNK) -> str:
+    s = StreamSanitizer()
+    out = [s.feed(text[i:i + chunk]) for i in range(0, len(text), chunk)]
+    out.append(s.finish())
+    return "".join(out)
+
+
+def _best_ms(fn, text: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def _growth(fn, small: str, large: str, repeat: int) -> float:
+    """
+    Best time on `large` over best time on `small`. The two are timed
+    alternately with GC off, so a burst of load on the machine slows both
+    sides instead of skewing the ratio.
+    """
+    best = [float("inf"), float("inf")]
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            for i, text in enumerate((small, large)):
+                t0 = time.perf_counter()
+                fn(text)
+                best[i] = min(best[i], time.perf_counter() - t0)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return best[1] / max(best[0], 1e-6)
+
+
+def run_cases(args) -> tuple:
+    results, failures = {}, []
+    print(f"{'case':<17}{'bytes':>8}{'whole ms':>10}{'stream ms':>11}{'x size/16':>11}"
+          + (f"{'legacy ms':>11}" if args.legacy else ""))
+    for name, make in CASES.items():
+        text, small = make(args.size), make(args.size // SCALE)
+        whole = _best_ms(sanitize, text, args.repeat)
+        stream = _best_ms(streamed, text, args.repeat)
+        # Growth over a 16x larger input: ~16 when linear, ~256 when quadratic
+        # (less while the linear part still dominates at --size)
+        growth = _growth(sanitize, small, text, args.repeat)
+        row = {"bytes": len(text), "whole_ms": round(whole, 3), "stream_ms": round(stream, 3),
+               "growth_16x": round(growth, 2)}
+        if args.legacy:
+            row["legacy_ms"] = round(_best_ms(legacy_clean, text, 1), 3)
+        results[name] = row
+        print(f"{name:<17}{len(text):>8}{whole:>10.2f}{stream:>11.2f}{growth:>11.1f}"
+              + (f"{row['legacy_ms']:>11.1f}" if args.legacy else ""))
+
+        if max(whole, stream) > args.budget_ms:
+            failures.append(f"{name}: {max(whole, stream):.1f} ms > budget {args.budget_ms} ms")
+        # Small absolute times are noisy – only judge growth once it is measurable,
+        # and re-time before failing so one noisy measurement can't fail the run
+        if whole > 2.0 and growth > args.max_growth:
+            growth = min(growth, _growth(sanitize, small, text, args.repeat))
+        if whole > 2.0 and growth > args.max_growth:
+            failures.append(f"{name}: {growth:.1f}x slower on {SCALE}x input (max {args.max_growth}x)")
+        if streamed(text) != sanitize(text):
+            failures.append(f"{name}: streamed output differs from whole-text output")
+    return results, failures
+
+
+def run_fuzz(n: int, seed: int) -> list:
+    rng = random.Random(seed)
+    failures = []
+    for i in range(n):
+        text = "".join(rng.choice(FUZZ_TOKENS) for _ in range(rng.randint(0, 60)))
+        whole = sanitize(text)
+        s, parts, pos = StreamSanitizer(), [], 0
+        while pos < len(text):
+            step = rng.randint(1, 8)
+            parts.append(s.feed(text[pos:pos + step]))
+            pos += step
+        parts.append(s.finish())
+        got = "".join(parts)
+        problem = None
+        if got != whole:
+            problem = f"stream {got!r} != whole {whole!r}"
+        elif whole != whole.strip():
+            problem = f"not trimmed: {whole!r}"
+        elif "\n\n\n" in whole:
+            problem = f"blank lines not collapsed: {whole!r}"
+        if problem:
+            failures.append(f"fuzz #{i} {text!r}: {problem}")
+            if len(failures) >= 10:
+                break
+    print(f"\nfuzz: {n} inputs, {len(failures)} failures")
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="LLM output sanitizer benchmark + fuzz")
+    parser.add_argument("--size", type=int, default=100_000, help="adversarial input size in bytes")
+    parser.add_argument("--repeat", type=int, default=7, help="timed runs per case (best is kept)")
+    parser.add_argument("--budget-ms", type=float, default=250.0, help="max ms per case at --size")
+    parser.add_argument("--max-growth", type=float, default=24.0,
+                        help="max slowdown going from size/16 to size (linear ≈ 16)")
+    parser.add_argument("--fuzz", type=int, default=5000, help="random inputs to fuzz (0 = skip)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--legacy", action="store_true", help="also time the old regex chain")
+    parser.add_argument("--out", help="write results JSON here")
+    args = parser.parse_args()
+
+    results, failures = run_cases(args)
+    if args.fuzz:
+        failures += run_fuzz(args.fuzz, args.seed)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"size": args.size, "budget_ms": args.budget_ms, "cases": results,
+                       "failures": failures}, f, indent=2)
+        print(f"wrote {args.out}")
+    for failure in failures:
+        print("FAIL", failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,294 @@
+"""
+Fake Ollama server – a deterministic stand-in for load tests and benchmarks.
+
+  POST /api/chat    streaming (NDJSON chunks, like Ollama) and non-streaming,
+                    "format": "json" honoured
+  GET  /api/tags    one fake model
+  GET  /fake/stats  requests served per prompt type, errors injected
+
+Replies are canned per prompt type (intent extraction, onboarding profile,
+campus map, club content, campaign, caption variants, engagement kit,
+explanation, chat), recognised from the system prompts in
+services/llm_service.py, so every code path gets output it can parse.
+Override any of them with --canned FILE ({"prompt_type": "text" or JSON}).
+
+Timing: --ttft-ms before the first token, then --tokens-per-second (0 = all
+at once). Faults: --error-rate (HTTP 500), --hang-rate (no reply for
+--hang-seconds, trips client timeouts), --malformed-rate (prose where JSON was
+asked for). Faults are drawn from a seeded RNG, so a run is reproducible.
+
+Run: python benchmarks/fake_ollama.py [--port 11435] [--ttft-ms 200] [--tokens-per-second 40]
+     [--error-rate 0.01] [--canned canned.json]   (from the backend/ directory)
+then start the API with OLLAMA_BASE_URL=http://127.0.0.1:11435
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+@dataclass
+class FakeConfig:
+    ttft_ms: float = 0.0                  # delay before the first token
+    tokens_per_second: float = 0.0        # 0 = whole reply at once
+    error_rate: float = 0.0               # fraction answered with HTTP 500
+    hang_rate: float = 0.0                # fraction that never answer in time
+    hang_seconds: float = 300.0
+    malformed_rate: float = 0.0           # fraction of JSON prompts answered with prose
+    seed: int = 0
+    canned: Dict[str, object] = field(default_factory=dict)
+
+
+# ── Canned replies ───────────────────────────────────────────────────────────
+CANNED: Dict[str, object] = {
+    "intent": {"intent": "general_chat"},           # refined per message in _intent()
+    "onboarding": {
+        "spending_style": "balanced",
+        "activity_persona": "explorer",
+        "social_preference": "small_group",
+        "exploration_level": 4,
+        "energy_level": "moderate",
+        "top_categories": ["music", "tech", "cafe"],
+        "personalization_summary": "A curious student who likes trying new events with a few friends. "
+                                   "Keeps an eye on spending but will pay for a good experience.",
+        "optimization_weights": {"budget_weight": 0.25, "preference_weight": 0.25, "time_weight": 0.2,
+                                 "proximity_weight": 0.15, "diversity_weight": 0.15},
+    },
+    "campus_map": {
+        "areas": ["Main Block", "Canteen", "Library Block", "Sports Arena", "Boys Hostel", "Main Gate"],
+        "food_spots": ["Canteen", "Food Court"],
+        "academic_blocks": ["Main Block", "Library Block"],
+        "sports_facilities": ["Sports Arena"],
+        "hostels": ["Boys Hostel"],
+        "landmarks": ["OAT"],
+        "entry_points": ["Main Gate"],
+        "description": "A compact campus with the academic blocks around a central lawn.",
+    },
+    "club_content": {
+        "instagram_caption": "The wait is over! Join us this Friday for a night to remember 🎉 #CampusLife #TechFest",
+        "whatsapp_announcement": "Hi everyone! Our event is happening this Friday at the main auditorium. "
+                                 "Entry is free for all students. See you there!",
+        "poster_text": "ONE NIGHT\nONE STAGE\nFRIDAY 6 PM\nMAIN AUDITORIUM",
+    },
+    "campaign": [
+        {"phase": phase, "post_timing": timing, "instagram": f"{phase} post 🎉 #CampusLife",
+         "whatsapp": f"{phase}: don't miss it!", "poster_line": f"{phase} – mark your calendar"}
+        for phase, timing in [("Teaser", "7-10 days before"), ("Hype Drop", "4-5 days before"),
+                              ("Countdown", "1-2 days before"), ("Day-Of", "Morning of event"),
+                              ("Post-Event", "Within 24h after")]
+    ],
+    "caption_variants": [
+        {"style": style, "label": label, "caption": f"A {style} caption for the event #Campus"}
+        for style, label in [("hype", "🔥 Hype Mode"), ("minimal", "🤍 Minimal Aesthetic"),
+                             ("storytelling", "📖 Storytelling Arc"), ("witty", "😏 Witty & Meme"),
+                             ("professional", "💼 Professional")]
+    ],
+    "engagement_kit": {
+        "polls": [{"question": f"Poll question {i}", "options": ["Option A", "Option B"]} for i in (1, 2, 3)],
+        "story_prompts": ["What are you most excited for?", "Tag a friend who needs to come",
+                          "Drop a gif of your hype level", "Ask us anything", "Finish this: I want to..."],
+        "quiz": {"question": "Which year did the fest start?", "options": ["A) 2001", "B) 2005", "C) 2010", "D) 2015"],
+                 "answer": "B) 2005", "fun_fact": "The first edition had just three events."},
+        "countdown_hook": "T-minus 3 days... are YOU ready? 👀",
+    },
+    "explanation": ("This option fits your budget and free time well, and it matches the interests "
+                    "you told us about. It is also close to where you are on campus, so you will not "
+                    "lose time walking."),
+    "chat": ("Sure! Based on your budget and what you usually enjoy, a quick chai at the canteen followed "
+             "by the open mic night would make a relaxed evening. Both are close by and well within what "
+             "you planned to spend today."),
+}
+
+# (prompt type, pattern matched against the system prompt)
+_ROUTES = [
+    ("intent", r"JSON extractor"),
+    ("onboarding", r"behavioral analysis engine"),
+    ("campus_map", r"campus layout analyzer|campus site map"),
+    ("club_content", r"social media manager"),
+    ("campaign", r"social media strategist"),
+    ("caption_variants", r"copywriter"),
+    ("engagement_kit", r"engagement strategist"),
+    ("explanation", r"explaining why this was recommended|friendly campus AI assistant"),
+]
+_INTENT_KEYWORDS = [
+    ("budget_query", r"budget|spent|spend|money|afford"),
+    ("planner_request", r"\bplan\b|schedule|my day"),
+    ("content_request", r"poster|caption|instagram|whatsapp|post for"),
+    ("recommendation_request", r"recommend|suggest|hungry|something to do|where (can|should)"),
+]
+
+
+def prompt_type(messages: List[dict]) -> str:
+    system = " ".join(m.get("content", "") for m in messages if m.get("role") == "system")
+    # Vision requests carry no system prompt – fall back to the user message
+    text = system or " ".join(m.get("content", "") for m in messages)
+    for name, pattern in _ROUTES:
+        if re.search(pattern, text, re.IGNORECASE):
+            return name
+    return "chat"
+
+
+def _intent(messages: List[dict]) -> dict:
+    text = messages[-1].get("content", "") if messages else ""
+    match = re.search(r'Message: "(.*)"', text, re.DOTALL)
+    user_message = (match.group(1) if match else text).lower()
+    for intent, pattern in _INTENT_KEYWORDS:
+        if re.search(pattern, user_message):
+            budget = re.search(r"(\d+)\s*(?:rs|₹|rupees)?", user_message)
+            return {"intent": intent, "budget": float(budget.group(1)) if budget else 300.0,
+                    "free_time_minutes": 120, "preferences": ["cafe", "music"],
+                    "location": "library block", "time_of_day": "evening"}
+    return {"intent": "general_chat"}
+
+
+def _tokens(text: str) -> List[str]:
+    return re.findall(r"\S+\s*|\s+", text) or [""]
+
+
+def create_app(config: Optional[FakeConfig] = None) -> FastAPI:
+    config = config or FakeConfig()
+    canned = {**CANNED, **config.canned}
+    rng = random.Random(config.seed)
+    rng_lock = threading.Lock()
+    stats: Counter = Counter()
+    app = FastAPI(title="fake-ollama")
+
+    def reply_for(kind: str, messages: List[dict], json_mode: bool, malformed: bool) -> str:
+        if kind == "intent" and "intent" not in config.canned:
+            body = _intent(messages)
+        else:
+            body = canned[kind]
+        if malformed and (json_mode or not isinstance(body, str)):
+            return "Sorry, I could not produce that in the requested format."
+        if isinstance(body, str):
+            return json.dumps({"response": body}) if json_mode else body
+        return json.dumps(body, ensure_ascii=False)
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        body = await request.json()
+        messages = body.get("messages") or []
+        model = body.get("model", "fake")
+        kind = prompt_type(messages)
+        with rng_lock:
+            roll_error, roll_hang, roll_malformed = rng.random(), rng.random(), rng.random()
+        stats[kind] += 1
+
+        if roll_error < config.error_rate:
+            stats["errors"] += 1
+            return JSONResponse({"error": "fake ollama: injected failure"}, status_code=500)
+        if roll_hang < config.hang_rate:
+            stats["hangs"] += 1
+            await asyncio.sleep(config.hang_seconds)
+
+        content = reply_for(kind, messages, body.get("format") == "json",
+                            roll_malformed < config.malformed_rate)
+        if roll_malformed < config.malformed_rate:
+            stats["malformed"] += 1
+        tokens = _tokens(content)
+        started = time.perf_counter_ns()
+        prompt_tokens = sum(len(_tokens(m.get("content", ""))) for m in messages)
+        per_token = 1.0 / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+
+        def final(extra: dict) -> dict:
+            elapsed = time.perf_counter_ns() - started
+            return {
+                "model": model,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                **extra,
+                "done": True,
+                "done_reason": "stop",
+                "total_duration": elapsed,
+                "load_duration": 0,
+                "prompt_eval_count": prompt_tokens,
+                "prompt_eval_duration": int(config.ttft_ms * 1e6),
+                "eval_count": len(tokens),
+                "eval_duration": max(0, elapsed - int(config.ttft_ms * 1e6)),
+            }
+
+        if not body.get("stream", True):
+            await asyncio.sleep(config.ttft_ms / 1000.0 + per_token * len(tokens))
+            return final({"message": {"role": "assistant", "content": content}})
+
+        async def chunks():
+            await asyncio.sleep(config.ttft_ms / 1000.0)
+            for token in tokens:
+                yield json.dumps({
+                    "model": model,
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    "message": {"role": "assistant", "content": token},
+                    "done": False,
+                }, ensure_ascii=False) + "\n"
+                if per_token:
+                    await asyncio.sleep(per_token)
+            yield json.dumps(final({"message": {"role": "assistant", "content": ""}}), ensure_ascii=False) + "\n"
+
+        return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+    @app.get("/api/tags")
+    def tags():
+        return {"models": [{"name": "fake"}]}
+
+    @app.get("/fake/stats")
+    def fake_stats():
+        return dict(stats)
+
+    return app
+
+
+def start_in_thread(port: int = 11435, config: Optional[FakeConfig] = None) -> str:
+    """Serve the fake in a daemon thread; returns its base URL once it is accepting requests."""
+    server = uvicorn.Server(uvicorn.Config(create_app(config), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    deadline = time.time() + 10
+    while not server.started:
+        if time.time() > deadline:
+            raise RuntimeError(f"fake Ollama did not start on port {port}")
+        time.sleep(0.02)
+    return f"http://127.0.0.1:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Ollama /api/chat server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--ttft-ms", type=float, default=200.0, help="time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="0 = reply all at once")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--hang-seconds", type=float, default=300.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--canned", help='JSON file of {"prompt_type": reply} overrides')
+    args = parser.parse_args()
+
+    canned = {}
+    if args.canned:
+        with open(args.canned) as f:
+            canned = json.load(f)
+        unknown = set(canned) - set(CANNED)
+        if unknown:
+            parser.error(f"unknown prompt types in {args.canned}: {', '.join(sorted(unknown))} "
+                         f"(known: {', '.join(CANNED)})")
+    config = FakeConfig(
+        ttft_ms=args.ttft_ms, tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate, hang_rate=args.hang_rate, hang_seconds=args.hang_seconds,
+        malformed_rate=args.malformed_rate, seed=args.seed, canned=canned,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+API load test – N virtual users register, onboard, then loop over a weighted
+mix of real endpoints (chat, recommendations, planner, budget, content, …)
+with think time between calls, for a fixed duration. Reports throughput and
+latency percentiles per endpoint, and optionally writes them as JSON.
+
+Pair it with the fake Ollama so LLM latency is controlled and repeatable:
+
+  python benchmarks/fake_ollama.py --ttft-ms 300 --tokens-per-second 40 &
+  OLLAMA_BASE_URL=http://127.0.0.1:11435 uvicorn main:app --workers 4 --port 8000 &
+  python benchmarks/load_test.py --users 50 --duration 60 --out load.json
+
+Run: python benchmarks/load_test.py [--base-url http://127.0.0.1:8000] [--users 20] [--duration 60]
+     [--mix chat=25,recommendations=20,...]   (from the backend/ directory)
+
+Each run registers fresh users (loadtest_<run>_<n>); point it at a scratch
+database.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import httpx
+
+PREFERENCES = ["cafe", "music", "tech", "sports", "study", "art", "snacks", "games", "yoga"]
+LOCATIONS = ["Main Campus", "Library Block", "Canteen", "Sports Complex", "Auditorium", "Hostel"]
+CHAT_MESSAGES = [
+    "hey, what's a good way to spend my evening?",
+    "how much budget do I have left today?",
+    "suggest something to eat under 100 rupees",
+    "plan my afternoon, I'm free from 2 to 6",
+    "write an instagram caption for our tech fest",
+    "I'm bored, any events on campus?",
+]
+DEFAULT_MIX = ("chat=25,recommendations=20,planner=10,budget_status=10,transaction=10,"
+               "analytics=5,chat_sessions=5,profile=5,content=5,catalog=5")
+
+
+# ── Scenarios: (client, vu state, rng) → response ────────────────────────────
+async def chat(c, vu, rng):
+    body = {"message": rng.choice(CHAT_MESSAGES)}
+    if vu.get("session_id") and rng.random() < 0.7:
+        body["session_id"] = vu["session_id"]
+    r = await c.post("/api/chat", json=body, headers=vu["auth"])
+    if r.status_code == 200:
+        vu["session_id"] = r.json().get("session_id") or vu.get("session_id")
+    return r
+
+
+async def recommendations(c, vu, rng):
+    return await c.post("/api/recommendations", headers=vu["auth"], json={
+        "budget": rng.choice([100, 200, 300, 500]),
+        "free_time_minutes": rng.choice([60, 120, 180]),
+        "preferences": rng.sample(PREFERENCES, 2),
+        "location": rng.choice(LOCATIONS),
+        "time_of_day": rng.choice(["morning", "afternoon", "evening"]),
+        "top_k": 5,
+    })
+
+
+async def planner(c, vu, rng):
+    start = rng.choice([9, 12, 14, 17])
+    return await c.post("/api/planner/generate", headers=vu["auth"], json={
+        "budget": rng.choice([150, 300, 500]),
+        "free_time_start": f"{start:02d}:00",
+        "free_time_end": f"{start + rng.choice([2, 3, 4]):02d}:00",
+        "preferences": rng.sample(PREFERENCES, 2),
+        "location": rng.choice(LOCATIONS),
+    })
+
+
+async def budget_status(c, vu, rng):
+    return await c.get("/api/budget/status", headers=vu["auth"])
+
+
+async def transaction(c, vu, rng):
+    return await c.post("/api/budget/transaction", headers=vu["auth"], json={
+        "amount": round(rng.uniform(10, 250), 2),
+        "category": rng.choice(["food", "transport", "entertainment", "stationery"]),
+        "description": "load test",
+    })
+
+
+async def analytics(c, vu, rng):
+    return await c.get("/api/budget/analytics", headers=vu["auth"])
+
+
+async def chat_sessions(c, vu, rng):
+    return await c.get("/api/chat/sessions", headers=vu["auth"])
+
+
+async def profile(c, vu, rng):
+    return await c.get("/api/onboarding/profile", headers=vu["auth"])
+
+
+async def content(c, vu, rng):
+    return await c.post("/api/content/generate", headers=vu["auth"], json={
+        "event_type": rng.choice(["tech fest", "cultural night", "sports meet"]),
+        "tone": rng.choice(["fun", "professional", "energetic"]),
+    })
+
+
+async def catalog(c, vu, rng):
+    return await c.get("/api/recommendations/all", headers=vu["auth"])
+
+
+SCENARIOS = {f.__name__: f for f in (chat, recommendations, planner, budget_status, transaction,
+                                     analytics, chat_sessions, profile, content, catalog)}
+
+
+def _parse_mix(spec: str):
+    weights = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise SystemExit(f"unknown scenario '{name}' (known: {', '.join(SCENARIOS)})")
+        weights[name] = float(weight or 1)
+    return list(weights), list(weights.values())
+
+
+class Stats:
+    def __init__(self):
+        self.latency = defaultdict(list)
+        self.status = defaultdict(lambda: defaultdict(int))
+        self.failures = defaultdict(int)
+
+    def record(self, name: str, seconds: float, status: int):
+        self.latency[name].append(seconds)
+        self.status[name][status] += 1
+        if status >= 400:
+            self.failures[name] += 1
+
+    def summary(self, elapsed: float) -> dict:
+        out = {}
+        for name in sorted(self.status):
+            ms = sorted(s * 1000 for s in self.latency[name])
+            n = len(ms)
+            out[name] = {
+                "requests": n,
+                "failures": self.failures[name],
+                "rps": round(n / elapsed, 2) if elapsed else 0.0,
+                "p50_ms": round(statistics.median(ms), 1) if ms else None,
+                "p95_ms": round(ms[max(0, int(n * 0.95) - 1)], 1) if ms else None,
+                "p99_ms": round(ms[max(0, int(n * 0.99) - 1)], 1) if ms else None,
+                "status": dict(self.status[name]),
+            }
+        return out
+
+
+async def _timed(stats: Stats, name: str, call):
+    t0 = time.perf_counter()
+    try:
+        r = await call
+        status = r.status_code
+    except httpx.HTTPError:
+        r, status = None, 599                       # connection error / client timeout
+    stats.record(name, time.perf_counter() - t0, status)
+    return r
+
+
+async def _virtual_user(n: int, args, stats: Stats, names, weights, stop_at: float, run_id: str):
+    rng = random.Random(args.seed * 100_003 + n)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as c:
+        username = f"loadtest_{run_id}_{n}"
+        r = await _timed(stats, "register", c.post("/api/auth/register", json={
+            "username": username, "email": f"{username}@load.test", "password": "loadtest-pw",
+        }))
+        if r is None or r.status_code != 201:
+            return
+        vu = {"auth": {"Authorization": f"Bearer {r.json()['access_token']}"}}
+        await _timed(stats, "onboarding", c.post("/api/onboarding/submit", headers=vu["auth"], json={
+            "favorite_activities": rng.sample(PREFERENCES, 3), "daily_budget": rng.choice([200, 300, 500]),
+            "active_time": rng.choice(["morning", "afternoon", "evening"]),
+            "social_style": rng.choice(["solo", "small_group", "large_group"]),
+            "motivation": rng.choice(["relaxation", "learning", "fitness"]),
+            "exploration_score": rng.randint(1, 5), "campus_areas": rng.sample(LOCATIONS, 2),
+        }))
+        while time.perf_counter() < stop_at:
+            name = rng.choices(names, weights)[0]
+            await _timed(stats, name, SCENARIOS[name](c, vu, rng))
+            if args.think_ms:
+                await asyncio.sleep(rng.expovariate(1000.0 / args.think_ms))
+
+
+async def _main(args) -> dict:
+    names, weights = _parse_mix(args.mix)
+    stats = Stats()
+    run_id = f"{int(time.time())}{random.Random().randint(0, 999):03d}"
+    t0 = time.perf_counter()
+    stop_at = t0 + args.ramp_up + args.duration
+    tasks = []
+    for n in range(args.users):
+        tasks.append(asyncio.create_task(_virtual_user(n, args, stats, names, weights, stop_at, run_id)))
+        if args.ramp_up:
+            await asyncio.sleep(args.ramp_up / args.users)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - t0
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "base_url": args.base_url,
+            "users": args.users,
+            "duration_s": round(elapsed, 1),
+            "think_ms": args.think_ms,
+            "mix": args.mix,
+            "seed": args.seed,
+        },
+        "endpoints": stats.summary(elapsed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TrustAI API load test")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds after ramp-up")
+    parser.add_argument("--ramp-up", type=float, default=10.0, help="seconds to start all users")
+    parser.add_argument("--think-ms", type=float, default=500.0, help="mean pause between a user's calls")
+    parser.add_argument("--timeout", type=float, default=90.0, help="client timeout per request (s)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario=weight,… (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write results JSON here")
+    args = parser.parse_args()
+
+    results = asyncio.run(_main(args))
+    print(f"{args.users} users, {results['meta']['duration_s']}s\n")
+    print(f"{'endpoint':<17}{'reqs':>7}{'fail':>6}{'rps':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for name, s in results["endpoints"].items():
+        print(f"{name:<17}{s['requests']:>7}{s['failures']:>6}{s['rps']:>8.1f}"
+              f"{s['p50_ms'] or 0:>9.1f}{s['p95_ms'] or 0:>9.1f}{s['p99_ms'] or 0:>9.1f}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nwrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
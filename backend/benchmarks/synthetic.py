@@ -0,0 +1,116 @@
+"""
+Synthetic data for benchmarks: catalogs in the Recommendation schema, users
+with request parameters and recommendation histories, and clustered item
+embeddings. Everything is seeded, so runs are repeatable.
+"""
+
+from typing import Dict, List
+
+import numpy as np
+from sqlalchemy import insert
+
+from models import Recommendation
+from services.optimization_service import LOCATION_DISTANCE
+
+# category → sub_category → tag pool (same vocabulary as data/seed_data.py)
+VOCAB: Dict[str, Dict[str, List[str]]] = {
+    "food": {
+        "cafe": ["cafe", "coffee", "study", "snacks", "quiet"],
+        "fast_food": ["noodles", "momo", "quick", "budget", "spicy", "pizza"],
+        "healthy": ["healthy", "salad", "juice", "fitness", "protein"],
+        "restaurant": ["biryani", "lunch", "spicy", "filling", "value"],
+    },
+    "activity": {
+        "sports": ["sports", "fitness", "team", "outdoor", "basketball"],
+        "wellness": ["yoga", "meditation", "calm", "fitness", "morning"],
+        "academic": ["study", "library", "quiet", "exam", "books"],
+        "social": ["games", "social", "friends", "fun", "indoor"],
+    },
+    "event": {
+        "music": ["music", "live", "open mic", "evening", "social"],
+        "tech": ["tech", "coding", "hackathon", "ai", "workshop"],
+        "creative": ["art", "photography", "exhibition", "creative", "design"],
+        "cultural": ["dance", "culture", "festival", "drama", "social"],
+    },
+}
+SUB_CATEGORIES = [sub for subs in VOCAB.values() for sub in subs]
+LOCATIONS = list(LOCATION_DISTANCE)
+TIMES = ["morning", "afternoon", "evening"]
+
+
+def catalog(n: int, seed: int = 0) -> List[dict]:
+    """n Recommendation rows with ids 1..n."""
+    rng = np.random.default_rng(seed)
+    pairs = [(cat, sub) for cat, subs in VOCAB.items() for sub in subs]
+    pick = rng.integers(len(pairs), size=n)
+    loc = rng.integers(len(LOCATIONS), size=n)
+    cost = np.where(rng.random(n) < 0.3, 0.0, np.round(rng.gamma(2.0, 60.0, size=n)))
+    duration = rng.choice([20, 30, 45, 60, 90, 120, 180], size=n)
+    rating = np.round(rng.uniform(3.0, 5.0, size=n), 1)
+    slots = rng.integers(1, 8, size=n)          # bitmask over TIMES
+    rows = []
+    for i in range(n):
+        cat, sub = pairs[pick[i]]
+        pool = VOCAB[cat][sub]
+        tags = [pool[j] for j in rng.choice(len(pool), size=3, replace=False)]
+        rows.append({
+            "id": i + 1,
+            "name": f"{sub.replace('_', ' ').title()} #{i}",
+            "category": cat,
+            "sub_category": sub,
+            "description": f"Synthetic {sub} {cat} at {LOCATIONS[loc[i]]}: {', '.join(tags)}.",
+            "location": LOCATIONS[loc[i]],
+            "cost": float(cost[i]),
+            "duration_minutes": int(duration[i]),
+            "rating": float(rating[i]),
+            "tags": tags,
+            "available_times": [t for b, t in enumerate(TIMES) if slots[i] >> b & 1],
+        })
+    return rows
+
+
+def write_catalog(engine, rows: List[dict], chunk: int = 10_000) -> None:
+    """Replace the recommendations table contents with `rows`."""
+    with engine.begin() as conn:
+        conn.execute(Recommendation.__table__.delete())
+        for start in range(0, len(rows), chunk):
+            conn.execute(insert(Recommendation), rows[start:start + chunk])
+
+
+def embeddings(rows: List[dict], dim: int, seed: int = 0, spread: float = 0.6) -> np.ndarray:
+    """L2-normalized vectors clustered by sub_category, aligned with `rows`."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((len(SUB_CATEGORIES), dim), dtype=np.float32)
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    code = {sub: i for i, sub in enumerate(SUB_CATEGORIES)}
+    codes = np.fromiter((code[r["sub_category"]] for r in rows), dtype=np.int64, count=len(rows))
+    vecs = rng.standard_normal((len(rows), dim), dtype=np.float32)
+    vecs *= spread / np.sqrt(dim)
+    vecs += centers[codes]
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    return vecs
+
+
+def users(n: int, seed: int = 0, history_length: int = 10) -> List[dict]:
+    """Request parameters plus a recent sub_category history per synthetic user."""
+    rng = np.random.default_rng(seed + 1)
+    all_tags = sorted({t for subs in VOCAB.values() for tags in subs.values() for t in tags})
+    out = []
+    for i in range(n):
+        # Skewed histories so some users sit in a filter bubble
+        favourite = SUB_CATEGORIES[rng.integers(len(SUB_CATEGORIES))]
+        bias = rng.uniform(0.0, 0.8)
+        history = [favourite if rng.random() < bias else SUB_CATEGORIES[rng.integers(len(SUB_CATEGORIES))]
+                   for _ in range(history_length)]
+        out.append({
+            "id": i + 1,
+            "preferences": [str(t) for t in rng.choice(all_tags, size=3, replace=False)],
+            "location": LOCATIONS[rng.integers(len(LOCATIONS))],
+            "budget": float(rng.choice([100, 200, 300, 500])),
+            "free_time_minutes": int(rng.choice([60, 120, 180, 240])),
+            "time_of_day": TIMES[rng.integers(len(TIMES))],
+            "exploration_level": int(rng.integers(1, 6)),
+            "categories": None if rng.random() < 0.7 else [list(VOCAB)[rng.integers(len(VOCAB))]],
+            "history": history,
+        })
+    return out
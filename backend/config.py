@@ -2,10 +2,73 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite:///./trustai.db"
+    ASYNC_DATABASE_URL: str = ""              # default: DATABASE_URL on aiosqlite / asyncpg
+    AUTO_MIGRATE: bool = False                # False = refuse to start when behind (run migrate.py first)
     OLLAMA_BASE_URL: str = "http://localhost:11434"
     OLLAMA_MODEL: str = "llama3.2"
     SECRET_KEY: str = "trustai-hackathon-secret-key"
 
+    # SQLite connection pragmas
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+
+    # Postgres connection pool
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_TIMEOUT_SECONDS: int = 30
+
+    # Semantic chat answer cache
+    CHAT_CACHE_ENABLED: bool = True
+    CHAT_CACHE_THRESHOLD: float = 0.92        # cosine similarity for a hit
+    CHAT_CACHE_TTL_SECONDS: int = 6 * 3600
+    CHAT_CACHE_MAX_ENTRIES: int = 5000
+
+    # Authenticated user snapshot cache (per process)
+    USER_CACHE_TTL_SECONDS: int = 30
+
+    # Password hashing (runs on its own bounded thread pool)
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32         # queued hash/verify calls before shedding with 503
+
+    # Auth attempt limits (per process, sliding window)
+    LOGIN_FAILURES_PER_IP: int = 50             # failed logins + registrations per IP per window
+    LOGIN_FAILURES_PER_USER: int = 5            # failed logins per username per window
+    LOGIN_WINDOW_SECONDS: int = 300
+    # Reverse proxies (comma-separated IPs/CIDRs) whose X-Real-IP /
+    # X-Forwarded-For is believed; from anyone else the socket peer is used
+    TRUSTED_PROXIES: str = ""
+
+    # In-memory recommendation catalog – rebuilt on writes, or after this long
+    # to pick up writes made by other processes
+    CATALOG_MAX_AGE_SECONDS: int = 300
+
+    # Recommendation history used for diversity scoring (per-user ring buffer,
+    # persisted write-behind; at most HISTORY_MAX_USERS users kept in memory)
+    HISTORY_LENGTH: int = 50
+    HISTORY_MAX_USERS: int = 10000
+
+    # Day planner search
+    PLANNER_TOP_N: int = 12                   # candidates per category considered
+    PLANNER_TIME_LIMIT_MS: float = 50         # best plan so far is returned after this
+
+    # Log level for the app's own loggers (records carry the X-Request-ID)
+    LOG_LEVEL: str = "INFO"
+
+    # Sampling profiler: PROFILE_SAMPLE_RATE of requests (0 = off), plus any
+    # request sending "X-Profile: <ADMIN_TOKEN>". ADMIN_TOKEN also guards
+    # /api/admin; empty disables both.
+    ADMIN_TOKEN: str = ""
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_INTERVAL_MS: float = 5.0
+    PROFILE_DIR: str = "data/profiles"
+    PROFILE_KEEP_PER_ROUTE: int = 20
+
+    # Content-addressed storage for avatars and campus map images
+    BLOB_DIR: str = "data/blobs"
+
     class Config:
         env_file = ".env"
 
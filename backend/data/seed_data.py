@@ -7,11 +7,12 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database import SessionLocal, engine
+from database import SessionLocal
+import migrate
 import models
 from services import faiss_service
 
-models.Base.metadata.create_all(bind=engine)
+migrate.upgrade()
 
 # ── Sample Recommendations ────────────────────────────────────────────────────
 RECOMMENDATIONS = [
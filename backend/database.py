@@ -1,17 +1,85 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from config import settings
 
-# SQLite needs check_same_thread=False; ignored for other drivers
-connect_args = {"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(settings.DATABASE_URL, connect_args=connect_args)
+
+def apply_sqlite_pragmas(dbapi_conn) -> None:
+    """
+    Per-connection SQLite tuning: WAL lets readers run alongside the single
+    writer, NORMAL sync is durable across app crashes (only an OS crash can
+    lose the last commits), and busy_timeout makes writers wait for the lock
+    instead of failing immediately with "database is locked".
+    """
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cur.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cur.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    cur.close()
+
+
+def make_engine(url: str) -> Engine:
+    """Engine tuned for the backend in `url` (SQLite pragmas or a sized Postgres pool)."""
+    if url.startswith("sqlite"):
+        # check_same_thread=False: connections are handed between threadpool workers
+        eng = create_engine(url, connect_args={"check_same_thread": False})
+        event.listen(eng, "connect", lambda dbapi_conn, _record: apply_sqlite_pragmas(dbapi_conn))
+        return eng
+    return create_engine(
+        url,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_pre_ping=True,
+    )
+
+
+def async_url(url: str) -> str:
+    """Map a sync DATABASE_URL onto its asyncio driver (aiosqlite / asyncpg)."""
+    scheme, sep, rest = url.partition("://")
+    if "+" in scheme:
+        scheme = scheme.split("+", 1)[0]
+    driver = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg", "postgres": "postgresql+asyncpg"}
+    return driver.get(scheme, scheme) + sep + rest
+
+
+def make_async_engine(url: str) -> AsyncEngine:
+    """Async counterpart of make_engine – same pragmas / pool settings."""
+    if url.startswith("sqlite"):
+        eng = create_async_engine(url)
+        event.listen(eng.sync_engine, "connect", lambda dbapi_conn, _record: apply_sqlite_pragmas(dbapi_conn))
+        return eng
+    return create_async_engine(
+        url,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_pre_ping=True,
+    )
+
+
+engine = make_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Used by async def handlers so queries yield to the event loop instead of
+# blocking it. expire_on_commit=False: attributes stay readable after commit
+# without an implicit (and, under asyncio, illegal) lazy reload.
+async_engine = make_async_engine(settings.ASYNC_DATABASE_URL or async_url(settings.DATABASE_URL))
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,60 +1,20 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from database import engine
-import models, sqlite3, os
+from config import settings
+from database import async_engine, engine
+import migrate
+import observability
 
-# Create all tables on startup
-models.Base.metadata.create_all(bind=engine)
+# Schema is owned by Alembic (migrations/) – startup only compares revisions
+migrate.ensure_current()
 
-# ── Auto-migrate: add columns that may be missing from an older DB ─────────────
-def _auto_migrate():
-    db_path = os.path.join(os.path.dirname(__file__), "trustai.db")
-    if not os.path.exists(db_path):
-        return
-    conn = sqlite3.connect(db_path)
-    cur = conn.cursor()
-    # users table columns
-    cur.execute("PRAGMA table_info(users)")
-    cols = {row[1] for row in cur.fetchall()}
-    for col, defn in [("college_name", "TEXT DEFAULT ''"),
-                      ("city",         "TEXT DEFAULT ''"),
-                      ("avatar",       "TEXT DEFAULT ''")]:
-        if col not in cols:
-            cur.execute(f"ALTER TABLE users ADD COLUMN {col} {defn}")
-    # campus_maps table
-    cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='campus_maps'")
-    if not cur.fetchone():
-        cur.execute("""CREATE TABLE campus_maps (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL UNIQUE,
-            filename TEXT NOT NULL DEFAULT 'campus_map',
-            knowledge_graph TEXT,
-            raw_description TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id))""")
-    # chat_sessions table
-    cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='chat_sessions'")
-    if not cur.fetchone():
-        cur.execute("""CREATE TABLE chat_sessions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            title TEXT DEFAULT 'New Chat',
-            is_pinned INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id))""")
-    # session_id column on chat_messages
-    cur.execute("PRAGMA table_info(chat_messages)")
-    msg_cols = {row[1] for row in cur.fetchall()}
-    if "session_id" not in msg_cols:
-        cur.execute("ALTER TABLE chat_messages ADD COLUMN session_id INTEGER REFERENCES chat_sessions(id)")
-    conn.commit()
-    conn.close()
+from routers import chat, budget, recommendations, planner, content, auth, onboarding, campus, admin
+from services import semantic_cache_service, metrics_service, catalog_service
 
-_auto_migrate()
-
-from routers import chat, budget, recommendations, planner, content, auth, onboarding, campus
+observability.configure_logging(settings.LOG_LEVEL)
+observability.instrument_engine(engine)
+observability.instrument_engine(async_engine.sync_engine)
 
 app = FastAPI(
     title="TRUSTAI API",
@@ -68,7 +28,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", observability.REQUEST_ID_HEADER],
 )
+app.add_middleware(observability.ProfilingMiddleware)
+# Outermost, so the request id is set before anything else runs and timings include CORS
+app.add_middleware(observability.RequestContextMiddleware)
 
 app.include_router(auth.router,            prefix="/api/auth",            tags=["Auth"])
 app.include_router(onboarding.router,      prefix="/api/onboarding",      tags=["Onboarding"])
@@ -78,6 +42,20 @@ app.include_router(recommendations.router, prefix="/api/recommendations",  tags=
 app.include_router(planner.router,         prefix="/api/planner",          tags=["Planner"])
 app.include_router(content.router,         prefix="/api/content",          tags=["Content"])
 app.include_router(campus.router,           prefix="/api/campus",           tags=["Campus"])
+app.include_router(admin.router,            prefix="/api/admin",            tags=["Admin"], include_in_schema=False)
+
+@app.on_event("startup")
+def _warm_catalog():
+    catalog_service.get_snapshot()
+
+@app.on_event("shutdown")
+def _flush_caches():
+    semantic_cache_service.flush()
+
+@app.on_event("shutdown")
+async def _close_async_pool():
+    await async_engine.dispose()
+
 
 @app.get("/")
 def root():
@@ -86,3 +64,7 @@ def root():
 @app.get("/health")
 def health():
     return {"status": "ok"}
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    return PlainTextResponse(metrics_service.render(), media_type="text/plain; version=0.0.4")
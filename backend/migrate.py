@@ -1,46 +1,105 @@
-"""Incremental migrations for TRUSTAI DB (SQLite)."""
-import sqlite3
-
-conn = sqlite3.connect("trustai.db")
-cur = conn.cursor()
-
-cur.execute("PRAGMA table_info(users)")
-existing_cols = {row[1] for row in cur.fetchall()}
-print("Existing user columns:", sorted(existing_cols))
-
-# ── users table additions ─────────────────────────────────────────────────────
-for col, definition in [
-    ("college_name", "TEXT DEFAULT ''"),
-    ("city",         "TEXT DEFAULT ''"),
-    ("avatar",       "TEXT DEFAULT ''"),
-]:
-    if col not in existing_cols:
-        cur.execute(f"ALTER TABLE users ADD COLUMN {col} {definition}")
-        print(f"+ Added users.{col}")
-    else:
-        print(f"  users.{col} already exists")
-
-# ── campus_maps table ─────────────────────────────────────────────────────────
-cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='campus_maps'")
-if not cur.fetchone():
-    cur.execute("""
-        CREATE TABLE campus_maps (
-            id          INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id     INTEGER NOT NULL UNIQUE,
-            filename    TEXT NOT NULL DEFAULT 'campus_map',
-            knowledge_graph TEXT,
-            raw_description TEXT,
-            created_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id)
+"""
+Database migrations for TRUSTAI (Alembic – see migrations/).
+Run: python migrate.py            upgrade DATABASE_URL to the latest revision
+     alembic revision -m "..."    start a new revision   (from the backend/ directory)
+
+Migrating is a deploy step, run once before the app starts. main.py only
+calls ensure_current(): a single read of alembic_version that refuses to
+start when the database is behind. Upgrades hold a cross-process lock (a
+Postgres advisory lock, or a file lock beside a SQLite database), so
+concurrent runs – AUTO_MIGRATE=1 under several workers – wait for each
+other and the later ones find the schema already current.
+"""
+import os
+from contextlib import contextmanager
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:               # Windows: single dev process, no lock
+    fcntl = None
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+from config import settings
+
+_BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+_PG_LOCK_KEY = 0x74727573746169   # arbitrary, shared by every process migrating this DB
+
+
+def _config(url: Optional[str] = None) -> Config:
+    cfg = Config(os.path.join(_BACKEND_DIR, "alembic.ini"))
+    cfg.set_main_option("script_location", os.path.join(_BACKEND_DIR, "migrations"))
+    cfg.attributes["configure_logger"] = False
+    if url:
+        cfg.set_main_option("sqlalchemy.url", url.replace("%", "%%"))
+    return cfg
+
+
+def head_revision() -> str:
+    return ScriptDirectory.from_config(_config()).get_current_head()
+
+
+def current_revision(bind=None) -> Optional[str]:
+    if bind is None:
+        from database import engine as bind
+    with bind.connect() as conn:
+        return MigrationContext.configure(conn).get_current_revision()
+
+
+@contextmanager
+def _migration_lock(url: str):
+    """Hold an exclusive cross-process lock for the database at `url`."""
+    if url.startswith("postgres"):
+        from database import make_engine
+        eng = make_engine(url)
+        try:
+            with eng.connect() as conn:
+                conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _PG_LOCK_KEY})
+                try:
+                    yield
+                finally:
+                    conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _PG_LOCK_KEY})
+        finally:
+            eng.dispose()
+        return
+    path = make_url(url).database if url.startswith("sqlite") else None
+    if fcntl is None or not path or path == ":memory:":
+        yield
+        return
+    with open(path + ".migrate-lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def upgrade(url: Optional[str] = None) -> None:
+    """Upgrade to head; a no-op when another process got there first."""
+    url = url or settings.DATABASE_URL
+    with _migration_lock(url):
+        command.upgrade(_config(url), "head")
+
+
+def ensure_current() -> None:
+    """Fail fast (or upgrade, with AUTO_MIGRATE) when the schema is not at head."""
+    head, current = head_revision(), current_revision()
+    if current == head:
+        return
+    if not settings.AUTO_MIGRATE:
+        raise RuntimeError(
+            f"Database schema is at revision {current or '<none>'}, this build expects {head}. "
+            f"Run: python migrate.py (or alembic upgrade head) before starting the app"
         )
-    """)
-    print("+ Created campus_maps table")
-else:
-    print("  campus_maps already exists")
-
-conn.commit()
-cur.execute("PRAGMA table_info(users)")
-print("\nFinal user columns:", [row[1] for row in cur.fetchall()])
-conn.close()
-print("\nMigration complete.")
+    upgrade()
+
+
+if __name__ == "__main__":
+    upgrade()
+    print(f"[OK] Database at revision {current_revision()}")
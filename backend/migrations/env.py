@@ -0,0 +1,63 @@
+"""Alembic environment – binds migrations to DATABASE_URL and the app's models."""
+import os
+import sys
+from logging.config import fileConfig
+
+from alembic import context
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from database import make_engine
+import models
+
+config = context.config
+# migrate.ensure_current() runs inside the app – don't reset its logging
+if config.config_file_name and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = models.Base.metadata
+
+
+def _url() -> str:
+    return config.get_main_option("sqlalchemy.url") or settings.DATABASE_URL
+
+
+def _configure(**kwargs):
+    context.configure(
+        target_metadata=target_metadata,
+        compare_type=True,
+        # SQLite can't ALTER most things in place – batch mode rebuilds the table
+        render_as_batch=_url().startswith("sqlite"),
+        **kwargs,
+    )
+
+
+def run_migrations_offline():
+    _configure(url=_url(), literal_binds=True, dialect_opts={"paramstyle": "named"})
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
+    engine = make_engine(_url())
+    try:
+        with engine.connect() as connection:
+            _configure(connection=connection)
+            with context.begin_transaction():
+                context.run_migrations()
+    finally:
+        engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,75 @@
+"""
+Idempotent building blocks for revisions.
+Databases created before Alembic was introduced already carry some of these
+objects (create_all / the old _auto_migrate), so every step checks first.
+Offline (--sql) runs can't inspect anything and render the script for an
+empty database.
+"""
+from typing import List
+
+import sqlalchemy as sa
+from alembic import context, op
+
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+
+def is_postgres() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def has_table(name: str) -> bool:
+    if context.is_offline_mode():
+        return False
+    return _inspector().has_table(name)
+
+
+def column_names(table: str) -> set:
+    if context.is_offline_mode():
+        return set()
+    return {c["name"] for c in _inspector().get_columns(table)}
+
+
+def index_names(table: str) -> set:
+    if context.is_offline_mode():
+        return set()
+    return {i["name"] for i in _inspector().get_indexes(table)}
+
+
+def add_column_if_missing(table: str, column: sa.Column) -> bool:
+    """Returns True if the column was added (callers backfill only then)."""
+    if column.name in column_names(table):
+        return False
+    op.add_column(table, column)
+    return True
+
+
+def drop_column_if_present(table: str, name: str) -> None:
+    if name in column_names(table):
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column(name)
+
+
+def create_index_if_missing(name: str, table: str, columns: List[str], unique: bool = False) -> None:
+    """
+    On Postgres the index is built CONCURRENTLY (outside the migration
+    transaction) so writes to a live table are not blocked while it builds.
+    """
+    if name in index_names(table):
+        return
+    if is_postgres():
+        with op.get_context().autocommit_block():
+            op.create_index(name, table, columns, unique=unique, postgresql_concurrently=True)
+    else:
+        op.create_index(name, table, columns, unique=unique)
+
+
+def drop_index_if_present(name: str, table: str) -> None:
+    if name not in index_names(table):
+        return
+    if is_postgres():
+        with op.get_context().autocommit_block():
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+    else:
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,150 @@
+"""Baseline schema
+
+The tables as they existed before Alembic. Databases created by the old
+create_all / _auto_migrate startup code already have most of this; anything
+missing (tables or the columns _auto_migrate used to add) is created.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations import helpers
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _tables():
+    return [
+        ("users", lambda: op.create_table(
+            "users",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("username", sa.String, nullable=False),
+            sa.Column("email", sa.String, nullable=False),
+            sa.Column("password_hash", sa.String, nullable=False),
+            sa.Column("name", sa.String),
+            sa.Column("college_name", sa.String),
+            sa.Column("city", sa.String),
+            sa.Column("daily_budget", sa.Float),
+            sa.Column("monthly_budget", sa.Float),
+            sa.Column("preferences", sa.JSON),
+            sa.Column("location", sa.String),
+            sa.Column("is_onboarded", sa.Boolean),
+            sa.Column("avatar", sa.Text),
+            sa.Column("created_at", sa.DateTime),
+        )),
+        ("user_profiles", lambda: op.create_table(
+            "user_profiles",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id"), unique=True),
+            sa.Column("onboarding_answers", sa.JSON),
+            sa.Column("spending_style", sa.String),
+            sa.Column("activity_persona", sa.String),
+            sa.Column("social_preference", sa.String),
+            sa.Column("exploration_level", sa.Integer),
+            sa.Column("energy_level", sa.String),
+            sa.Column("top_categories", sa.JSON),
+            sa.Column("personalization_summary", sa.Text),
+            sa.Column("optimization_weights", sa.JSON),
+            sa.Column("created_at", sa.DateTime),
+            sa.Column("updated_at", sa.DateTime),
+        )),
+        ("transactions", lambda: op.create_table(
+            "transactions",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id")),
+            sa.Column("amount", sa.Float),
+            sa.Column("category", sa.String),
+            sa.Column("description", sa.String),
+            sa.Column("timestamp", sa.DateTime),
+            sa.Column("date", sa.String),
+        )),
+        ("recommendations", lambda: op.create_table(
+            "recommendations",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("name", sa.String),
+            sa.Column("category", sa.String),
+            sa.Column("sub_category", sa.String),
+            sa.Column("description", sa.Text),
+            sa.Column("location", sa.String),
+            sa.Column("cost", sa.Float),
+            sa.Column("duration_minutes", sa.Integer),
+            sa.Column("rating", sa.Float),
+            sa.Column("tags", sa.JSON),
+            sa.Column("available_times", sa.JSON),
+            sa.Column("embedding_index", sa.Integer, nullable=True),
+        )),
+        ("campus_maps", lambda: op.create_table(
+            "campus_maps",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id"), unique=True),
+            sa.Column("filename", sa.String),
+            sa.Column("knowledge_graph", sa.JSON),
+            sa.Column("raw_description", sa.Text),
+            sa.Column("created_at", sa.DateTime),
+            sa.Column("updated_at", sa.DateTime),
+        )),
+        ("chat_sessions", lambda: op.create_table(
+            "chat_sessions",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id")),
+            sa.Column("title", sa.String),
+            sa.Column("is_pinned", sa.Boolean),
+            sa.Column("created_at", sa.DateTime),
+            sa.Column("updated_at", sa.DateTime),
+        )),
+        ("chat_messages", lambda: op.create_table(
+            "chat_messages",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id")),
+            sa.Column("session_id", sa.Integer, sa.ForeignKey("chat_sessions.id"), nullable=True),
+            sa.Column("role", sa.String),
+            sa.Column("content", sa.Text),
+            sa.Column("timestamp", sa.DateTime),
+            sa.Column("context_data", sa.JSON, nullable=True),
+        )),
+        ("day_plans", lambda: op.create_table(
+            "day_plans",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id")),
+            sa.Column("plan_date", sa.String),
+            sa.Column("total_cost", sa.Float),
+            sa.Column("total_duration", sa.Integer),
+            sa.Column("items", sa.JSON),
+            sa.Column("explanation", sa.Text),
+            sa.Column("created_at", sa.DateTime),
+        )),
+    ]
+
+
+def upgrade():
+    existing = set()
+    for name, create in _tables():
+        if helpers.has_table(name):
+            existing.add(name)
+        else:
+            create()
+        helpers.create_index_if_missing(f"ix_{name}_id", name, ["id"])
+
+    helpers.create_index_if_missing("ix_users_username", "users", ["username"], unique=True)
+    helpers.create_index_if_missing("ix_users_email", "users", ["email"], unique=True)
+
+    # Columns the old startup auto-migration added to early databases
+    if "users" in existing:
+        for col in ("college_name", "city"):
+            helpers.add_column_if_missing("users", sa.Column(col, sa.String, server_default=""))
+        helpers.add_column_if_missing("users", sa.Column("avatar", sa.Text, server_default=""))
+    if "chat_messages" in existing:
+        # Plain column, as the old migration added it (SQLite can't ALTER in a FK constraint)
+        helpers.add_column_if_missing("chat_messages", sa.Column("session_id", sa.Integer, nullable=True))
+
+
+def downgrade():
+    for name, _create in reversed(_tables()):
+        if helpers.has_table(name):
+            op.drop_table(name)
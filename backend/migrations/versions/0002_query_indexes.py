@@ -0,0 +1,31 @@
+"""Composite indexes for the per-user list/sum queries
+
+Revision ID: 0002_query_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-19
+"""
+from migrations import helpers
+
+revision = "0002_query_indexes"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+# (name, table, columns) – mirrors the Index() entries in models.py
+INDEXES = [
+    ("ix_transactions_user_date", "transactions", ["user_id", "date", "timestamp"]),
+    ("ix_chat_sessions_user_pinned_updated", "chat_sessions", ["user_id", "is_pinned", "updated_at"]),
+    ("ix_chat_messages_session_ts", "chat_messages", ["session_id", "timestamp"]),
+    ("ix_chat_messages_user_ts", "chat_messages", ["user_id", "timestamp"]),
+    ("ix_day_plans_user_created", "day_plans", ["user_id", "created_at"]),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        helpers.create_index_if_missing(name, table, columns)
+
+
+def downgrade():
+    for name, table, _columns in reversed(INDEXES):
+        helpers.drop_index_if_present(name, table)
@@ -0,0 +1,30 @@
+"""Denormalized message_count / last_message_preview on chat_sessions
+
+Revision ID: 0003_chat_session_counters
+Revises: 0002_query_indexes
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations import helpers
+
+revision = "0003_chat_session_counters"
+down_revision = "0002_query_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if helpers.add_column_if_missing("chat_sessions", sa.Column("message_count", sa.Integer, server_default="0")):
+        op.execute("""UPDATE chat_sessions SET message_count = (
+            SELECT COUNT(*) FROM chat_messages m WHERE m.session_id = chat_sessions.id)""")
+    if helpers.add_column_if_missing("chat_sessions", sa.Column("last_message_preview", sa.String, nullable=True)):
+        op.execute("""UPDATE chat_sessions SET last_message_preview = (
+            SELECT substr(m.content, 1, 60) FROM chat_messages m WHERE m.session_id = chat_sessions.id
+            ORDER BY m.timestamp DESC, m.id DESC LIMIT 1)""")
+
+
+def downgrade():
+    helpers.drop_column_if_present("chat_sessions", "last_message_preview")
+    helpers.drop_column_if_present("chat_sessions", "message_count")
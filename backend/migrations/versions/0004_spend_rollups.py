@@ -0,0 +1,37 @@
+"""Per-user daily/monthly spend rollups, backfilled from transactions
+
+Revision ID: 0004_spend_rollups
+Revises: 0003_chat_session_counters
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations import helpers
+
+revision = "0004_spend_rollups"
+down_revision = "0003_chat_session_counters"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if helpers.has_table("spend_rollups"):
+        return
+    op.create_table(
+        "spend_rollups",
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("period", sa.String, primary_key=True),      # "2025-02-24" (day) or "2025-02" (month)
+        sa.Column("amount", sa.Float),
+        sa.Column("tx_count", sa.Integer),
+    )
+    for period in ("date", "substr(date, 1, 7)"):
+        op.execute(f"""INSERT INTO spend_rollups (user_id, period, amount, tx_count)
+            SELECT user_id, {period}, SUM(amount), COUNT(id) FROM transactions
+            WHERE user_id IS NOT NULL AND date IS NOT NULL
+            GROUP BY user_id, {period}""")
+
+
+def downgrade():
+    if helpers.has_table("spend_rollups"):
+        op.drop_table("spend_rollups")
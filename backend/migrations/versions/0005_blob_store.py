@@ -0,0 +1,49 @@
+"""campus_maps.image_key; move inline base64 avatars into the blob store
+
+Revision ID: 0005_blob_store
+Revises: 0004_spend_rollups
+Create Date: 2026-10-19
+"""
+import base64
+
+from alembic import context, op
+import sqlalchemy as sa
+
+from migrations import helpers
+
+revision = "0005_blob_store"
+down_revision = "0004_spend_rollups"
+branch_labels = None
+depends_on = None
+
+BATCH = 200
+
+
+def upgrade():
+    helpers.add_column_if_missing("campus_maps", sa.Column("image_key", sa.String, nullable=True))
+
+    if context.is_offline_mode():
+        return          # the avatar move writes files – it needs a live database
+    from services import blob_store
+
+    bind = op.get_bind()
+    users = sa.table("users", sa.column("id", sa.Integer), sa.column("avatar", sa.Text))
+    while True:
+        rows = bind.execute(
+            sa.select(users.c.id, users.c.avatar).where(users.c.avatar.like("data:%")).limit(BATCH)
+        ).fetchall()
+        if not rows:
+            break
+        for user_id, data_url in rows:
+            header, _, b64 = data_url.partition(",")
+            content_type = header[len("data:"):].split(";")[0]
+            try:
+                url = blob_store.url_for(blob_store.put(base64.b64decode(b64), content_type))
+            except ValueError:
+                url = ""    # undecodable legacy value – drop it rather than loop on it forever
+            bind.execute(users.update().where(users.c.id == user_id).values(avatar=url))
+
+
+def downgrade():
+    # Avatars stay in the blob store; only the schema change is reverted
+    helpers.drop_column_if_present("campus_maps", "image_key")
@@ -0,0 +1,32 @@
+"""Persistent per-user recommendation history
+
+Revision ID: 0006_recommendation_history
+Revises: 0005_blob_store
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations import helpers
+
+revision = "0006_recommendation_history"
+down_revision = "0005_blob_store"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if helpers.has_table("recommendation_history"):
+        return
+    op.create_table(
+        "recommendation_history",
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("items", sa.JSON),
+        sa.Column("version", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime),
+    )
+
+
+def downgrade():
+    if helpers.has_table("recommendation_history"):
+        op.drop_table("recommendation_history")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, JSON, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -18,7 +18,7 @@ class User(Base):
     preferences = Column(JSON, default=list)        # auto-populated from onboarding
     location = Column(String, default="Main Campus")
     is_onboarded = Column(Boolean, default=False)   # True after completing questionnaire
-    avatar = Column(Text, default="")               # base64 encoded avatar image
+    avatar = Column(Text, default="")               # blob store URL (legacy rows: base64 data URL)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     transactions = relationship("Transaction", back_populates="user")
@@ -55,6 +55,9 @@ class UserProfile(Base):
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        Index("ix_transactions_user_date", "user_id", "date", "timestamp"),   # budget totals / today's list
+    )
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), default=1)
     amount = Column(Float)
@@ -66,6 +69,26 @@ class Transaction(Base):
     user = relationship("User", back_populates="transactions")
 
 
+class SpendRollup(Base):
+    """Per-user spend counters, one row per day ("2025-02-24") and per month ("2025-02").
+    Maintained in the same DB transaction as every Transaction insert."""
+    __tablename__ = "spend_rollups"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    period = Column(String, primary_key=True)
+    amount = Column(Float, default=0.0)
+    tx_count = Column(Integer, default=0)
+
+
+class RecommendationHistory(Base):
+    """Recent recommended sub_categories per user, oldest first, capped at HISTORY_LENGTH.
+    `version` increments on every write so workers can tell their copy is stale."""
+    __tablename__ = "recommendation_history"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    items = Column(JSON, default=list)
+    version = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class Recommendation(Base):
     __tablename__ = "recommendations"
     id = Column(Integer, primary_key=True, index=True)
@@ -90,6 +113,7 @@ class CampusMap(Base):
     filename = Column(String, default="")
     knowledge_graph = Column(JSON, default=dict)   # {areas, facilities, food_spots, shortcuts}
     raw_description = Column(Text, default="")     # plain-text description from LLM vision
+    image_key = Column(String, nullable=True)      # uploaded map image in the blob store
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -99,10 +123,15 @@ class CampusMap(Base):
 class ChatSession(Base):
     """A named conversation thread — like ChatGPT's sidebar entries."""
     __tablename__ = "chat_sessions"
+    __table_args__ = (
+        Index("ix_chat_sessions_user_pinned_updated", "user_id", "is_pinned", "updated_at"),  # sidebar order
+    )
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     title = Column(String, default="New Chat")
     is_pinned = Column(Boolean, default=False)
+    message_count = Column(Integer, default=0)          # denormalized, maintained on insert
+    last_message_preview = Column(String, nullable=True)  # first 60 chars of the latest message
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -112,6 +141,10 @@ class ChatSession(Base):
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        Index("ix_chat_messages_session_ts", "session_id", "timestamp"),   # per-session history + cascade delete
+        Index("ix_chat_messages_user_ts", "user_id", "timestamp"),         # recent history across sessions
+    )
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), default=1)
     session_id = Column(Integer, ForeignKey("chat_sessions.id"), nullable=True)
@@ -126,6 +159,9 @@ class ChatMessage(Base):
 
 class DayPlan(Base):
     __tablename__ = "day_plans"
+    __table_args__ = (
+        Index("ix_day_plans_user_created", "user_id", "created_at"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), default=1)
     plan_date = Column(String)
@@ -0,0 +1,158 @@
+"""
+Request observability: an X-Request-ID on every request and response, the
+id stamped on every log record, and per-request HTTP latency and DB query
+count histograms (rendered on GET /metrics with everything else in
+services/metrics_service).
+
+The request id is taken from the incoming X-Request-ID header when it looks
+sane (so a proxy's id carries through), otherwise generated. Sampled
+requests are also CPU-profiled (ProfilingMiddleware).
+"""
+
+import contextvars
+import logging
+import re
+import time
+import uuid
+from typing import Optional
+
+from sqlalchemy import event
+
+from starlette.concurrency import run_in_threadpool
+
+from services import metrics_service, profiler_service
+
+REQUEST_ID_HEADER = "X-Request-ID"
+_VALID_ID = re.compile(r"^[A-Za-z0-9._:-]{1,64}$")
+
+_request_id: contextvars.ContextVar[str] = contextvars.ContextVar("request_id", default="-")
+# Mutable holder so queries run on threadpool workers (copied contexts) still count
+_db_queries: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("db_queries", default=None)
+
+HTTP_SECONDS = metrics_service.histogram(
+    "trustai_http_request_seconds", "HTTP request latency until the response is sent",
+    ("method", "route", "status"),
+)
+DB_QUERIES = metrics_service.histogram(
+    "trustai_db_queries_per_request", "SQL statements executed per HTTP request",
+    ("route",), buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+
+log = logging.getLogger("trustai.access")
+
+
+def request_id() -> str:
+    """The current request's id ("-" outside a request)."""
+    return _request_id.get()
+
+
+# ── Logging ──────────────────────────────────────────────────────────────────
+class RequestIdFilter(logging.Filter):
+    """Adds `request_id` to every record so formats can use %(request_id)s."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        return True
+
+
+def configure_logging(level: str = "INFO") -> None:
+    handler = logging.StreamHandler()
+    handler.addFilter(RequestIdFilter())
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s"))
+    root = logging.getLogger("trustai")
+    root.setLevel(level.upper())
+    root.handlers[:] = [handler]
+    root.propagate = False
+
+
+# ── DB query counting ────────────────────────────────────────────────────────
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    counter = _db_queries.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def instrument_engine(engine) -> None:
+    """Count statements on `engine` (sync, or an AsyncEngine's sync_engine) per request."""
+    event.listen(engine, "before_cursor_execute", _count_query)
+
+
+# ── Middleware ───────────────────────────────────────────────────────────────
+class RequestContextMiddleware:
+    """
+    Plain ASGI middleware (no BaseHTTPMiddleware – it would break contextvar
+    propagation and buffer streaming responses). Measures until the last body
+    chunk is sent, so background tasks after the response aren't counted.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        incoming = next((v.decode("latin-1") for k, v in scope["headers"] if k == b"x-request-id"), "")
+        rid = incoming if _VALID_ID.match(incoming) else uuid.uuid4().hex
+        id_token = _request_id.set(rid)
+        queries = [0]
+        queries_token = _db_queries.set(queries)
+        start = time.perf_counter()
+        status, done = 500, False
+
+        async def send_wrapper(message):
+            nonlocal status, done
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-request-id", rid.encode("latin-1"))]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                done = True
+                self._record(scope, status, time.perf_counter() - start, queries[0])
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            if not done:
+                self._record(scope, 500, time.perf_counter() - start, queries[0])
+            raise
+        finally:
+            _db_queries.reset(queries_token)
+            _request_id.reset(id_token)
+
+    @staticmethod
+    def _record(scope, status: int, seconds: float, queries: int) -> None:
+        route = scope.get("route")
+        # Templated path keeps label cardinality bounded; unmatched paths share one label
+        path = getattr(route, "path", None) or "unmatched"
+        HTTP_SECONDS.observe(seconds, method=scope["method"], route=path, status=status)
+        DB_QUERIES.observe(queries, route=path)
+        log.info("%s %s %s %.1fms db=%d", scope["method"], scope["path"], status, seconds * 1000, queries)
+
+
+class ProfilingMiddleware:
+    """
+    Runs the sampling profiler (services/profiler_service) for a sample of
+    requests, or any request sending "X-Profile: <ADMIN_TOKEN>". Must sit
+    inside RequestContextMiddleware so the profile is named by request id.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = next((v.decode("latin-1") for k, v in scope["headers"] if k == b"x-profile"), None)
+        if not profiler_service.should_profile(token):
+            return await self.app(scope, receive, send)
+
+        session = profiler_service.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler_service.stop(session)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            name = await run_in_threadpool(profiler_service.save, session, scope["method"], route, request_id())
+            if name:
+                log.info("profile written: %s", name)
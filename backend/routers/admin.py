@@ -0,0 +1,31 @@
+"""Admin router — recent request profiles. Every route needs X-Admin-Token."""
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import FileResponse
+from typing import Optional
+from services import profiler_service
+
+router = APIRouter()
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    # 404 rather than 401/403 – don't advertise the admin API to guessers
+    if not profiler_service.is_admin(x_admin_token):
+        raise HTTPException(404, detail="Not Found")
+
+
+@router.get("/profiles", dependencies=[Depends(require_admin)])
+def list_profiles(endpoint: Optional[str] = None, limit: int = 50):
+    """Newest profiles first; `endpoint` filters by the route slug (e.g. api-recommendations)."""
+    profiles = profiler_service.list_profiles()
+    if endpoint:
+        profiles = [p for p in profiles if p["endpoint"] == endpoint]
+    return profiles[:max(1, min(limit, 500))]
+
+
+@router.get("/profiles/{name}", dependencies=[Depends(require_admin)])
+def download_profile(name: str):
+    """Collapsed stacks – feed to flamegraph.pl, speedscope or inferno-flamegraph."""
+    path = profiler_service.profile_path(name)
+    if path is None:
+        raise HTTPException(404, detail="Profile not found.")
+    return FileResponse(path, media_type="text/plain; charset=utf-8", filename=name)
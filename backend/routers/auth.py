@@ -1,31 +1,104 @@
 """Authentication: register, login, get current user."""
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from database import get_db
+import ipaddress
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+from database import get_async_db
 from models import User
 from schemas import RegisterRequest, LoginRequest, TokenResponse, UserResponse
-from auth_utils import hash_password, verify_password, create_access_token, get_current_user
+from auth_utils import hash_password_async, verify_password_async, create_access_token, get_current_user
+from services import metrics_service
+from services.rate_limiter import SlidingWindowLimiter
 
 router = APIRouter()
 
+# Checked before any bcrypt work so rejected attempts cost almost nothing. Only
+# failures count – a campus NAT or dev proxy puts many honest users on one IP;
+# load from successful attempts is bounded by the hashing pool instead
+_ip_failures = SlidingWindowLimiter(settings.LOGIN_FAILURES_PER_IP, settings.LOGIN_WINDOW_SECONDS)
+_user_failures = SlidingWindowLimiter(settings.LOGIN_FAILURES_PER_USER, settings.LOGIN_WINDOW_SECONDS)
+
+RATE_LIMITED = metrics_service.counter(
+    "trustai_auth_rate_limited_total", "Auth attempts rejected with 429", ["endpoint", "reason"],
+)
+
+
+def _parse_networks(spec: str) -> List[ipaddress._BaseNetwork]:
+    return [ipaddress.ip_network(part.strip(), strict=False) for part in spec.split(",") if part.strip()]
+
+
+_TRUSTED_PROXIES = _parse_networks(settings.TRUSTED_PROXIES)
+
+
+def _is_trusted_proxy(host: str) -> bool:
+    try:
+        addr = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(addr in net for net in _TRUSTED_PROXIES)
+
+
+def _client_ip(request: Request) -> str:
+    """
+    Address the per-IP limit is keyed on. Forwarding headers are only taken
+    from a TRUSTED_PROXIES peer – anyone reaching the app directly could set
+    them to a fresh value per attempt.
+    """
+    peer = request.client.host if request.client else "unknown"
+    if not _is_trusted_proxy(peer):
+        return peer
+    # nginx sets X-Real-IP; otherwise the last X-Forwarded-For hop not added by a trusted proxy
+    real_ip = request.headers.get("x-real-ip", "").strip()
+    if real_ip:
+        return real_ip
+    hops = [h.strip() for h in request.headers.get("x-forwarded-for", "").split(",") if h.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted_proxy(hop):
+            return hop
+    return hops[0] if hops else peer
+
+
+def _too_many(endpoint: str, reason: str, retry_after: int):
+    RATE_LIMITED.inc(endpoint=endpoint, reason=reason)
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many attempts. Please wait a moment and try again.",
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+def _check_ip(request: Request, endpoint: str) -> str:
+    """Reject an IP with too many recent failures; returns the IP to record failures under."""
+    ip = _client_ip(request)
+    wait = _ip_failures.retry_after(ip)
+    if wait:
+        raise _too_many(endpoint, "ip", wait)
+    return ip
+
 
 @router.post("/register", response_model=TokenResponse, status_code=201)
-def register(req: RegisterRequest, db: Session = Depends(get_db)):
-    if db.query(User).filter(User.username == req.username).first():
+async def register(req: RegisterRequest, request: Request, db: AsyncSession = Depends(get_async_db)):
+    ip = _check_ip(request, "register")
+    # Taken names count as failures – repeated probing is account enumeration
+    if (await db.execute(select(User.id).where(User.username == req.username))).first():
+        _ip_failures.hit(ip)
         raise HTTPException(status_code=400, detail="Username already taken.")
-    if db.query(User).filter(User.email == req.email).first():
+    if (await db.execute(select(User.id).where(User.email == req.email))).first():
+        _ip_failures.hit(ip)
         raise HTTPException(status_code=400, detail="Email already registered.")
 
     user = User(
         username=req.username,
         email=req.email,
-        password_hash=hash_password(req.password),
+        password_hash=await hash_password_async(req.password),
         name=req.name,
         is_onboarded=False,
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
 
     token = create_access_token({"sub": str(user.id)})
     return TokenResponse(
@@ -39,13 +112,22 @@ def register(req: RegisterRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(req: LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == req.username).first()
-    if not user or not verify_password(req.password, user.password_hash):
+async def login(req: LoginRequest, request: Request, db: AsyncSession = Depends(get_async_db)):
+    ip = _check_ip(request, "login")
+    username_key = req.username.strip().lower()
+    wait = _user_failures.retry_after(username_key)
+    if wait:
+        raise _too_many("login", "user", wait)
+
+    user = (await db.execute(select(User).where(User.username == req.username))).scalars().first()
+    if not user or not await verify_password_async(req.password, user.password_hash):
+        _user_failures.hit(username_key)
+        _ip_failures.hit(ip)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password.",
         )
+    _user_failures.reset(username_key)
 
     token = create_access_token({"sub": str(user.id)})
     return TokenResponse(
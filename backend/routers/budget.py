@@ -1,20 +1,51 @@
-from fastapi import APIRouter, Depends, HTTPException
+import csv
+import io
+from datetime import date, timedelta
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, UploadFile, File
 from sqlalchemy.orm import Session
 from database import get_db
-from schemas import TransactionCreate, TransactionResponse, BudgetStatus
+from schemas import TransactionCreate, TransactionResponse, BudgetStatus, SpendingAnalytics, TransactionImportResult
 from services import budget_service
 from models import User
-from auth_utils import get_current_user
+from auth_utils import get_current_user, invalidate_user
 
 router = APIRouter()
 
+MAX_IMPORT_MB = 25
+
 
 @router.get("/status", response_model=BudgetStatus)
 def get_status(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    return budget_service.get_budget_status(db, user_id=current_user.id)
+    return budget_service.get_budget_status(db, user_id=current_user.id, user=current_user)
+
+
+@router.get("/analytics", response_model=SpendingAnalytics)
+def get_analytics(
+    request: Request,
+    response: Response,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Daily/weekly/monthly spend series, category split and month-end projection (default: last 365 days)."""
+    end = end or date.today()
+    start = start or end - timedelta(days=364)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be on or before end")
+    if (end - start).days + 1 > budget_service.MAX_ANALYTICS_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range too large. Max {budget_service.MAX_ANALYTICS_DAYS} days.")
+
+    etag = budget_service.analytics_etag(db, current_user, start, end)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return budget_service.get_spending_analytics(db, current_user, start, end)
 
 
 @router.post("/transaction", response_model=TransactionResponse)
@@ -23,19 +54,51 @@ def add_transaction(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    budget_service.is_within_budget(db, current_user.id, tx.amount)
+    budget_service.is_within_budget(db, current_user.id, tx.amount, user=current_user)
     return budget_service.add_transaction(
         db, current_user.id, tx.amount, tx.category, tx.description
     )
 
 
+@router.post("/import", response_model=TransactionImportResult)
+def import_transactions(
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Bulk import a bank/UPI export as CSV (header: date,amount,category,description)
+    or NDJSON (one object per line). Rows are parsed incrementally, deduplicated
+    against existing transactions and inserted in one transaction.
+    """
+    name = (file.filename or "").lower()
+    fmt = (format or ("csv" if name.endswith(".csv") or file.content_type == "text/csv" else "ndjson")).lower()
+    if fmt == "jsonl":
+        fmt = "ndjson"
+    if fmt not in ("csv", "ndjson"):
+        raise HTTPException(400, detail="Unsupported format. Use csv or ndjson.")
+    if file.size and file.size > MAX_IMPORT_MB * 1024 * 1024:
+        raise HTTPException(400, detail=f"File too large. Max {MAX_IMPORT_MB} MB.")
+
+    lines = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return budget_service.import_transactions(db, current_user.id, lines, fmt)
+    except UnicodeDecodeError:
+        raise HTTPException(400, detail="File must be UTF-8 encoded.")
+    except csv.Error as e:
+        raise HTTPException(400, detail=f"Malformed CSV: {e}")
+    finally:
+        lines.detach()
+
+
 @router.get("/check")
 def check_budget(
     amount: float,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    return budget_service.is_within_budget(db, current_user.id, amount)
+    return budget_service.is_within_budget(db, current_user.id, amount, user=current_user)
 
 
 @router.put("/settings")
@@ -50,4 +113,5 @@ def update_budget(
     if monthly is not None:
         current_user.monthly_budget = monthly
     db.commit()
+    invalidate_user(current_user.id)
     return {"daily_budget": current_user.daily_budget, "monthly_budget": current_user.monthly_budget}
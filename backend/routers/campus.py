@@ -1,11 +1,12 @@
 """Campus map router — upload site map image, extract knowledge graph via LLM vision."""
 import base64
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Request, Response
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 from database import get_db
 from models import User, CampusMap
-from services import llm_service
-from auth_utils import get_current_user
+from services import llm_service, blob_store, campus_graph_service
+from auth_utils import get_current_user, invalidate_user
 
 router = APIRouter()
 
@@ -27,6 +28,9 @@ async def upload_campus_map(
     if len(raw_bytes) > MAX_SIZE_MB * 1024 * 1024:
         raise HTTPException(400, detail=f"File too large. Max {MAX_SIZE_MB} MB.")
 
+    # Keep the image itself in the blob store; the row only stores its key
+    image_key = blob_store.put(raw_bytes, file.content_type)
+
     # Base64 encode for LLM vision API
     image_b64 = base64.b64encode(raw_bytes).decode("utf-8")
 
@@ -41,16 +45,19 @@ async def upload_campus_map(
         existing.filename = file.filename or "campus_map"
         existing.knowledge_graph = knowledge_graph
         existing.raw_description = raw_description
+        existing.image_key = image_key
     else:
         new_map = CampusMap(
             user_id=current_user.id,
             filename=file.filename or "campus_map",
             knowledge_graph=knowledge_graph,
             raw_description=raw_description,
+            image_key=image_key,
         )
         db.add(new_map)
 
     db.commit()
+    campus_graph_service.invalidate(current_user.id)
 
     areas = knowledge_graph.get("areas", [])
     return {
@@ -58,6 +65,7 @@ async def upload_campus_map(
         "filename": file.filename,
         "areas_found": len(areas),
         "knowledge_graph": knowledge_graph,
+        "image_url": blob_store.url_for(image_key),
     }
 
 
@@ -76,6 +84,7 @@ def get_campus_map(
         "knowledge_graph": campus_map.knowledge_graph,
         "areas": campus_map.knowledge_graph.get("areas", []),
         "description": campus_map.knowledge_graph.get("description", ""),
+        "image_url": blob_store.url_for(campus_map.image_key) if campus_map.image_key else None,
         "updated_at": campus_map.updated_at.isoformat() if campus_map.updated_at else None,
     }
 
@@ -90,38 +99,72 @@ def delete_campus_map(
     if campus_map:
         db.delete(campus_map)
         db.commit()
+        campus_graph_service.invalidate(current_user.id)
     return {"message": "Campus map removed."}
 
 
 @router.post("/avatar")
-async def upload_avatar(
+def upload_avatar(
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Upload a profile photo — stored as base64 on the user record."""
+    """
+    Upload a profile photo — stored in the blob store, the user row keeps its URL.
+    Plain def: the file I/O and Pillow decoding run on the threadpool, not the event loop.
+    """
     if file.content_type not in ALLOWED_TYPES:
         raise HTTPException(400, detail="Unsupported file type. Use JPEG or PNG.")
 
-    raw_bytes = await file.read()
+    raw_bytes = file.file.read()
     if len(raw_bytes) > 2 * 1024 * 1024:  # 2 MB limit for avatars
         raise HTTPException(400, detail="Avatar too large. Max 2 MB.")
 
-    b64 = base64.b64encode(raw_bytes).decode("utf-8")
-    data_url = f"data:{file.content_type};base64,{b64}"
+    key = blob_store.put(raw_bytes, file.content_type)
+    blob_store.thumbnail_path_for(key)      # generate the thumbnail up front
 
-    user = db.query(User).filter(User.id == current_user.id).first()
-    user.avatar = data_url
+    current_user.avatar = blob_store.url_for(key)
     db.commit()
+    invalidate_user(current_user.id)
 
-    return {"avatar": data_url}
+    return {"avatar": blob_store.url_for(key), "avatar_thumb": blob_store.thumbnail_url_for(key)}
 
 
 @router.get("/avatar")
 def get_avatar(
-    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Return the user's stored avatar data URL."""
-    user = db.query(User).filter(User.id == current_user.id).first()
-    return {"avatar": user.avatar or ""}
+    """Return the URL of the user's avatar (empty if none)."""
+    return {"avatar": current_user.avatar or ""}
+
+
+IMMUTABLE = "public, max-age=31536000, immutable"   # content-addressed → never changes
+
+
+def _serve_blob(request: Request, key: str, path: str, media_type: str, cache_control: str = IMMUTABLE):
+    headers = {"ETag": blob_store.etag_for(key), "Cache-Control": cache_control}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+
+@router.get("/blobs/{key}")
+def get_blob(key: str, request: Request):
+    """Stream a stored image (avatars, campus maps). Keys are content hashes, so no auth is needed for <img> tags."""
+    path = blob_store.path_for(key)
+    if not path:
+        raise HTTPException(404, detail="Not found")
+    return _serve_blob(request, key, path, blob_store.content_type_for(key))
+
+
+@router.get("/blobs/{key}/thumb")
+def get_blob_thumbnail(key: str, request: Request):
+    """Small WebP thumbnail of a stored image (generated on first request)."""
+    path = blob_store.thumbnail_path_for(key)
+    if not path:
+        raise HTTPException(404, detail="Not found")
+    if path.endswith(".thumb.webp"):
+        return _serve_blob(request, key + ".thumb", path, "image/webp")
+    # No thumbnail (Pillow missing or undecodable): serve the original as itself,
+    # and don't let clients pin it to this URL forever – a real thumbnail may follow
+    return _serve_blob(request, key, path, blob_store.content_type_for(key), "public, max-age=3600")
@@ -1,11 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+import base64
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from database import get_db
+from sqlalchemy import desc, or_, and_, func, select
+from starlette.concurrency import run_in_threadpool
+from database import get_db, get_async_db
 from schemas import ChatRequest, ChatResponse
 from models import ChatMessage, ChatSession, User, UserProfile
-from services import llm_service
-from auth_utils import get_current_user
+from services import llm_service, semantic_cache_service
+from auth_utils import get_current_user, get_current_user_async
 from datetime import datetime
 from typing import Optional
 
@@ -13,28 +16,22 @@ router = APIRouter()
 
 
 # ── Helpers ────────────────────────────────────────────────────────────────────
-def _get_or_create_session(db: Session, user_id: int, session_id: Optional[int]) -> ChatSession:
-    if session_id:
-        sess = db.query(ChatSession).filter(
-            ChatSession.id == session_id, ChatSession.user_id == user_id
-        ).first()
-        if not sess:
-            raise HTTPException(status_code=404, detail="Session not found")
-        return sess
-    sess = ChatSession(user_id=user_id, title="New Chat")
-    db.add(sess)
-    db.flush()
+async def _get_session(db: AsyncSession, user_id: int, session_id: int) -> ChatSession:
+    sess = (await db.execute(
+        select(ChatSession).where(ChatSession.id == session_id, ChatSession.user_id == user_id)
+    )).scalars().first()
+    if not sess:
+        raise HTTPException(status_code=404, detail="Session not found")
     return sess
 
 
-def _history_for_session(db: Session, user_id: int, session_id: int, limit: int = 10):
-    msgs = (
-        db.query(ChatMessage)
-        .filter(ChatMessage.user_id == user_id, ChatMessage.session_id == session_id)
+async def _history_for_session(db: AsyncSession, user_id: int, session_id: int, limit: int = 10):
+    msgs = (await db.execute(
+        select(ChatMessage)
+        .where(ChatMessage.user_id == user_id, ChatMessage.session_id == session_id)
         .order_by(ChatMessage.timestamp.desc())
         .limit(limit)
-        .all()
-    )
+    )).scalars().all()
     return [{"role": m.role, "content": m.content} for m in reversed(msgs)]
 
 
@@ -53,33 +50,60 @@ def create_session(
             "message_count": 0, "last_message": None}
 
 
+def _encode_cursor(sess: ChatSession) -> str:
+    raw = f"{int(bool(sess.is_pinned))}|{sess.updated_at.isoformat()}|{sess.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str):
+    try:
+        pinned, updated_at, sess_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return bool(int(pinned)), datetime.fromisoformat(updated_at), int(sess_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.get("/sessions")
 def list_sessions(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=200),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    sessions = (
-        db.query(ChatSession)
-        .filter(ChatSession.user_id == current_user.id)
-        .order_by(desc(ChatSession.is_pinned), desc(ChatSession.updated_at))
-        .all()
-    )
-    result = []
-    for s in sessions:
-        last = (
-            db.query(ChatMessage)
-            .filter(ChatMessage.session_id == s.id)
-            .order_by(desc(ChatMessage.timestamp))
-            .first()
+    """
+    Sidebar listing served from one keyset-paginated query over the
+    denormalized message_count / last_message_preview columns.
+    Paged only when asked (limit or cursor; a page defaults to 50) – the
+    next page's cursor is returned in the X-Next-Cursor header. Without
+    either, every session is returned, as the sidebar expects.
+    """
+    if limit is None and cursor:
+        limit = 50
+    q = db.query(ChatSession).filter(ChatSession.user_id == current_user.id)
+    if cursor:
+        pinned, updated_at, sess_id = _decode_cursor(cursor)
+        same_group_after = and_(
+            ChatSession.is_pinned == pinned,
+            or_(ChatSession.updated_at < updated_at,
+                and_(ChatSession.updated_at == updated_at, ChatSession.id < sess_id)),
         )
-        count = db.query(ChatMessage).filter(ChatMessage.session_id == s.id).count()
-        result.append({
+        # Pinned sessions sort first, so a pinned cursor is followed by every unpinned one
+        q = q.filter(or_(ChatSession.is_pinned == False, same_group_after) if pinned else same_group_after)  # noqa: E712
+    q = q.order_by(desc(ChatSession.is_pinned), desc(ChatSession.updated_at), desc(ChatSession.id))
+    sessions = q.limit(limit + 1).all() if limit else q.all()
+    if limit and len(sessions) > limit:
+        sessions = sessions[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(sessions[-1])
+    return [
+        {
             "id": s.id, "title": s.title, "is_pinned": s.is_pinned,
             "created_at": s.created_at, "updated_at": s.updated_at,
-            "message_count": count,
-            "last_message": last.content[:60] if last else None,
-        })
-    return result
+            "message_count": s.message_count or 0,
+            "last_message": s.last_message_preview,
+        }
+        for s in sessions
+    ]
 
 
 @router.patch("/sessions/{session_id}")
@@ -123,18 +147,18 @@ def delete_session(
 @router.post("", response_model=ChatResponse)
 async def chat(
     req: ChatRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
 ):
-    sess = _get_or_create_session(db, current_user.id, req.session_id)
+    # Only reads until the reply is back – an INSERT here would hold SQLite's
+    # write lock for the whole LLM round-trip and time out every other writer
+    sess = await _get_session(db, current_user.id, req.session_id) if req.session_id else None
 
-    existing_user_msgs = db.query(ChatMessage).filter(
-        ChatMessage.session_id == sess.id, ChatMessage.role == "user"
-    ).count()
+    history = await _history_for_session(db, current_user.id, sess.id) if sess else []
 
-    history = _history_for_session(db, current_user.id, sess.id)
-
-    profile = db.query(UserProfile).filter(UserProfile.user_id == current_user.id).first()
+    profile = (await db.execute(
+        select(UserProfile).where(UserProfile.user_id == current_user.id)
+    )).scalars().first()
     profile_dict = {
         "personalization_summary": getattr(profile, "personalization_summary", ""),
         "top_categories": getattr(profile, "top_categories", []),
@@ -147,20 +171,45 @@ async def chat(
         "city": getattr(current_user, "city", "") or "",
     }
 
-    extracted = await llm_service.extract_intent_and_data(req.message)
+    # End the read transaction and hand the connection back while the LLM runs
+    # (expire_on_commit=False keeps `sess` readable)
+    await db.commit()
+
+    # Semantic cache only applies to opening questions — follow-ups depend on the thread
+    cached = None
+    if not history:
+        cached = await run_in_threadpool(semantic_cache_service.lookup, req.message, profile_dict)
+
+    if cached:
+        extracted = cached["extracted"]
+        reply = cached["reply"]
+    else:
+        extracted = await llm_service.extract_intent_and_data(req.message)
+        reply = await llm_service.general_chat(history, req.message, user_profile=profile_dict)
+        if not history and not reply.startswith("[LLM Error]"):
+            await run_in_threadpool(semantic_cache_service.store, req.message, profile_dict, reply, extracted)
     intent = extracted.get("intent", "general_chat")
-    reply = await llm_service.general_chat(history, req.message, user_profile=profile_dict)
+
+    # One short write transaction: the new session (if any), both messages, counters
+    if sess is None:
+        sess = ChatSession(user_id=current_user.id, title="New Chat")
+        db.add(sess)
+        await db.flush()
 
     # Auto-name session from first user message
-    if existing_user_msgs == 0 and sess.title == "New Chat":
+    if not sess.message_count and sess.title == "New Chat":
         sess.title = req.message[:40].strip() + ("…" if len(req.message) > 40 else "")
 
     db.add(ChatMessage(user_id=current_user.id, session_id=sess.id, role="user",      content=req.message))
     db.add(ChatMessage(user_id=current_user.id, session_id=sess.id, role="assistant", content=reply))
+    sess.message_count = func.coalesce(ChatSession.message_count, 0) + 2   # atomic in SQL
+    sess.last_message_preview = reply[:60]
     sess.updated_at = datetime.utcnow()
-    db.commit()
+    session_id = sess.id
+    await db.commit()
 
-    return ChatResponse(reply=reply, intent=intent, extracted_data=extracted, session_id=sess.id)
+    return ChatResponse(reply=reply, intent=intent, extracted_data=extracted, session_id=session_id,
+                        cached=cached is not None)
 
 
 # ── History ────────────────────────────────────────────────────────────────────
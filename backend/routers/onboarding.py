@@ -1,10 +1,12 @@
 """Onboarding questionnaire — saves answers and runs LLM behavioral analysis."""
 from fastapi import APIRouter, Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database import get_db
+from database import get_db, get_async_db
 from models import User, UserProfile
 from schemas import OnboardingAnswers, UserProfileResponse, ProfileUpdateRequest
-from auth_utils import get_current_user
+from auth_utils import get_current_user, get_current_user_async, invalidate_user
 from services import llm_service
 
 router = APIRouter()
@@ -26,8 +28,8 @@ def _build_profile_from_llm(profile_data: dict, answers: dict, profile: UserProf
 @router.post("/submit", response_model=UserProfileResponse)
 async def submit_onboarding(
     answers: OnboardingAnswers,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
 ):
     """Analyze answers with LLM, store behavioral profile, mark user as onboarded."""
     answers_dict = answers.model_dump()
@@ -43,16 +45,18 @@ async def submit_onboarding(
     current_user.is_onboarded = True
 
     # Upsert UserProfile
-    profile = db.query(UserProfile).filter(UserProfile.user_id == current_user.id).first()
+    profile = (await db.execute(
+        select(UserProfile).where(UserProfile.user_id == current_user.id)
+    )).scalars().first()
     if not profile:
         profile = UserProfile(user_id=current_user.id)
         db.add(profile)
 
     _build_profile_from_llm(profile_data, answers_dict, profile, current_user)
 
-    db.commit()
-    db.refresh(profile)
-    db.refresh(current_user)
+    await db.commit()
+    invalidate_user(current_user.id)
+    await db.refresh(current_user, ["avatar"])   # deferred column – load it explicitly
 
     # Build response — merge user fields into the profile response
     return {
@@ -103,15 +107,17 @@ def get_profile(
 @router.patch("/update", response_model=UserProfileResponse)
 async def update_profile(
     update: ProfileUpdateRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
 ):
     """
     Mid-usage profile update. Applies any provided fields.
     If behavior fields change, re-runs LLM analysis to update
     personalization weights and persona automatically.
     """
-    profile = db.query(UserProfile).filter(UserProfile.user_id == current_user.id).first()
+    profile = (await db.execute(
+        select(UserProfile).where(UserProfile.user_id == current_user.id)
+    )).scalars().first()
     if not profile:
         from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="Complete onboarding first.")
@@ -152,9 +158,9 @@ async def update_profile(
         current_answers["city"] = current_user.city or ""
         profile.onboarding_answers = current_answers
 
-    db.commit()
-    db.refresh(profile)
-    db.refresh(current_user)
+    await db.commit()
+    invalidate_user(current_user.id)
+    await db.refresh(current_user, ["avatar"])   # deferred column – load it explicitly
 
     return {
         "college_name": current_user.college_name or "",
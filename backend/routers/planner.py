@@ -1,11 +1,14 @@
 from fastapi import APIRouter, Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from datetime import date, datetime, timedelta
-from database import get_db
+from datetime import date, datetime
+from config import settings
+from database import get_db, get_async_db
 from schemas import PlannerRequest, PlannerResponse
-from models import Recommendation, User, DayPlan, UserProfile
-from services import optimization_service, diversity_service, faiss_service, llm_service
-from auth_utils import get_current_user
+from models import User, DayPlan, UserProfile, CampusMap
+from services import optimization_service, diversity_service, faiss_service, llm_service, catalog_service, planner_service, campus_graph_service
+from auth_utils import get_current_user, get_current_user_async
 
 router = APIRouter()
 
@@ -19,30 +22,26 @@ def _parse_time(t: str) -> datetime:
     return datetime(today.year, today.month, today.day, h, m)
 
 
+def _format_minute(minute: int) -> str:
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
 @router.post("/generate", response_model=PlannerResponse)
 async def generate_plan(
     req: PlannerRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
 ):
     start_dt = _parse_time(req.free_time_start)
     end_dt   = _parse_time(req.free_time_end)
     total_minutes = int((end_dt - start_dt).total_seconds() / 60)
-    budget_left = req.budget
-
-    # Pull candidates per category
-    all_recs = db.query(Recommendation).all()
-
-    def to_dict(r: Recommendation) -> dict:
-        return {
-            "id": r.id, "name": r.name, "category": r.category,
-            "sub_category": r.sub_category, "description": r.description,
-            "location": r.location, "cost": r.cost,
-            "duration_minutes": r.duration_minutes, "rating": r.rating,
-            "tags": r.tags or [], "available_times": r.available_times or [],
-        }
+    start_minute = start_dt.hour * 60 + start_dt.minute
 
-    recs_dict = [to_dict(r) for r in all_recs]
+    catalog = catalog_service.get_snapshot()
+    campus_map = (await db.execute(
+        select(CampusMap).where(CampusMap.user_id == current_user.id)
+    )).scalars().first()
+    graph = campus_graph_service.graph_for(current_user.id, campus_map)
 
     # Determine time of day
     hour = start_dt.hour
@@ -53,49 +52,44 @@ async def generate_plan(
     else:
         time_of_day = "evening"
 
-    div_scores = diversity_service.compute_diversity_scores(recs_dict, [])
-
-    plan_items = []
-    timeline   = []
-    current_time = start_dt
-    time_remaining = total_minutes
-
+    # Score each category's feasible items once, then let the optimizer pick the combination
+    candidates = {}
     for category in CATEGORIES_ORDER:
-        if time_remaining <= 0 or budget_left <= 0:
-            break
-
-        cat_candidates = [
-            r for r in recs_dict
-            if r["category"] == category
-            and r["cost"] <= budget_left
-            and r["duration_minutes"] <= time_remaining
-        ]
-
+        cat_candidates = catalog.where(
+            (catalog.category == category)
+            & (catalog.cost <= req.budget)
+            & (catalog.duration <= total_minutes)
+        )
         if not cat_candidates:
             continue
-
-        ranked = optimization_service.rank_recommendations(
+        candidates[category] = optimization_service.rank_recommendations(
             cat_candidates,
-            budget=budget_left,
-            free_time_minutes=time_remaining,
+            budget=req.budget,
+            free_time_minutes=total_minutes,
             user_preferences=req.preferences,
             user_location=req.location,
             time_of_day=time_of_day,
-            diversity_scores={r["id"]: div_scores.get(r["id"], 0.5) for r in cat_candidates},
-            top_k=1,
+            diversity_scores=diversity_service.compute_diversity_scores(cat_candidates, []),
+            top_k=settings.PLANNER_TOP_N,
+            distance=graph.distance,
         )
 
-        if ranked:
-            best = ranked[0]
-            slot_start = current_time.strftime("%H:%M")
-            slot_end   = (current_time + timedelta(minutes=best["duration_minutes"])).strftime("%H:%M")
-
-            plan_items.append({**best, "time_slot": f"{slot_start} - {slot_end}"})
-            timeline.append({"time": slot_start, "activity": best["name"], "category": best["category"]})
+    plan = planner_service.optimize_plan(
+        candidates,
+        budget=req.budget,
+        start_minute=start_minute,
+        end_minute=start_minute + total_minutes,
+        start_location=req.location,
+        travel_minutes=graph.travel_minutes,
+    )
 
-            current_time += timedelta(minutes=best["duration_minutes"] + 15)  # 15-min buffer
-            time_remaining -= best["duration_minutes"] + 15
-            budget_left    -= best["cost"]
+    plan_items = []
+    timeline   = []
+    for stop in plan["stops"]:
+        item = stop["item"]
+        slot_start, slot_end = _format_minute(stop["start"]), _format_minute(stop["end"])
+        plan_items.append({**item, "time_slot": f"{slot_start} - {slot_end}", "travel_minutes": stop["travel_minutes"]})
+        timeline.append({"time": slot_start, "activity": item["name"], "category": item["category"]})
 
     total_cost     = sum(p["cost"] for p in plan_items)
     total_duration = sum(p["duration_minutes"] for p in plan_items)
@@ -104,7 +98,9 @@ async def generate_plan(
     plan_summary = ", ".join([f"{p['name']} ({p['category']})" for p in plan_items])
     prompt_msg   = f"Explain this student day plan in 2 sentences: {plan_summary}. Budget used: ₹{total_cost:.0f}."
     try:
-        profile = db.query(UserProfile).filter(UserProfile.user_id == current_user.id).first()
+        profile = (await db.execute(
+            select(UserProfile).where(UserProfile.user_id == current_user.id)
+        )).scalars().first()
         profile_dict = {"personalization_summary": getattr(profile, "personalization_summary", "")} if profile else {}
         explanation = await llm_service.general_chat([], prompt_msg, user_profile=profile_dict)
     except Exception:
@@ -118,7 +114,7 @@ async def generate_plan(
         items=plan_items, explanation=explanation,
     )
     db.add(db_plan)
-    db.commit()
+    await db.commit()
 
     return PlannerResponse(
         items=plan_items,
@@ -1,100 +1,60 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from typing import List, Dict
-from database import get_db
+from fastapi import APIRouter, BackgroundTasks, Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from database import get_async_db
 from schemas import RecommendationRequest, RecommendationResponse
-from models import Recommendation, User, UserProfile, CampusMap
-from services import faiss_service, optimization_service, diversity_service, llm_service
-from auth_utils import get_current_user
+from models import User, UserProfile, CampusMap
+from services import faiss_service, optimization_service, diversity_service, llm_service, catalog_service, campus_graph_service, location_service, history_store, metrics_service
+from auth_utils import get_current_user, get_current_user_async
 
 router = APIRouter()
 
-# Per-user recent sub_category history (in-memory, keyed by user_id)
-_user_history: Dict[int, List[str]] = {}
-
-
-def _get_recent_history(user_id: int) -> List[str]:
-    return _user_history.get(user_id, [])
-
-
-def _update_history(user_id: int, sub_categories: List[str]):
-    current = _user_history.get(user_id, [])
-    _user_history[user_id] = (current + sub_categories)[-50:]
-
-
-def _location_matches(rec_location: str, requested: str, campus_areas: list) -> bool:
-    """Return True if the recommendation's location is relevant to the requested area."""
-    if not requested or not rec_location:
-        return True  # no constraint → pass
-    req_lower = requested.lower().strip()
-    rec_lower = rec_location.lower().strip()
-    # Direct substring match
-    if req_lower in rec_lower or rec_lower in req_lower:
-        return True
-    # Generic campus-wide locations always pass
-    generic = {"main campus", "campus", "college", "anywhere", "all areas"}
-    if rec_lower in generic or req_lower in generic:
-        return True
-    # Check against user's known campus areas
-    for area in (campus_areas or []):
-        if area.lower() in rec_lower or rec_lower in area.lower():
-            return True
-    # Partial word overlap (at least one common significant word)
-    req_words = set(req_lower.split()) - {"the", "of", "and", "at", "in", "near"}
-    rec_words = set(rec_lower.split()) - {"the", "of", "and", "at", "in", "near"}
-    return bool(req_words & rec_words)
-
-
-def _recs_to_dicts(recs: List[Recommendation]) -> List[dict]:
-    return [
-        {
-            "id": r.id,
-            "name": r.name,
-            "category": r.category,
-            "sub_category": r.sub_category,
-            "description": r.description,
-            "location": r.location,
-            "cost": r.cost,
-            "duration_minutes": r.duration_minutes,
-            "rating": r.rating,
-            "tags": r.tags or [],
-            "available_times": r.available_times or [],
-        }
-        for r in recs
-    ]
-
+STAGE_SECONDS = metrics_service.histogram(
+    "trustai_recommendation_stage_seconds", "POST /api/recommendations time per pipeline stage", ("stage",),
+)
 
 @router.post("", response_model=List[dict])
 async def get_recommendations(
     req: RecommendationRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
 ):
+    timer = metrics_service.Stopwatch(STAGE_SECONDS)
     # Merge user's stored preferences with request preferences
     stored_prefs = current_user.preferences or []
     effective_prefs = list(set(req.preferences + stored_prefs))
 
     # Load user behavioral profile for personalized weights
-    profile = db.query(UserProfile).filter(UserProfile.user_id == current_user.id).first()
+    profile = (await db.execute(
+        select(UserProfile).where(UserProfile.user_id == current_user.id)
+    )).scalars().first()
     custom_weights = profile.optimization_weights if profile and profile.optimization_weights else None
 
     # Load user's campus map areas for location validation
-    campus_map = db.query(CampusMap).filter(CampusMap.user_id == current_user.id).first()
+    campus_map = (await db.execute(
+        select(CampusMap).where(CampusMap.user_id == current_user.id)
+    )).scalars().first()
     campus_areas = []
     if campus_map and campus_map.knowledge_graph:
         campus_areas = campus_map.knowledge_graph.get("areas", [])
+    graph = campus_graph_service.graph_for(current_user.id, campus_map)
+    timer.lap("context")
     # ── 1. Retrieve candidates (FAISS semantic search) ─────────────────────
     query = f"{' '.join(effective_prefs)} {req.location} {req.time_of_day}"
-    faiss_hits = faiss_service.search(query, top_k=20)
+    q_vec = faiss_service.embed([query])
+    timer.lap("embed")
+    faiss_hits = faiss_service.search_vector(q_vec, top_k=20)
+    timer.lap("search")
 
+    catalog = catalog_service.get_snapshot()
     if faiss_hits:
-        candidate_ids = [meta["id"] for meta, _ in faiss_hits]
-        candidates_db = db.query(Recommendation).filter(Recommendation.id.in_(candidate_ids)).all()
+        candidate_dicts = catalog.by_ids(meta["id"] for meta, _ in faiss_hits)
     else:
-        # Fallback: all recommendations
-        candidates_db = db.query(Recommendation).limit(30).all()
-
-    candidate_dicts = _recs_to_dicts(candidates_db)
+        # Fallback: first rows of the catalog
+        candidate_dicts = catalog.dicts(range(min(30, len(catalog))))
+    timer.lap("db_fetch")
 
     # Filter by category if specified
     if req.categories:
@@ -107,21 +67,25 @@ async def get_recommendations(
         affordable = candidate_dicts[:10]  # relax constraint gracefully
 
     # ── Location validation — filter out items clearly not near requested location ──
-    location_valid = [
-        c for c in affordable
-        if _location_matches(c["location"], req.location, campus_areas)
+    location_service.register_catalog(catalog)
+    accepted = location_service.accepted_ids(req.location, campus_areas)
+    location_valid = affordable if accepted is None else [
+        c for c in affordable if location_service.resolve(c["location"]) in accepted
     ]
     # Fall back gracefully if filter is too strict
     if len(location_valid) >= 3:
         affordable = location_valid
     # location_note for diversity message if some were filtered
     location_filtered_count = len(affordable) - len(location_valid)
+    timer.lap("filter")
 
     # ── 2. Anti-filter bubble diversity scores ─────────────────────────────
-    history = _get_recent_history(current_user.id)
+    history = await history_store.recent(db, current_user.id)
+    timer.lap("history")
     div_scores = diversity_service.compute_diversity_scores(affordable, history)
 
-    bubble_detected, bubble_msg = diversity_service.detect_filter_bubble(history)
+    bubble = diversity_service.detect_filter_bubble(history)
+    timer.lap("diversity")
 
     # ── 3. Score and rank ─────────────────────────────────────────────────
     # Score ALL affordable items so the diversity pool is also fully scored
@@ -135,12 +99,22 @@ async def get_recommendations(
         diversity_scores=div_scores,
         top_k=len(affordable),  # score everything
         custom_weights=custom_weights,
+        distance=graph.distance,
     )
 
-    ranked = full_ranked[:req.top_k]
-
-    # Ensure diversity across categories — pool is now fully scored
-    ranked = diversity_service.ensure_category_diversity(ranked, min_categories=2, pool=full_ranked)
+    # Diversify over item embeddings (MMR); exploration_level sets how hard
+    embeddings = faiss_service.embeddings_for(r["id"] for r in full_ranked)
+    if embeddings is not None:
+        ranked = diversity_service.mmr_rerank(
+            full_ranked, embeddings, req.top_k,
+            lam=diversity_service.mmr_lambda(profile.exploration_level if profile else None),
+        )
+    else:
+        # No index – at least make sure categories vary; pool is fully scored
+        ranked = diversity_service.ensure_category_diversity(
+            full_ranked[:req.top_k], min_categories=2, pool=full_ranked,
+        )
+    timer.lap("rank")
 
     # ── 4. Generate explanations for top 3 ───────────────────────────────
     rejected_names = [r["name"] for r in ranked[req.top_k:req.top_k + 3]]
@@ -164,11 +138,14 @@ async def get_recommendations(
                     f"{rec['name']} is a great match for your budget and preferences."
                 )
 
-    # ── 5. Update history cache ──────────────────────────────────────────
-    _update_history(current_user.id, [r["sub_category"] for r in ranked])
+    timer.lap("explain")
+
+    # ── 5. Update history (persisted after the response is sent) ─────────
+    history_store.record(current_user.id, [r["sub_category"] for r in ranked])
+    background_tasks.add_task(history_store.flush, current_user.id)
 
     diversity_note = diversity_service.get_diversity_injection_note(
-        history, ranked[0]["sub_category"] if ranked else ""
+        history, ranked[0]["sub_category"] if ranked else "", bubble=bubble,
     )
 
     return [{"diversity_note": diversity_note, **r} for r in ranked]
@@ -176,8 +153,6 @@ async def get_recommendations(
 
 @router.get("/all")
 def list_all(
-    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    recs = db.query(Recommendation).all()
-    return _recs_to_dicts(recs)
+    return catalog_service.get_snapshot().all()
@@ -110,6 +110,18 @@ class TransactionResponse(TransactionCreate):
         from_attributes = True
 
 
+class ImportRowError(BaseModel):
+    row: int                         # CSV line / NDJSON line number
+    error: str
+
+class TransactionImportResult(BaseModel):
+    imported: int
+    duplicates: int
+    failed: int
+    errors: List[ImportRowError] = []
+    errors_truncated: bool = False
+
+
 # ── Recommendation ───────────────────────────────────────────────────────────
 class RecommendationResponse(BaseModel):
     id: int
@@ -142,6 +154,7 @@ class ChatResponse(BaseModel):
     intent: Optional[str] = None
     extracted_data: Optional[Dict[str, Any]] = None
     session_id: Optional[int] = None
+    cached: bool = False                 # True when served from the semantic answer cache
 
 
 # ── Recommendations request ───────────────────────────────────────────────────
@@ -278,3 +291,45 @@ class BudgetStatus(BaseModel):
     remaining_month: float
     warning: Optional[str] = None
     transactions_today: List[TransactionResponse] = []
+
+
+# ── Spending analytics ───────────────────────────────────────────────────────
+class DailySeries(BaseModel):
+    start: str                      # date of amounts[0]; one entry per day after that
+    amounts: List[float]
+    counts: List[int]
+    rolling_7d: List[float]
+    rolling_30d: List[float]
+
+class WeeklySeries(BaseModel):
+    week_starts: List[str]          # ISO Mondays
+    amounts: List[float]
+
+class MonthlySeries(BaseModel):
+    months: List[str]               # "2025-02"
+    amounts: List[float]
+    counts: List[int]
+
+class CategorySpend(BaseModel):
+    category: str
+    amount: float
+    count: int
+    share: float
+
+class BurnRate(BaseModel):
+    monthly_budget: float
+    spent_month: float
+    avg_daily_month: float
+    projected_month_end: float
+    projected_over_budget: bool
+    days_left_at_current_rate: Optional[float] = None
+
+class SpendingAnalytics(BaseModel):
+    start: str
+    end: str
+    total: float
+    daily: DailySeries
+    weekly: WeeklySeries
+    monthly: MonthlySeries
+    categories: List[CategorySpend]
+    burn_rate: BurnRate
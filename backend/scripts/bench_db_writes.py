@@ -0,0 +1,124 @@
+"""
+Concurrent write benchmark – N threads each log M expenses through
+budget_service.add_transaction (insert + rollup upsert + commit), the hottest
+write path in the app, and report throughput, latency and lock errors.
+Run: python scripts/bench_db_writes.py [--url URL ...] [--threads 8] [--writes 200]   (from the backend/ directory)
+
+Pass --url more than once to compare backends, and --baseline to also run
+each URL on an untuned engine (no pragmas, default pool).
+Rows written are removed again afterwards.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, delete, event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from config import settings
+from database import make_engine
+import migrate
+from models import User, Transaction, SpendRollup
+from services import budget_service
+
+
+def _untuned_engine(url: str):
+    if not url.startswith("sqlite"):
+        return create_engine(url)
+    eng = create_engine(url, connect_args={"check_same_thread": False})
+    # journal_mode is stored in the file – switch a previously tuned DB back to the default
+    event.listen(eng, "connect", lambda dbapi_conn, _record: dbapi_conn.execute("PRAGMA journal_mode=DELETE"))
+    return eng
+
+
+def _run(engine, threads: int, writes: int) -> dict:
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    with Session() as db:
+        user = User(username=f"bench_{os.getpid()}_{time.time_ns()}", email=f"bench_{time.time_ns()}@bench.local",
+                    password_hash="-", name="Bench")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    start_gate = threading.Barrier(threads)
+
+    def worker(n: int):
+        local, failed = [], 0
+        start_gate.wait()
+        for i in range(writes):
+            db = Session()
+            t0 = time.perf_counter()
+            try:
+                budget_service.add_transaction(db, user_id, 10.0, "food", f"bench {n}-{i}")
+                local.append(time.perf_counter() - t0)
+            except OperationalError:
+                db.rollback()
+                failed += 1
+            finally:
+                db.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    t0 = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    with Session() as db:
+        db.execute(delete(Transaction).where(Transaction.user_id == user_id))
+        db.execute(delete(SpendRollup).where(SpendRollup.user_id == user_id))
+        db.execute(delete(User).where(User.id == user_id))
+        db.commit()
+    engine.dispose()
+
+    latencies.sort()
+    return {
+        "ok": len(latencies),
+        "errors": errors[0],
+        "elapsed": elapsed,
+        "per_sec": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent write throughput benchmark")
+    parser.add_argument("--url", action="append", help="database URL (repeatable, default: DATABASE_URL)")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--writes", type=int, default=200, help="writes per thread")
+    parser.add_argument("--baseline", action="store_true", help="also run with an untuned engine")
+    args = parser.parse_args()
+
+    runs = []
+    for url in args.url or [settings.DATABASE_URL]:
+        migrate.upgrade(url)
+        if args.baseline:
+            runs.append((url, "untuned", _untuned_engine(url)))
+        runs.append((url, "tuned", make_engine(url)))
+
+    print(f"{args.threads} threads × {args.writes} writes\n")
+    print(f"{'backend':<12}{'engine':<9}{'ok':>7}{'errors':>8}{'writes/s':>10}{'p50 ms':>9}{'p95 ms':>9}")
+    for url, label, engine in runs:
+        r = _run(engine, args.threads, args.writes)
+        print(f"{engine.dialect.name:<12}{label:<9}{r['ok']:>7}{r['errors']:>8}{r['per_sec']:>10.0f}"
+              f"{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Query plan audit – runs EXPLAIN (QUERY PLAN) for every query the routers issue
+and flags full-table scans and ORDER BY temp sorts.
+Run: python scripts/query_plan_report.py [--url DATABASE_URL]   (from the backend/ directory)
+
+Exits with status 1 if a query that should be index-backed scans a table,
+so it can gate CI after schema changes.
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime, date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, select, delete, desc, func
+from config import settings
+from models import (
+    User, UserProfile, Transaction, SpendRollup, Recommendation, CampusMap,
+    ChatSession, ChatMessage, DayPlan,
+)
+
+TODAY = date.today().isoformat()
+NOW = datetime.utcnow()
+
+# (label, statement, full scan expected?)
+QUERIES = [
+    # auth / auth_utils
+    ("auth.register: username taken",        select(User).where(User.username == "alice").limit(1), False),
+    ("auth.register: email taken",           select(User).where(User.email == "a@x.in").limit(1), False),
+    ("auth_utils.get_current_user",          select(User).where(User.id == 1).limit(1), False),
+
+    # budget_service
+    ("budget.spent today/month (rollups)",  select(SpendRollup.period, SpendRollup.amount)
+                                             .where(SpendRollup.user_id == 1, SpendRollup.period.in_([TODAY, TODAY[:7]])), False),
+    ("budget.analytics: daily rollups",      select(SpendRollup.period, SpendRollup.amount)
+                                             .where(SpendRollup.user_id == 1, SpendRollup.period >= "2025-01-01",
+                                                    SpendRollup.period <= TODAY, func.length(SpendRollup.period) == 10), False),
+    ("budget.analytics: categories",         select(Transaction.category, func.sum(Transaction.amount))
+                                             .where(Transaction.user_id == 1, Transaction.date >= "2025-01-01", Transaction.date <= TODAY)
+                                             .group_by(Transaction.category), False),
+    ("budget.get_transactions_today",        select(Transaction).where(Transaction.user_id == 1, Transaction.date == TODAY)
+                                             .order_by(Transaction.timestamp.desc()), False),
+
+    # chat
+    ("chat._get_or_create_session",          select(ChatSession).where(ChatSession.id == 1, ChatSession.user_id == 1).limit(1), False),
+    ("chat._history_for_session",            select(ChatMessage).where(ChatMessage.user_id == 1, ChatMessage.session_id == 1)
+                                             .order_by(ChatMessage.timestamp.desc()).limit(10), False),
+    ("chat.list_sessions",                   select(ChatSession).where(ChatSession.user_id == 1)
+                                             .order_by(desc(ChatSession.is_pinned), desc(ChatSession.updated_at), desc(ChatSession.id))
+                                             .limit(51), False),
+    ("chat.list_sessions (cursor page)",     select(ChatSession).where(ChatSession.user_id == 1, ChatSession.is_pinned == False,  # noqa: E712
+                                                                       ChatSession.updated_at < NOW)
+                                             .order_by(desc(ChatSession.is_pinned), desc(ChatSession.updated_at), desc(ChatSession.id))
+                                             .limit(51), False),
+    ("chat.chat: load profile",              select(UserProfile).where(UserProfile.user_id == 1).limit(1), False),
+    ("chat.get_history (session)",           select(ChatMessage).where(ChatMessage.user_id == 1, ChatMessage.session_id == 1)
+                                             .order_by(ChatMessage.timestamp.asc()), False),
+    ("chat.get_history (recent)",            select(ChatMessage).where(ChatMessage.user_id == 1)
+                                             .order_by(ChatMessage.timestamp.desc()).limit(50), False),
+    ("chat.delete_session: cascade",         select(ChatMessage).where(ChatMessage.session_id == 1), False),
+    ("chat.clear_all_history: sessions",     delete(ChatSession).where(ChatSession.user_id == 1), False),
+    ("chat.clear_all_history: messages",     delete(ChatMessage).where(ChatMessage.user_id == 1), False),
+
+    # recommendations (catalog rows come from catalog_service's in-memory snapshot)
+    ("recommendations: campus map",          select(CampusMap).where(CampusMap.user_id == 1).limit(1), False),
+    ("catalog_service: snapshot rebuild",    select(Recommendation).order_by(Recommendation.id), True),
+
+    # planner
+    ("planner.get_plan_history",             select(DayPlan).where(DayPlan.user_id == 1)
+                                             .order_by(DayPlan.created_at.desc()).limit(10), False),
+
+    # campus
+    ("campus.get_campus_map",                select(CampusMap).where(CampusMap.user_id == 1).limit(1), False),
+]
+
+
+def _explain(conn, stmt) -> list:
+    compiled = stmt.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+    if compiled.positional:
+        params = tuple(compiled.params[k] for k in compiled.positiontup)
+    else:
+        params = compiled.params
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    rows = conn.exec_driver_sql(prefix + str(compiled), params).fetchall()
+    # sqlite: (id, parent, notused, detail) · postgres: (plan line,)
+    return [row[-1] for row in rows]
+
+
+def _problems(dialect: str, plan: list) -> list:
+    issues = []
+    for line in plan:
+        if dialect == "sqlite":
+            if line.startswith("SCAN") and "USING" not in line:
+                issues.append(f"full scan: {line}")
+            elif "TEMP B-TREE FOR ORDER BY" in line:
+                # GROUP BY temp trees over a handful of groups are fine; an ORDER BY sort means no usable index
+                issues.append(f"temp sort: {line}")
+        elif "Seq Scan" in line:
+            issues.append(f"full scan: {line.strip()}")
+    return issues
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default=settings.DATABASE_URL, help="database to audit (default: DATABASE_URL)")
+    parser.add_argument("--verbose", action="store_true", help="print the full plan for every query")
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    unexpected = 0
+    with engine.connect() as conn:
+        dialect = conn.dialect.name
+        print(f"Query plan audit – {dialect} – {len(QUERIES)} queries\n")
+        for label, stmt, scan_expected in QUERIES:
+            plan = _explain(conn, stmt)
+            issues = _problems(dialect, plan)
+            if not issues:
+                status = "OK  "
+            elif scan_expected:
+                status = "SCAN"   # deliberate full read (e.g. whole catalog)
+            else:
+                status = "FAIL"
+                unexpected += 1
+            print(f"[{status}] {label}")
+            for issue in issues:
+                print(f"         {issue}")
+            if args.verbose:
+                for line in plan:
+                    print(f"         | {line}")
+
+    print(f"\n{unexpected} unexpected full scan(s)")
+    sys.exit(1 if unexpected else 0)
+
+
+if __name__ == "__main__":
+    main()
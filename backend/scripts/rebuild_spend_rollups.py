@@ -0,0 +1,33 @@
+"""
+Rebuild the per-user daily/monthly spend rollups from raw transactions.
+Run: python scripts/rebuild_spend_rollups.py [--user-id N]   (from the backend/ directory)
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import SessionLocal
+import migrate
+from services import budget_service
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild spend_rollups from transactions")
+    parser.add_argument("--user-id", type=int, default=None, help="only rebuild this user's counters")
+    args = parser.parse_args()
+
+    migrate.ensure_current()
+    db = SessionLocal()
+    try:
+        written = budget_service.rebuild_rollups(db, user_id=args.user_id)
+        scope = f"user {args.user_id}" if args.user_id is not None else "all users"
+        print(f"[OK] {written} rollup rows rebuilt for {scope}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Content-Addressed Blob Store
+Keeps binary uploads (avatars, campus map images) on the local filesystem,
+keyed by the SHA-256 of their bytes, so database rows only carry a short key.
+Blobs are immutable — the same bytes always map to the same key — which
+makes them safe to serve with long-lived cache headers.
+Thumbnails are generated with Pillow when it is installed.
+"""
+
+import hashlib
+import io
+import os
+import re
+from typing import Optional
+
+from config import settings
+
+# ── Try to import optional image support ──────────────────────────────────────
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except Exception:
+    PIL_AVAILABLE = False
+
+THUMB_SIZE = 128
+
+_EXTENSIONS = {
+    "image/jpeg": "jpg",
+    "image/jpg": "jpg",
+    "image/png": "png",
+    "image/webp": "webp",
+    "image/gif": "gif",
+}
+_CONTENT_TYPES = {"jpg": "image/jpeg", "png": "image/png", "webp": "image/webp", "gif": "image/gif"}
+_KEY_RE = re.compile(r"^[0-9a-f]{64}\.(jpg|png|webp|gif)$")
+
+
+def _path(key: str) -> str:
+    return os.path.join(settings.BLOB_DIR, key[:2], key)
+
+
+def _thumb_path(key: str) -> str:
+    return os.path.join(settings.BLOB_DIR, key[:2], key.rsplit(".", 1)[0] + ".thumb.webp")
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def is_valid_key(key: str) -> bool:
+    return bool(_KEY_RE.match(key or ""))
+
+
+def put(data: bytes, content_type: str) -> str:
+    """Store bytes (no-op if already present) and return their key."""
+    ext = _EXTENSIONS.get(content_type, "png")
+    key = f"{hashlib.sha256(data).hexdigest()}.{ext}"
+    path = _path(key)
+    if not os.path.exists(path):
+        _write_atomic(path, data)
+    return key
+
+
+def path_for(key: str) -> Optional[str]:
+    if not is_valid_key(key):
+        return None
+    path = _path(key)
+    return path if os.path.exists(path) else None
+
+
+def content_type_for(key: str) -> str:
+    return _CONTENT_TYPES.get(key.rsplit(".", 1)[-1], "application/octet-stream")
+
+
+def etag_for(key: str) -> str:
+    return '"' + key + '"'
+
+
+def thumbnail_path_for(key: str) -> Optional[str]:
+    """
+    Path of the THUMB_SIZE WebP thumbnail, generating it on first use.
+    Falls back to the original blob if Pillow is missing or decoding fails.
+    """
+    original = path_for(key)
+    if not original:
+        return None
+    thumb = _thumb_path(key)
+    if os.path.exists(thumb):
+        return thumb
+    if not PIL_AVAILABLE:
+        return original
+    try:
+        with Image.open(original) as img:
+            img = ImageOps.exif_transpose(img)
+            img.thumbnail((THUMB_SIZE, THUMB_SIZE))
+            if img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGBA")
+            buf = io.BytesIO()
+            img.save(buf, format="WEBP", quality=85)
+        _write_atomic(thumb, buf.getvalue())
+        return thumb
+    except Exception:
+        return original
+
+
+def url_for(key: str) -> str:
+    return f"/api/campus/blobs/{key}"
+
+
+def thumbnail_url_for(key: str) -> str:
+    return f"/api/campus/blobs/{key}/thumb"
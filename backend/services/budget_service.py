@@ -3,29 +3,100 @@ Budget Guardian Service
 Tracks user spending and enforces budget constraints.
 """
 
-from datetime import datetime, date
+import csv
+import hashlib
+import json
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import func, insert, delete, select
 from sqlalchemy.orm import Session
-from models import Transaction, User
+from models import Transaction, User, SpendRollup
 
 
-def get_spent_today(db: Session, user_id: int = 1) -> float:
-    today = date.today().isoformat()
-    transactions = (
-        db.query(Transaction)
-        .filter(Transaction.user_id == user_id, Transaction.date == today)
+def _periods(day: str) -> Tuple[str, str]:
+    """Rollup keys for an ISO date: ("2025-02-24", "2025-02")."""
+    return day, day[:7]
+
+
+def _spent_for_periods(db: Session, user_id: int, periods: Tuple[str, ...]) -> Dict[str, float]:
+    rows = (
+        db.query(SpendRollup.period, SpendRollup.amount)
+        .filter(SpendRollup.user_id == user_id, SpendRollup.period.in_(periods))
         .all()
     )
-    return sum(t.amount for t in transactions)
+    spent = {p: 0.0 for p in periods}
+    spent.update({period: amount or 0.0 for period, amount in rows})
+    return spent
+
+
+def get_spent_today(db: Session, user_id: int = 1) -> float:
+    today = date.today().isoformat()
+    return _spent_for_periods(db, user_id, (today,))[today]
 
 
 def get_spent_this_month(db: Session, user_id: int = 1) -> float:
-    month_prefix = date.today().strftime("%Y-%m")
-    transactions = (
-        db.query(Transaction)
-        .filter(Transaction.user_id == user_id, Transaction.date.like(f"{month_prefix}%"))
-        .all()
-    )
-    return sum(t.amount for t in transactions)
+    month = date.today().strftime("%Y-%m")
+    return _spent_for_periods(db, user_id, (month,))[month]
+
+
+def apply_spend_deltas(db: Session, user_id: int, deltas: Dict[str, Tuple[float, int]]) -> None:
+    """
+    Add {period: (amount, tx_count)} onto the user's rollup rows, creating them
+    as needed. Does not commit — callers apply it inside the transaction that
+    inserts the underlying rows.
+    """
+    if not deltas:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        stmt = upsert(SpendRollup).values([
+            {"user_id": user_id, "period": period, "amount": amount, "tx_count": count}
+            for period, (amount, count) in deltas.items()
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SpendRollup.user_id, SpendRollup.period],
+            set_={
+                "amount": SpendRollup.amount + stmt.excluded.amount,
+                "tx_count": SpendRollup.tx_count + stmt.excluded.tx_count,
+            },
+        )
+        db.execute(stmt)
+        return
+    # Generic fallback: update, then insert what was missing
+    for period, (amount, count) in deltas.items():
+        updated = (
+            db.query(SpendRollup)
+            .filter(SpendRollup.user_id == user_id, SpendRollup.period == period)
+            .update({SpendRollup.amount: SpendRollup.amount + amount,
+                     SpendRollup.tx_count: SpendRollup.tx_count + count},
+                    synchronize_session=False)
+        )
+        if not updated:
+            db.add(SpendRollup(user_id=user_id, period=period, amount=amount, tx_count=count))
+
+
+def rebuild_rollups(db: Session, user_id: Optional[int] = None) -> int:
+    """Recompute rollups from raw transactions (all users, or one). Returns rows written."""
+    db.execute(delete(SpendRollup).where(SpendRollup.user_id == user_id) if user_id is not None else delete(SpendRollup))
+    written = 0
+    for period_expr in (Transaction.date, func.substr(Transaction.date, 1, 7)):
+        source = select(
+            Transaction.user_id, period_expr, func.sum(Transaction.amount), func.count(Transaction.id)
+        ).where(Transaction.date.is_not(None))
+        if user_id is not None:
+            source = source.where(Transaction.user_id == user_id)
+        source = source.group_by(Transaction.user_id, period_expr)
+        result = db.execute(insert(SpendRollup).from_select(
+            ["user_id", "period", "amount", "tx_count"], source
+        ))
+        written += result.rowcount or 0
+    db.commit()
+    return written
 
 
 def get_transactions_today(db: Session, user_id: int = 1) -> list:
@@ -48,17 +119,20 @@ def add_transaction(db: Session, user_id: int, amount: float, category: str, des
         date=today,
     )
     db.add(tx)
+    day, month = _periods(today)
+    apply_spend_deltas(db, user_id, {day: (amount, 1), month: (amount, 1)})
     db.commit()
     db.refresh(tx)
     return tx
 
 
-def is_within_budget(db: Session, user_id: int, amount: float) -> dict:
+def is_within_budget(db: Session, user_id: int, amount: float, user: Optional[User] = None) -> dict:
     """
     Check if a proposed expense fits within the daily budget.
+    Pass the already-loaded `user` to skip the lookup.
     Returns {allowed, remaining, warning}
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = user or db.query(User).filter(User.id == user_id).first()
     if not user:
         return {"allowed": True, "remaining": 9999, "warning": None}
 
@@ -80,13 +154,18 @@ def is_within_budget(db: Session, user_id: int, amount: float) -> dict:
     return {"allowed": True, "remaining": remaining - amount, "warning": None}
 
 
-def get_budget_status(db: Session, user_id: int = 1) -> dict:
-    user = db.query(User).filter(User.id == user_id).first()
+def get_budget_status(db: Session, user_id: int = 1, user: Optional[User] = None) -> dict:
+    """
+    Two round-trips: one primary-key lookup for today's and this month's
+    rollups, plus today's transactions for the response list.
+    """
+    user = user or db.query(User).filter(User.id == user_id).first()
     if not user:
         return {}
 
-    spent_today = get_spent_today(db, user_id)
-    spent_month = get_spent_this_month(db, user_id)
+    day, month = _periods(date.today().isoformat())
+    spent = _spent_for_periods(db, user_id, (day, month))
+    spent_today, spent_month = spent[day], spent[month]
     remaining_today = max(0, user.daily_budget - spent_today)
     remaining_month = max(0, user.monthly_budget - spent_month)
 
@@ -106,3 +185,280 @@ def get_budget_status(db: Session, user_id: int = 1) -> dict:
         "warning": warning,
         "transactions_today": get_transactions_today(db, user_id),
     }
+
+
+# ── Bulk import ───────────────────────────────────────────────────────────────
+IMPORT_CHUNK_SIZE = 1000
+MAX_IMPORT_ROWS = 200_000
+MAX_REPORTED_ERRORS = 200
+_IMPORT_DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d")
+
+
+def _parse_import_row(raw: dict) -> dict:
+    """Validate one CSV/NDJSON record into Transaction column values (raises ValueError)."""
+    row = {str(k).strip().lower(): v for k, v in raw.items() if k is not None}
+
+    amount_raw = str(row.get("amount") or "").replace("₹", "").replace("Rs.", "").replace(",", "").strip()
+    if not amount_raw:
+        raise ValueError("missing amount")
+    try:
+        amount = round(float(amount_raw), 2)
+    except ValueError:
+        raise ValueError(f"invalid amount '{row.get('amount')}'")
+    if amount <= 0:
+        raise ValueError("amount must be positive")
+
+    date_raw = str(row.get("date") or "").strip()
+    if not date_raw:
+        raise ValueError("missing date")
+    for fmt in _IMPORT_DATE_FORMATS:
+        try:
+            day = datetime.strptime(date_raw[:10], fmt).date()
+            break
+        except ValueError:
+            continue
+    else:
+        raise ValueError(f"invalid date '{date_raw}' (use YYYY-MM-DD)")
+    if day > date.today():
+        raise ValueError("date is in the future")
+
+    return {
+        "amount": amount,
+        "category": (str(row.get("category") or "").strip().lower() or "other")[:50],
+        "description": str(row.get("description") or "").strip()[:200],
+        "date": day.isoformat(),
+    }
+
+
+def _iter_import_records(lines: Iterator[str], fmt: str) -> Iterator[Tuple[int, object]]:
+    """Yield (row_number, dict | Exception) one record at a time — the file is never held in memory."""
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_no, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("expected a JSON object per line")
+            yield line_no, record
+        except ValueError as e:
+            yield line_no, e
+
+
+def import_transactions(db: Session, user_id: int, lines: Iterator[str], fmt: str) -> dict:
+    """
+    Stream-parse an uploaded export, drop rows already stored (same date,
+    amount, category and description) and bulk-insert the rest. Matching is
+    by count: a file row consumes one identical stored row, so re-importing
+    an export is a no-op while two identical same-day purchases both land.
+    Inserts go in executemany chunks; everything, including the rollup
+    counters, commits as one transaction.
+    """
+    imported = duplicates = failed = 0
+    errors: List[dict] = []
+    existing: Counter = Counter()    # stored (pre-import) rows per dedup key, for dates loaded
+    loaded_dates: set = set()
+    deltas: Dict[str, List[float]] = {}
+
+    def record_error(row_no: int, message: str):
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"row": row_no, "error": message})
+
+    def flush(chunk: List[dict]):
+        nonlocal imported, duplicates
+        new_dates = {r["date"] for r in chunk} - loaded_dates
+        if new_dates:
+            existing.update(
+                (d, round(a or 0.0, 2), c or "", desc or "")
+                for d, a, c, desc in db.query(
+                    Transaction.date, Transaction.amount, Transaction.category, Transaction.description
+                ).filter(Transaction.user_id == user_id, Transaction.date.in_(new_dates))
+            )
+            loaded_dates.update(new_dates)
+        fresh = []
+        for r in chunk:
+            key = (r["date"], r["amount"], r["category"], r["description"])
+            if existing[key] > 0:
+                existing[key] -= 1
+                duplicates += 1
+                continue
+            fresh.append({**r, "user_id": user_id})
+            for period in _periods(r["date"]):
+                d = deltas.setdefault(period, [0.0, 0])
+                d[0] += r["amount"]
+                d[1] += 1
+        if fresh:
+            db.execute(insert(Transaction), fresh)
+            imported += len(fresh)
+
+    try:
+        chunk: List[dict] = []
+        for n, (row_no, record) in enumerate(_iter_import_records(lines, fmt), start=1):
+            if n > MAX_IMPORT_ROWS:
+                record_error(row_no, f"row limit of {MAX_IMPORT_ROWS} reached; remaining rows skipped")
+                break
+            if isinstance(record, Exception):
+                record_error(row_no, f"invalid JSON: {record}")
+                continue
+            try:
+                chunk.append(_parse_import_row(record))
+            except ValueError as e:
+                record_error(row_no, str(e))
+                continue
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                flush(chunk)
+                chunk = []
+        if chunk:
+            flush(chunk)
+
+        items = list(deltas.items())
+        for i in range(0, len(items), IMPORT_CHUNK_SIZE):
+            apply_spend_deltas(db, user_id, {p: (a, c) for p, (a, c) in items[i:i + IMPORT_CHUNK_SIZE]})
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return {
+        "imported": imported,
+        "duplicates": duplicates,
+        "failed": failed,
+        "errors": errors,
+        "errors_truncated": failed > len(errors),
+    }
+
+
+# ── Spending analytics ────────────────────────────────────────────────────────
+MAX_ANALYTICS_DAYS = 5 * 366
+
+
+def _rolling_mean(values: List[float], window: int) -> List[float]:
+    """Trailing mean over `window` days (shorter at the start of the series)."""
+    out, running = [], 0.0
+    for i, v in enumerate(values):
+        running += v
+        if i >= window:
+            running -= values[i - window]
+        out.append(round(running / min(i + 1, window), 2))
+    return out
+
+
+def analytics_etag(db: Session, user: User, start: date, end: date) -> str:
+    """
+    Cheap fingerprint of everything the analytics payload depends on.
+    Monthly rollup rows change on every insert, so summing them (a few rows
+    per year) detects new transactions without touching the transactions table.
+    """
+    n, tx_total, amount_total = (
+        db.query(func.count(), func.coalesce(func.sum(SpendRollup.tx_count), 0),
+                 func.coalesce(func.sum(SpendRollup.amount), 0.0))
+        .filter(SpendRollup.user_id == user.id, func.length(SpendRollup.period) == 7)
+        .one()
+    )
+    raw = (f"{user.id}|{start}|{end}|{date.today()}|{user.daily_budget}|{user.monthly_budget}"
+           f"|{n}|{tx_total}|{amount_total:.2f}")
+    return 'W/"' + hashlib.sha1(raw.encode()).hexdigest() + '"'
+
+
+def get_spending_analytics(db: Session, user: User, start: date, end: date) -> dict:
+    """
+    Pre-aggregated series for charting, read from the rollup table:
+    dense daily amounts (+ 7/30-day rolling means), ISO-week and calendar-month
+    buckets (clipped to [start, end]), a per-category split, and a month-end projection.
+    Series are columnar (one `start` date + value arrays) so years of data stay small.
+    """
+    daily_rows = (
+        db.query(SpendRollup.period, SpendRollup.amount, SpendRollup.tx_count)
+        .filter(SpendRollup.user_id == user.id,
+                SpendRollup.period >= start.isoformat(), SpendRollup.period <= end.isoformat(),
+                func.length(SpendRollup.period) == 10)
+        .all()
+    )
+    category_rows = (
+        db.query(Transaction.category, func.sum(Transaction.amount), func.count(Transaction.id))
+        .filter(Transaction.user_id == user.id,
+                Transaction.date >= start.isoformat(), Transaction.date <= end.isoformat())
+        .group_by(Transaction.category)
+        .all()
+    )
+
+    # Dense daily series
+    n_days = (end - start).days + 1
+    amounts = [0.0] * n_days
+    counts = [0] * n_days
+    for period, amount, tx_count in daily_rows:
+        i = (date.fromisoformat(period) - start).days
+        amounts[i] = round(amount or 0.0, 2)
+        counts[i] = tx_count or 0
+
+    # ISO weeks (Monday start)
+    week_starts: List[str] = []
+    week_amounts: List[float] = []
+    for i, amount in enumerate(amounts):
+        day = start + timedelta(days=i)
+        monday = (day - timedelta(days=day.weekday())).isoformat()
+        if not week_starts or week_starts[-1] != monday:
+            week_starts.append(monday)
+            week_amounts.append(0.0)
+        week_amounts[-1] = round(week_amounts[-1] + amount, 2)
+
+    # Calendar months, from the same clipped daily series – the monthly rollup
+    # rows would include days before `start` / after `end` in the edge months
+    months: List[str] = []
+    month_amounts: List[float] = []
+    month_counts: List[int] = []
+    for i, amount in enumerate(amounts):
+        month = (start + timedelta(days=i)).isoformat()[:7]
+        if not months or months[-1] != month:
+            months.append(month)
+            month_amounts.append(0.0)
+            month_counts.append(0)
+        month_amounts[-1] = round(month_amounts[-1] + amount, 2)
+        month_counts[-1] += counts[i]
+
+    range_total = sum(amounts)
+    categories = sorted(
+        ({"category": cat or "other", "amount": round(total or 0.0, 2), "count": cnt,
+          "share": round((total or 0.0) / range_total, 4) if range_total else 0.0}
+         for cat, total, cnt in category_rows),
+        key=lambda c: c["amount"], reverse=True,
+    )
+
+    # Month-end projection at the month-to-date burn rate
+    today = date.today()
+    month_key = today.strftime("%Y-%m")
+    spent_month = _spent_for_periods(db, user.id, (month_key,))[month_key]
+    days_in_month = ((today.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)).day
+    avg_daily = spent_month / today.day
+    projected = spent_month + avg_daily * (days_in_month - today.day)
+    budget_left = max(0.0, user.monthly_budget - spent_month)
+
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "total": round(range_total, 2),
+        "daily": {
+            "start": start.isoformat(),
+            "amounts": amounts,
+            "counts": counts,
+            "rolling_7d": _rolling_mean(amounts, 7),
+            "rolling_30d": _rolling_mean(amounts, 30),
+        },
+        "weekly": {"week_starts": week_starts, "amounts": week_amounts},
+        "monthly": {"months": months, "amounts": month_amounts, "counts": month_counts},
+        "categories": categories,
+        "burn_rate": {
+            "monthly_budget": user.monthly_budget,
+            "spent_month": round(spent_month, 2),
+            "avg_daily_month": round(avg_daily, 2),
+            "projected_month_end": round(projected, 2),
+            "projected_over_budget": projected > user.monthly_budget,
+            "days_left_at_current_rate": round(budget_left / avg_daily, 1) if avg_daily > 0 else None,
+        },
+    }
@@ -0,0 +1,180 @@
+"""
+Campus Distance Graph
+Builds a weighted walking graph per campus and precomputes all-pairs
+shortest paths (Floyd–Warshall) into a dense minutes matrix, so proximity
+scoring and planner travel times are a dict lookup plus an array index.
+
+Nodes: the base places in optimization_service.LOCATION_DISTANCE, plus every
+place in the user's CampusMap knowledge graph. The knowledge graph has no
+coordinates, so each place is attached to the base hub for its kind (food
+spots → Canteen, hostels → Hostel, …) with a short walk. Optional
+`shortcuts` entries ({"from", "to", "minutes"} or [from, to, minutes]) add
+direct edges.
+
+Graphs are cached per user and rebuilt only when the map's updated_at changes.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services import metrics_service
+from services.optimization_service import LOCATION_DISTANCE, DEFAULT_TRAVEL_MINUTES
+
+# Knowledge-graph group → base place it hangs off
+GROUP_HUBS = {
+    "food_spots": "Canteen",
+    "academic_blocks": "Main Campus",
+    "sports_facilities": "Sports Complex",
+    "hostels": "Hostel",
+    "landmarks": "Main Campus",
+    "entry_points": "Main Campus",
+}
+# `areas` lists every place; the ones in no group above hang off this hub
+DEFAULT_HUB = "Main Campus"
+# Walk from a hub to a place attached to it
+ZONE_MINUTES = 4.0
+SHORTCUT_MINUTES = 2.0
+MAX_CACHED_GRAPHS = 1024
+
+
+def normalize(name: str) -> str:
+    return re.sub(r"\s+", " ", (name or "").strip().lower())
+
+
+class CampusGraph:
+    """Immutable all-pairs walking-time matrix over a campus's named places."""
+
+    __slots__ = ("names", "index_of", "dist")
+
+    def __init__(self, names: List[str], dist: np.ndarray):
+        self.names = tuple(names)
+        self.index_of = {normalize(n): i for i, n in enumerate(names)}
+        dist.flags.writeable = False
+        self.dist = dist
+
+    def distance(self, origin: str, destination: str) -> Optional[float]:
+        """Shortest walk in minutes, or None if either place is unknown / unreachable."""
+        i = self.index_of.get(normalize(origin))
+        j = self.index_of.get(normalize(destination))
+        if i is None or j is None:
+            return None
+        d = self.dist[i, j]
+        return None if np.isinf(d) else float(d)
+
+    def travel_minutes(self, origin: str, destination: str) -> float:
+        """distance() with a default walk for places not on the graph."""
+        if normalize(origin) == normalize(destination):
+            return 0.0
+        d = self.distance(origin, destination)
+        return DEFAULT_TRAVEL_MINUTES if d is None else d
+
+
+def _shortest_paths(n: int, edges: List[Tuple[int, int, float]]) -> np.ndarray:
+    dist = np.full((n, n), np.inf)
+    np.fill_diagonal(dist, 0.0)
+    for i, j, w in edges:
+        if w < dist[i, j]:
+            dist[i, j] = dist[j, i] = w
+    # Floyd–Warshall, one vectorized relaxation per intermediate node
+    for k in range(n):
+        np.minimum(dist, dist[:, k:k + 1] + dist[k:k + 1, :], out=dist)
+    return dist
+
+
+def build_graph(knowledge_graph: Optional[dict]) -> CampusGraph:
+    names: List[str] = []
+    index: Dict[str, int] = {}
+    edges: List[Tuple[int, int, float]] = []
+
+    def node(name: str) -> Optional[int]:
+        key = normalize(name)
+        if not key:
+            return None
+        if key not in index:
+            index[key] = len(names)
+            names.append(name.strip())
+        return index[key]
+
+    for origin, row in LOCATION_DISTANCE.items():
+        for dest, minutes in row.items():
+            edges.append((node(origin), node(dest), float(minutes)))
+
+    kg = knowledge_graph or {}
+    placed = set(range(len(names)))
+    groups = [(kg.get(group) or [], hub) for group, hub in GROUP_HUBS.items()]
+    groups.append((kg.get("areas") or [], DEFAULT_HUB))
+    for places, hub in groups:
+        hub_i = node(hub)
+        for place in places:
+            if not isinstance(place, str):
+                continue
+            i = node(place)
+            if i is None or (hub == DEFAULT_HUB and i in placed):
+                continue
+            placed.add(i)
+            if i != hub_i:
+                edges.append((hub_i, i, ZONE_MINUTES))
+
+    for shortcut in kg.get("shortcuts") or []:
+        if isinstance(shortcut, dict):
+            a, b, minutes = shortcut.get("from"), shortcut.get("to"), shortcut.get("minutes", SHORTCUT_MINUTES)
+        elif isinstance(shortcut, (list, tuple)) and len(shortcut) >= 2:
+            a, b = shortcut[0], shortcut[1]
+            minutes = shortcut[2] if len(shortcut) > 2 else SHORTCUT_MINUTES
+        else:
+            continue
+        if not isinstance(a, str) or not isinstance(b, str):
+            continue
+        i, j = node(a), node(b)
+        try:
+            minutes = float(minutes)
+        except (TypeError, ValueError):
+            minutes = SHORTCUT_MINUTES
+        if i is not None and j is not None and minutes >= 0:
+            edges.append((i, j, minutes))
+
+    return CampusGraph(names, _shortest_paths(len(names), edges))
+
+
+_default_graph: Optional[CampusGraph] = None
+_graphs: "OrderedDict[int, Tuple[tuple, CampusGraph]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def default_graph() -> CampusGraph:
+    """Graph of the built-in places only (users without an uploaded map)."""
+    global _default_graph
+    if _default_graph is None:
+        _default_graph = build_graph(None)
+    return _default_graph
+
+
+def graph_for(user_id: int, campus_map) -> CampusGraph:
+    """The user's campus graph; `campus_map` is their CampusMap row or None."""
+    if campus_map is None or not campus_map.knowledge_graph:
+        return default_graph()
+    stamp = (campus_map.id, campus_map.updated_at)
+    with _lock:
+        hit = _graphs.get(user_id)
+        if hit and hit[0] == stamp:
+            _graphs.move_to_end(user_id)
+            metrics_service.cache_lookup("campus_graph", True)
+            return hit[1]
+    metrics_service.cache_lookup("campus_graph", False)
+    graph = build_graph(campus_map.knowledge_graph)
+    with _lock:
+        _graphs[user_id] = (stamp, graph)
+        _graphs.move_to_end(user_id)
+        while len(_graphs) > MAX_CACHED_GRAPHS:
+            _graphs.popitem(last=False)
+    return graph
+
+
+def invalidate(user_id: int) -> None:
+    """Drop a user's cached graph (map uploaded or deleted)."""
+    with _lock:
+        _graphs.pop(user_id, None)
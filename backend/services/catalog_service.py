@@ -0,0 +1,156 @@
+"""
+Recommendation Catalog Snapshot
+Holds the whole `recommendations` table in memory as an immutable, versioned
+snapshot: read-only numpy columns for vectorized filtering (category, cost,
+duration, rating) plus an id → row index map. Request paths filter on the
+columns and only materialize dicts for the rows they actually return, so
+they never query the table.
+
+Any committed session that inserted, updated or deleted a Recommendation
+bumps the version counter; the next get_snapshot() rebuilds. Writes from
+other processes (e.g. data/seed_data.py) are picked up after
+CATALOG_MAX_AGE_SECONDS.
+"""
+
+import threading
+import time
+from types import MappingProxyType
+from typing import Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from config import settings
+from models import Recommendation
+from services import metrics_service
+
+_FIELDS = (
+    "id", "name", "category", "sub_category", "description", "location",
+    "cost", "duration_minutes", "rating", "tags", "available_times",
+)
+
+
+class CatalogSnapshot:
+    """Immutable view of the catalog at one version. Never mutate its arrays."""
+
+    __slots__ = ("version", "loaded_at", "ids", "category", "sub_category", "location",
+                 "cost", "duration", "rating", "index_of", "_rows")
+
+    def __init__(self, version: int, rows: List[dict]):
+        self.version = version
+        self.loaded_at = time.time()
+        self._rows = tuple(MappingProxyType(r) for r in rows)
+        self.index_of = MappingProxyType({r["id"]: i for i, r in enumerate(rows)})
+        self.ids = self._column([r["id"] for r in rows], np.int64)
+        self.category = self._column([r["category"] or "" for r in rows], str)
+        self.sub_category = self._column([r["sub_category"] or "" for r in rows], str)
+        self.location = self._column([r["location"] or "" for r in rows], str)
+        self.cost = self._column([r["cost"] or 0.0 for r in rows], np.float64)
+        self.duration = self._column([r["duration_minutes"] or 0 for r in rows], np.int64)
+        self.rating = self._column([r["rating"] or 0.0 for r in rows], np.float64)
+
+    @staticmethod
+    def _column(values: list, dtype) -> np.ndarray:
+        arr = np.array(values, dtype=dtype)
+        arr.flags.writeable = False
+        return arr
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _dict(self, i: int) -> dict:
+        # Fresh dict (and lists) per call – callers are free to mutate what they get
+        row = dict(self._rows[i])
+        row["tags"] = list(row["tags"])
+        row["available_times"] = list(row["available_times"])
+        return row
+
+    def dicts(self, indices: Iterable[int]) -> List[dict]:
+        return [self._dict(int(i)) for i in indices]
+
+    def where(self, mask: np.ndarray) -> List[dict]:
+        return self.dicts(np.flatnonzero(mask))
+
+    def by_ids(self, ids: Iterable[int]) -> List[dict]:
+        """Rows for `ids` in the given order; unknown ids are skipped."""
+        return self.dicts(self.index_of[i] for i in ids if i in self.index_of)
+
+    def all(self) -> List[dict]:
+        return self.dicts(range(len(self._rows)))
+
+
+_lock = threading.Lock()
+_version = 0
+_snapshot: Optional[CatalogSnapshot] = None
+
+
+def _load(version: int) -> CatalogSnapshot:
+    from database import SessionLocal
+    columns = [getattr(Recommendation, f) for f in _FIELDS]
+    db = SessionLocal()
+    try:
+        result = db.execute(select(*columns).order_by(Recommendation.id)).all()
+    finally:
+        db.close()
+    rows = []
+    for values in result:
+        row = dict(zip(_FIELDS, values))
+        row["tags"] = tuple(row["tags"] or ())
+        row["available_times"] = tuple(row["available_times"] or ())
+        rows.append(row)
+    return CatalogSnapshot(version, rows)
+
+
+def get_snapshot() -> CatalogSnapshot:
+    """Current snapshot, rebuilt if the catalog changed or it is too old."""
+    global _snapshot
+    snap = _snapshot
+    if snap is not None and snap.version == _version and time.time() - snap.loaded_at < settings.CATALOG_MAX_AGE_SECONDS:
+        metrics_service.cache_lookup("catalog", True)
+        return snap
+    with _lock:
+        snap = _snapshot
+        stale = snap is None or snap.version != _version or time.time() - snap.loaded_at >= settings.CATALOG_MAX_AGE_SECONDS
+        if stale:
+            version = _version           # read before loading – a write during the load bumps past it
+            snap = _snapshot = _load(version)
+    metrics_service.cache_lookup("catalog", not stale)
+    return snap
+
+
+def invalidate() -> None:
+    """Force a rebuild on next access (e.g. after raw SQL writes to the table)."""
+    global _version
+    with _lock:
+        _version += 1
+
+
+# ── Change tracking ──────────────────────────────────────────────────────────
+# Flush marks the session; only a successful commit bumps the version, so a
+# rebuild never snapshots (or misses) uncommitted rows.
+@event.listens_for(Session, "after_flush")
+def _mark_catalog_write(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Recommendation):
+            session.info["catalog_dirty"] = True
+            return
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_catalog_statement(state):
+    # insert(Recommendation) / update() / delete() statements and Query.update()
+    if (state.is_insert or state.is_update or state.is_delete) and \
+            state.bind_mapper is not None and state.bind_mapper.class_ is Recommendation:
+        state.session.info["catalog_dirty"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_version(session):
+    if session.info.pop("catalog_dirty", False):
+        invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_mark(session):
+    session.info.pop("catalog_dirty", None)
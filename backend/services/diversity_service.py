@@ -4,47 +4,145 @@ Anti-Filter Bubble Diversity Service.
 Detects repetitive category suggestions and injects diversity by:
  1. Penalising categories that have been over-recommended.
  2. Boosting under-represented categories.
- 3. Ensuring each result set spans at least 2 distinct categories.
+ 3. Re-ranking with maximal marginal relevance (MMR) over item embeddings,
+    so near-duplicates are pushed down even across sub_categories.
+ 4. Ensuring each result set spans at least 2 distinct categories
+    (fallback when no embeddings are available).
 """
 
-from typing import List, Dict, Tuple
-from collections import Counter
+from typing import Deque, List, Dict, Tuple, Union
+from collections import deque
+
+import numpy as np
 
 
 # How many recent recommendations to consider for repetition detection
 HISTORY_WINDOW = 10
 # If a category appears more than this fraction of the window → repetitive
 REPETITION_THRESHOLD = 0.5
+# MMR relevance weight for exploration_level 1 (stick to favourites) … 5 (loves new things)
+MMR_LAMBDA_FOCUSED = 0.9
+MMR_LAMBDA_EXPLORER = 0.5
+
+
+class HistoryWindow:
+    """
+    Sliding window over the last HISTORY_WINDOW sub_categories with running
+    per-category counts – append and lookups are O(1), no recounting.
+    """
+
+    __slots__ = ("items", "counts")
+
+    def __init__(self, items: List[str] = ()):
+        self.items: Deque[str] = deque(maxlen=HISTORY_WINDOW)
+        self.counts: Dict[str, int] = {}
+        self.extend(items[-HISTORY_WINDOW:] if items else ())
+
+    def append(self, sub_category: str) -> None:
+        if len(self.items) == HISTORY_WINDOW:
+            dropped = self.items[0]
+            left = self.counts[dropped] - 1
+            if left:
+                self.counts[dropped] = left
+            else:
+                del self.counts[dropped]
+        self.items.append(sub_category)
+        self.counts[sub_category] = self.counts.get(sub_category, 0) + 1
+
+    def extend(self, sub_categories) -> None:
+        for sub_category in sub_categories:
+            self.append(sub_category)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def copy(self) -> "HistoryWindow":
+        clone = HistoryWindow()
+        clone.items.extend(self.items)
+        clone.counts = dict(self.counts)
+        return clone
+
+    def dominant(self) -> Tuple[str, int]:
+        """Most frequent category (earliest in the window on ties) and its count."""
+        top = max(self.counts.values(), default=0)
+        for cat in self.items:
+            if self.counts[cat] == top:
+                return cat, top
+        return "", 0
+
+
+def _window(history: Union[HistoryWindow, List[str]]) -> HistoryWindow:
+    return history if isinstance(history, HistoryWindow) else HistoryWindow(history)
 
 
 def compute_diversity_scores(
     candidates: List[dict],
-    recommendation_history: List[str],   # list of recent sub_categories
+    recommendation_history: Union[HistoryWindow, List[str]],   # recent sub_categories
 ) -> Dict[int, float]:
     """
     For each candidate, compute a diversity score in [0, 1].
     High score = this category is fresh.  Low score = over-recommended.
+    Vectorized: candidates are mapped to category codes once and scored as an array.
     """
-    window = recommendation_history[-HISTORY_WINDOW:]
-    category_counts = Counter(window)
-    total = len(window) if window else 1
-
-    scores: Dict[int, float] = {}
-    for rec in candidates:
-        sub_cat = rec.get("sub_category", "general")
-        freq = category_counts.get(sub_cat, 0) / total
-
-        # Diversity score inversely proportional to recent frequency
-        if freq >= REPETITION_THRESHOLD:
-            score = 0.1   # heavily suppressed
-        elif freq > 0:
-            score = 1.0 - freq * 1.5
-        else:
-            score = 1.0   # never seen before → maximum diversity
-
-        scores[rec["id"]] = max(0.0, min(1.0, score))
-
-    return scores
+    if not candidates:
+        return {}
+    window = _window(recommendation_history)
+    total = len(window) or 1
+
+    # Codes via a dict, not np.unique: sub_category may be None (unorderable
+    # next to strings) and must key window.counts exactly as stored
+    code_of: Dict[object, int] = {}
+    codes = np.fromiter(
+        (code_of.setdefault(rec.get("sub_category", "general"), len(code_of)) for rec in candidates),
+        dtype=np.intp, count=len(candidates),
+    )
+    code_freq = np.array([window.counts.get(cat, 0) for cat in code_of], dtype=np.float64) / total
+    freq = code_freq[codes]
+
+    # Diversity score inversely proportional to recent frequency:
+    # heavily suppressed past the threshold, 1.0 if never seen before
+    scores = np.where(
+        freq >= REPETITION_THRESHOLD, 0.1,
+        np.where(freq > 0, 1.0 - freq * 1.5, 1.0),
+    )
+    scores = np.clip(scores, 0.0, 1.0)
+    return dict(zip((rec["id"] for rec in candidates), scores.tolist()))
+
+
+def mmr_lambda(exploration_level: int = None) -> float:
+    """Relevance/diversity trade-off for a 1-5 exploration level (3 when unknown)."""
+    level = min(5, max(1, exploration_level or 3))
+    return MMR_LAMBDA_FOCUSED - (level - 1) / 4 * (MMR_LAMBDA_FOCUSED - MMR_LAMBDA_EXPLORER)
+
+
+def mmr_rerank(
+    ranked: List[dict],
+    embeddings: np.ndarray,
+    top_k: int,
+    lam: float = 0.7,
+) -> List[dict]:
+    """
+    Greedy maximal marginal relevance: repeatedly take the item maximizing
+    lam * score - (1 - lam) * (max cosine similarity to anything already taken).
+    `embeddings` are L2-normalized rows aligned with `ranked`. Each step is one
+    matrix-vector product, so k picks over n candidates cost O(k·n·dim).
+    """
+    n = len(ranked)
+    if n == 0 or top_k <= 0:
+        return []
+    relevance = np.array([r.get("score", 0.0) for r in ranked], dtype=np.float64)
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    max_sim = np.full(n, -np.inf)                 # similarity to the closest picked item
+    available = np.ones(n, dtype=bool)
+    picked = []
+    for _ in range(min(top_k, n)):
+        gain = lam * relevance - (1.0 - lam) * max_sim if picked else lam * relevance
+        gain[~available] = -np.inf
+        best = int(np.argmax(gain))
+        picked.append(best)
+        available[best] = False
+        np.maximum(max_sim, vectors @ vectors[best], out=max_sim)
+    return [ranked[i] for i in picked]
 
 
 def ensure_category_diversity(
@@ -85,18 +183,17 @@ def ensure_category_diversity(
     return result
 
 
-def detect_filter_bubble(recommendation_history: List[str]) -> Tuple[bool, str]:
+def detect_filter_bubble(recommendation_history: Union[HistoryWindow, List[str]]) -> Tuple[bool, str]:
     """
     Detect if recent recommendations form a filter bubble.
     Returns (is_bubble, description).
     """
-    window = recommendation_history[-HISTORY_WINDOW:]
+    window = _window(recommendation_history)
     if len(window) < 4:
         return False, ""
 
-    counts = Counter(window)
     total = len(window)
-    dominant_cat, dominant_count = counts.most_common(1)[0]
+    dominant_cat, dominant_count = window.dominant()
     freq = dominant_count / total
 
     if freq >= REPETITION_THRESHOLD:
@@ -107,9 +204,16 @@ def detect_filter_bubble(recommendation_history: List[str]) -> Tuple[bool, str]:
     return False, ""
 
 
-def get_diversity_injection_note(history: List[str], top_result_category: str) -> str:
-    """Generate a note to show the user when diversity was applied."""
-    is_bubble, desc = detect_filter_bubble(history)
+def get_diversity_injection_note(
+    history: Union[HistoryWindow, List[str]],
+    top_result_category: str,
+    bubble: Tuple[bool, str] = None,
+) -> str:
+    """
+    Generate a note to show the user when diversity was applied.
+    Pass `bubble` (a detect_filter_bubble result) to avoid detecting twice.
+    """
+    is_bubble, desc = bubble if bubble is not None else detect_filter_bubble(history)
     if is_bubble:
         return f"🔀 {desc} We've added variety to your suggestions."
     return ""
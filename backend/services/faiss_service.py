@@ -7,7 +7,7 @@ Falls back to keyword matching if sentence-transformers are not available.
 import numpy as np
 import os
 import pickle
-from typing import List, Tuple
+from typing import Iterable, List, Optional, Tuple
 
 # ── Try to import heavy dependencies ──────────────────────────────────────────
 try:
@@ -28,6 +28,8 @@ META_PATH  = "data/faiss_meta.pkl"
 _index: "faiss.IndexFlatL2 | None" = None
 _metadata: List[dict] = []          # [{id, name, category, ...}]
 _model = None
+_vectors: "np.ndarray | None" = None   # index rows as a matrix, for embeddings_for()
+_row_of: dict = {}                     # recommendation id → row in _vectors
 
 
 def _get_model():
@@ -52,10 +54,16 @@ def _embed(texts: List[str]) -> np.ndarray:
     return np.array(vecs, dtype="float32")
 
 
+def embed(texts: List[str]) -> np.ndarray:
+    """Public access to the shared MiniLM embedder (L2-normalized float32 rows)."""
+    return _embed(texts)
+
+
 def build_index(recommendations: List[dict]) -> None:
     """Build FAISS index from list of recommendation dicts."""
-    global _index, _metadata
+    global _index, _metadata, _vectors
     _metadata = recommendations
+    _vectors = None
 
     texts = [
         f"{r['name']} {r['description']} {r['category']} {r['sub_category']} {' '.join(r.get('tags', []))}"
@@ -81,11 +89,25 @@ def build_index(recommendations: List[dict]) -> None:
             pickle.dump(_metadata, f)
 
 
+def use_embeddings(embeddings: np.ndarray, metadata: List[dict]) -> None:
+    """Serve searches from precomputed, L2-normalized embeddings (nothing written to disk)."""
+    global _index, _metadata, _vectors
+    embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+    if FAISS_AVAILABLE:
+        _index = faiss.IndexFlatIP(embeddings.shape[1])
+        _index.add(embeddings)
+    else:
+        _index = embeddings
+    _metadata = metadata
+    _vectors = None
+
+
 def load_index() -> bool:
     """Load persisted index from disk. Returns True if successful."""
-    global _index, _metadata
+    global _index, _metadata, _vectors
     if not os.path.exists(META_PATH):
         return False
+    _vectors = None
     with open(META_PATH, "rb") as f:
         _metadata = pickle.load(f)
     if FAISS_AVAILABLE and os.path.exists(INDEX_PATH):
@@ -107,7 +129,15 @@ def search(query: str, top_k: int = 10) -> List[Tuple[dict, float]]:
     if _index is None or not _metadata:
         return []
 
-    q_vec = _embed([query])   # shape (1, dim)
+    return search_vector(_embed([query]), top_k)
+
+
+def search_vector(q_vec: np.ndarray, top_k: int = 10) -> List[Tuple[dict, float]]:
+    """search() for an already embedded query, shape (1, dim)."""
+    if _index is None:
+        load_index()
+    if _index is None or not _metadata:
+        return []
 
     if FAISS_AVAILABLE and hasattr(_index, "search"):
         scores, indices = _index.search(q_vec, min(top_k, len(_metadata)))
@@ -119,9 +149,35 @@ def search(query: str, top_k: int = 10) -> List[Tuple[dict, float]]:
     else:
         # Numpy fallback cosine similarity
         sims = (_index @ q_vec.T).flatten()
-        top_indices = np.argsort(sims)[::-1][:top_k]
+        k = min(top_k, len(sims))
+        if k <= 0:
+            return []
+        top_indices = np.argpartition(-sims, k - 1)[:k]
+        top_indices = top_indices[np.argsort(-sims[top_indices])]
         return [(_metadata[i], float(sims[i])) for i in top_indices]
 
 
+def embeddings_for(ids: Iterable[int]) -> Optional[np.ndarray]:
+    """
+    Stored embeddings for recommendation ids, one row per id (zeros for ids
+    not in the index). None if there is no index.
+    """
+    global _vectors, _row_of
+    if _vectors is None:
+        if _index is None:
+            load_index()
+        if _index is None or not _metadata:
+            return None
+        if FAISS_AVAILABLE and hasattr(_index, "reconstruct_n"):
+            _vectors = _index.reconstruct_n(0, _index.ntotal)
+        else:
+            _vectors = np.asarray(_index, dtype="float32")
+        _row_of = {meta["id"]: i for i, meta in enumerate(_metadata)}
+    rows = np.array([_row_of.get(i, -1) for i in ids], dtype=np.int64)
+    out = _vectors[np.maximum(rows, 0)]
+    out[rows < 0] = 0.0
+    return out
+
+
 def get_all_metadata() -> List[dict]:
     return _metadata
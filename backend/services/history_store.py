@@ -0,0 +1,209 @@
+"""
+Recommendation History Store
+Recent recommended sub_categories per user, feeding diversity scoring.
+
+  - memory: a fixed-size ring buffer (deque) per user, at most
+    HISTORY_MAX_USERS users resident (least recently used evicted)
+  - durable: the `recommendation_history` table, one row per user with a
+    version counter
+  - reads compare the resident copy's version with the row's (a primary-key
+    lookup) and reload only if another worker wrote since
+  - writes append in memory and are flushed write-behind (flush() is meant
+    for BackgroundTasks); a flush that loses a race to another worker re-reads
+    the row and re-applies its pending items, so no worker's items are dropped
+  - bounded while the DB is down: pending items are capped at HISTORY_LENGTH
+    per user (older ones could never survive a flush anyway), and past
+    HISTORY_MAX_USERS users with unflushed items are evicted too, logged and
+    counted in trustai_history_dropped_items_total
+  - flushes are serialized per user, not per process
+"""
+
+import logging
+import threading
+from collections import OrderedDict, deque
+from typing import Deque, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from models import RecommendationHistory
+from services import metrics_service
+from services.diversity_service import HistoryWindow
+
+_FLUSH_ATTEMPTS = 3
+
+DROPPED = metrics_service.counter(
+    "trustai_history_dropped_items_total", "Unflushed history items dropped to bound memory",
+)
+log = logging.getLogger("trustai.history")
+
+
+class _Entry:
+    __slots__ = ("items", "window", "version", "pending", "pending_total", "flush_lock")
+
+    def __init__(self, items: List[str], version: int, flush_lock: Optional[threading.Lock] = None):
+        self.items: Deque[str] = deque(items, maxlen=settings.HISTORY_LENGTH)
+        self.window = HistoryWindow(items)   # diversity counts, kept in step with items
+        self.version = version        # row version `items` (minus pending) corresponds to
+        # Appended here, not yet written; only the newest HISTORY_LENGTH can matter
+        self.pending: Deque[str] = deque(maxlen=settings.HISTORY_LENGTH)
+        self.pending_total = 0        # items ever added to pending – tells a flush which are new
+        # One flush per user at a time, so pending snapshots can't overlap; carried
+        # over when the entry is rebuilt
+        self.flush_lock = flush_lock or threading.Lock()
+
+    def extend(self, sub_categories: List[str]) -> None:
+        self.items.extend(sub_categories)
+        self.window.extend(sub_categories)
+
+    def add_pending(self, sub_categories: List[str]) -> None:
+        self.extend(sub_categories)
+        self.pending.extend(sub_categories)
+        self.pending_total += len(sub_categories)
+
+    def successor(self, items: List[str], version: int, pending: List[str]) -> "_Entry":
+        """Entry for stored `items`, with `pending` (unflushed) replayed on top."""
+        fresh = _Entry(items or [], version, self.flush_lock)
+        fresh.extend(pending)
+        fresh.pending.extend(pending)
+        fresh.pending_total = self.pending_total
+        return fresh
+
+
+_lock = threading.Lock()
+_entries: "OrderedDict[int, _Entry]" = OrderedDict()
+
+
+def _put(user_id: int, entry: _Entry) -> None:
+    """Insert/refresh under _lock, evicting idle users past the cap."""
+    _entries[user_id] = entry
+    _entries.move_to_end(user_id)
+    excess = len(_entries) - settings.HISTORY_MAX_USERS
+    if excess <= 0:
+        return
+    # Users with unflushed items stay until their flush lands...
+    idle = [uid for uid, e in _entries.items() if not e.pending and uid != user_id][:excess]
+    for uid in idle:
+        del _entries[uid]
+    excess -= len(idle)
+    if excess <= 0:
+        return
+    # ...unless flushes keep failing – then the least recently used go, items and all
+    for uid in [uid for uid in _entries if uid != user_id][:excess]:
+        dropped = len(_entries.pop(uid).pending)
+        DROPPED.inc(dropped)
+        log.warning("history: evicted user %s with %d unflushed items (flushes failing?)", uid, dropped)
+
+
+def _rebase(entry: Optional[_Entry], items: List[str], version: int) -> _Entry:
+    """Entry for the stored items, with any unflushed local items replayed on top."""
+    if entry is None:
+        return _Entry(items or [], version)
+    return entry.successor(items, version, list(entry.pending))
+
+
+async def recent(db: AsyncSession, user_id: int) -> HistoryWindow:
+    """The user's diversity window (a copy – safe to hold across awaits)."""
+    stored_version = (await db.execute(
+        select(RecommendationHistory.version).where(RecommendationHistory.user_id == user_id)
+    )).scalar()
+    with _lock:
+        entry = _entries.get(user_id)
+        if entry is not None and entry.version == (stored_version or 0):
+            _entries.move_to_end(user_id)
+            metrics_service.cache_lookup("history", True)
+            return entry.window.copy()
+    metrics_service.cache_lookup("history", False)
+
+    items = []
+    if stored_version is not None:
+        row = (await db.execute(
+            select(RecommendationHistory.items, RecommendationHistory.version)
+            .where(RecommendationHistory.user_id == user_id)
+        )).first()
+        if row is not None:
+            items, stored_version = row.items or [], row.version
+    with _lock:
+        entry = _entries.get(user_id)
+        if entry is None or entry.version != (stored_version or 0):
+            # (equal means a local flush landed meanwhile and already holds this row)
+            entry = _rebase(entry, items, stored_version or 0)
+        _put(user_id, entry)
+        return entry.window.copy()
+
+
+def record(user_id: int, sub_categories: List[str]) -> None:
+    """Append to the user's history in memory; persist with flush(user_id)."""
+    if not sub_categories:
+        return
+    with _lock:
+        entry = _entries.get(user_id)
+        if entry is None:
+            # Not resident (evicted, or recent() never called) – flush merges with the stored row
+            entry = _Entry([], -1)
+        entry.add_pending(sub_categories)
+        _put(user_id, entry)
+
+
+def flush(user_id: int) -> None:
+    """Write the user's pending items to the DB (compare-and-swap on version)."""
+    from database import SessionLocal
+
+    with _lock:
+        entry = _entries.get(user_id)
+        if entry is None or not entry.pending:
+            return
+        flush_lock = entry.flush_lock
+    with flush_lock:
+        _flush(SessionLocal(), user_id, flush_lock)
+
+
+def _flush(db, user_id: int, flush_lock: threading.Lock) -> None:
+    try:
+        for _ in range(_FLUSH_ATTEMPTS):
+            with _lock:
+                entry = _entries.get(user_id)
+                # A different lock means the entry was evicted and recreated – its own flush owns it
+                if entry is None or not entry.pending or entry.flush_lock is not flush_lock:
+                    return
+                pending = list(entry.pending)
+                taken = entry.pending_total
+
+            row = db.execute(
+                select(RecommendationHistory.items, RecommendationHistory.version)
+                .where(RecommendationHistory.user_id == user_id)
+            ).first()
+            base = list(row.items or []) if row else []
+            items = (base + pending)[-settings.HISTORY_LENGTH:]
+            try:
+                if row is None:
+                    db.add(RecommendationHistory(user_id=user_id, items=items, version=1))
+                    db.commit()
+                    new_version = 1
+                else:
+                    new_version = row.version + 1
+                    result = db.execute(
+                        update(RecommendationHistory)
+                        .where(RecommendationHistory.user_id == user_id,
+                               RecommendationHistory.version == row.version)
+                        .values(items=items, version=new_version)
+                    )
+                    db.commit()
+                    if result.rowcount != 1:
+                        continue          # another worker wrote first – re-read and retry
+            except IntegrityError:
+                db.rollback()             # concurrent first insert
+                continue
+
+            with _lock:
+                entry = _entries.get(user_id)
+                if entry is not None and entry.flush_lock is flush_lock:
+                    # Items recorded while we were writing stay pending for the next flush
+                    new = entry.pending_total - taken
+                    later = list(entry.pending)[-new:] if new > 0 else []
+                    _put(user_id, entry.successor(items, new_version, later))
+            return
+    finally:
+        db.close()
@@ -1,7 +1,9 @@
 import httpx
 import json
 import re
+import time
 from config import settings
+from services import metrics_service, text_sanitizer
 
 
 SYSTEM_PROMPT = """You are TRUSTAI, an explainable AI assistant for smart campus life.
@@ -11,32 +13,35 @@ IMPORTANT: Never use markdown formatting. Do not use **, *, #, -, or any special
 Write in plain prose. No bullet points. No bold text. No headers. No JSON in your reply.
 """
 
+LLM_SECONDS = metrics_service.histogram(
+    "trustai_llm_request_seconds", "Ollama /api/chat round trip by call type", ("call", "outcome"),
+)
+LLM_TOKENS = metrics_service.histogram(
+    "trustai_llm_tokens", "Tokens per Ollama call (prompt_eval_count / eval_count)", ("call", "kind"),
+    buckets=(16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192),
+)
 
-def _clean_text(text: str) -> str:
-    """Strip markdown artifacts and leaked JSON/tags from LLM output."""
-    # Remove <data>...</data> blocks (intent extraction leaking into reply)
-    text = re.sub(r'<data>.*?</data>', '', text, flags=re.DOTALL)
-    # Remove bold/italic markdown: **text** -> text, *text* -> text
-    text = re.sub(r'\*{1,3}(.*?)\*{1,3}', r'\1', text)
-    # Remove markdown headers: ## heading -> heading
-    text = re.sub(r'^#{1,6}\s+', '', text, flags=re.MULTILINE)
-    # Remove JSON-like blobs that may leak (lines starting with { or [{)
-    text = re.sub(r'^\s*[\[{].*?[\]}]\s*$', '', text, flags=re.MULTILINE | re.DOTALL)
-    # Remove markdown bullet dashes at line start
-    text = re.sub(r'^\s*[-•]\s+', '', text, flags=re.MULTILINE)
-    # Collapse 3+ blank lines to 2
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    return text.strip()
-
-
-async def chat_with_ollama(messages: list[dict], stream: bool = False) -> str:
-    """Send messages to Ollama and return the assistant reply."""
+
+def _observe(call: str, start: float, data: dict = None) -> None:
+    """Record one Ollama call; `data` is the parsed reply, None if it failed."""
+    LLM_SECONDS.observe(time.perf_counter() - start, call=call, outcome="error" if data is None else "ok")
+    if data:
+        # Counts are absent when Ollama answers from its prompt cache
+        if "prompt_eval_count" in data:
+            LLM_TOKENS.observe(data["prompt_eval_count"], call=call, kind="prompt")
+        if "eval_count" in data:
+            LLM_TOKENS.observe(data["eval_count"], call=call, kind="completion")
+
+
+async def chat_with_ollama(messages: list[dict], stream: bool = False, call: str = "chat") -> str:
+    """Send messages to Ollama and return the assistant reply; `call` labels the metrics."""
     payload = {
         "model": settings.OLLAMA_MODEL,
         "messages": messages,
         "stream": False,
         "options": {"temperature": 0.7, "num_predict": 512},
     }
+    start = time.perf_counter()
     async with httpx.AsyncClient(timeout=60) as client:
         try:
             response = await client.post(
@@ -44,15 +49,18 @@ async def chat_with_ollama(messages: list[dict], stream: bool = False) -> str:
             )
             response.raise_for_status()
             data = response.json()
-            return data["message"]["content"]
+            content = data["message"]["content"]
+            _observe(call, start, data)
+            return content
         except Exception as e:
+            _observe(call, start)
             return f"[LLM Error] Could not reach Ollama: {str(e)}. Make sure Ollama is running with: ollama serve"
 
 
-async def _clean_chat(messages: list[dict]) -> str:
+async def _clean_chat(messages: list[dict], call: str = "chat") -> str:
     """Call Ollama and return cleaned plain-text response."""
-    raw = await chat_with_ollama(messages)
-    return _clean_text(raw)
+    raw = await chat_with_ollama(messages, call=call)
+    return text_sanitizer.sanitize(raw)
 
 
 async def extract_intent_and_data(user_message: str) -> dict:
@@ -74,7 +82,7 @@ Respond ONLY with a JSON object. Example:
         {"role": "system", "content": "You are a JSON extractor. Return only valid JSON, no explanation."},
         {"role": "user", "content": prompt},
     ]
-    raw = await chat_with_ollama(messages)
+    raw = await chat_with_ollama(messages, call="intent")
     try:
         # Try to parse JSON from the response
         start = raw.find("{")
@@ -109,7 +117,7 @@ Write only plain prose sentences."""
         {"role": "system", "content": "You are TRUSTAI, a friendly campus AI assistant. Respond in plain prose sentences only. No markdown, no bullet points, no asterisks, no special formatting."},
         {"role": "user", "content": prompt},
     ]
-    return await _clean_chat(messages)
+    return await _clean_chat(messages, call="explanation")
 
 
 async def generate_club_content(
@@ -146,7 +154,7 @@ poster_text: 4-6 punchy lines for a physical poster
         {"role": "system", "content": "You are a creative campus social media manager. Return only valid JSON."},
         {"role": "user", "content": prompt},
     ]
-    raw = await chat_with_ollama(messages)
+    raw = await chat_with_ollama(messages, call="club_content")
     try:
         start = raw.find("{")
         end = raw.rfind("}") + 1
@@ -221,7 +229,7 @@ Return ONLY this JSON array (no markdown):
         {"role": "system", "content": "You are a campus social media strategist. Return only valid JSON array."},
         {"role": "user", "content": prompt},
     ]
-    raw = await chat_with_ollama(messages)
+    raw = await chat_with_ollama(messages, call="campaign")
     try:
         start = raw.find("[")
         end = raw.rfind("]") + 1
@@ -303,7 +311,7 @@ Return ONLY this JSON array:
         {"role": "system", "content": "You are a creative social media copywriter. Return only valid JSON array."},
         {"role": "user", "content": prompt},
     ]
-    raw = await chat_with_ollama(messages)
+    raw = await chat_with_ollama(messages, call="caption_variants")
     try:
         start = raw.find("[")
         end = raw.rfind("]") + 1
@@ -360,7 +368,7 @@ Return ONLY this JSON (no markdown):
         {"role": "system", "content": "You are a social media engagement strategist. Return only valid JSON."},
         {"role": "user", "content": prompt},
     ]
-    raw = await chat_with_ollama(messages)
+    raw = await chat_with_ollama(messages, call="engagement_kit")
     try:
         start = raw.find("{")
         end = raw.rfind("}") + 1
@@ -412,7 +420,7 @@ async def general_chat(history: list[dict], user_message: str, user_profile: dic
     messages = [{"role": "system", "content": system}] + history[-10:] + [
         {"role": "user", "content": user_message}
     ]
-    return await _clean_chat(messages)
+    return await _clean_chat(messages, call="chat")
 
 
 async def analyze_onboarding_behavior(answers: dict) -> dict:
@@ -465,7 +473,7 @@ All 5 weights must sum to exactly 1.0.
         {"role": "system", "content": "You are a behavioral analysis engine. Return only valid JSON."},
         {"role": "user", "content": prompt},
     ]
-    raw = await chat_with_ollama(messages)
+    raw = await chat_with_ollama(messages, call="onboarding")
     try:
         start = raw.find("{")
         end = raw.rfind("}") + 1
@@ -533,11 +541,15 @@ Include only what you can actually see in the image. Return only the JSON, no ex
     raw_text = ""
     async with httpx.AsyncClient(timeout=120) as client:
         # Try llava first
+        start = time.perf_counter()
         try:
             resp = await client.post(f"{settings.OLLAMA_BASE_URL}/api/chat", json=vision_payload)
             resp.raise_for_status()
-            raw_text = resp.json()["message"]["content"]
+            data = resp.json()
+            raw_text = data["message"]["content"]
+            _observe("campus_map_vision", start, data)
         except Exception:
+            _observe("campus_map_vision", start)
             # Fall back to llama3.2 with a descriptive text prompt
             text_payload = {
                 "model": settings.OLLAMA_MODEL,
@@ -556,11 +568,15 @@ Include only what you can actually see in the image. Return only the JSON, no ex
                 "stream": False,
                 "options": {"temperature": 0.1, "num_predict": 600},
             }
+            start = time.perf_counter()
             try:
                 resp = await client.post(f"{settings.OLLAMA_BASE_URL}/api/chat", json=text_payload)
                 resp.raise_for_status()
-                raw_text = resp.json()["message"]["content"]
+                data = resp.json()
+                raw_text = data["message"]["content"]
+                _observe("campus_map_text", start, data)
             except Exception as e:
+                _observe("campus_map_text", start)
                 raw_text = ""
 
     # Parse JSON from response
@@ -0,0 +1,145 @@
+"""
+Location Resolver
+Maps free-text location strings ("Library Block", "library  block", "Libary
+Block") to canonical integer ids, so location filters are set membership
+tests instead of per-candidate string heuristics.
+
+  - normalize(): lowercase, strip punctuation and filler words, collapse spaces
+  - exact hit on the normalized form first; otherwise a character-trigram
+    index finds the closest known name (Dice similarity >= FUZZY_THRESHOLD),
+    which absorbs typos but keeps "Library" and "Library Block" apart
+  - vocabulary: built-in campus places and catalog locations; ids are never
+    reassigned. A user's campus map areas are resolved against it per
+    request and never added, so one user's areas can't shift anyone else's
+    fuzzy matches
+  - resolutions are cached (LRU) across requests
+"""
+
+import re
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, FrozenSet
+
+from services.optimization_service import LOCATION_DISTANCE
+
+# Places that mean "anywhere on campus" all resolve to this id
+GENERIC_ID = 0
+GENERIC_NAMES = ("main campus", "campus", "college", "anywhere", "all areas")
+FILLER_WORDS = {"the", "of", "and", "at", "in", "near", "area"}
+FUZZY_THRESHOLD = 0.75
+MAX_CACHED = 4096
+
+_lock = threading.Lock()
+_ids: Dict[str, int] = {name: GENERIC_ID for name in GENERIC_NAMES}
+_names: List[str] = ["anywhere"]                  # id → canonical (normalized) name
+_grams: Dict[str, Set[int]] = defaultdict(set)    # trigram → ids containing it
+_gram_counts: List[int] = [0]                     # id → number of distinct trigrams
+_cache: "OrderedDict[str, Optional[int]]" = OrderedDict()
+_catalog_seen = None
+
+
+def normalize(text: str) -> str:
+    words = re.sub(r"[^a-z0-9]+", " ", (text or "").lower()).split()
+    return " ".join(w for w in words if w not in FILLER_WORDS)
+
+
+def _trigrams(norm: str) -> Set[str]:
+    padded = f" {norm} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _intern(norm: str) -> int:
+    """Id for a normalized name, adding it to the index if new. Caller holds _lock."""
+    found = _ids.get(norm)
+    if found is not None:
+        return found
+    new_id = len(_names)
+    _ids[norm] = new_id
+    _names.append(norm)
+    grams = _trigrams(norm)
+    for g in grams:
+        _grams[g].add(new_id)
+    _gram_counts.append(len(grams))
+    # Cached misses / fuzzy hits may now resolve differently
+    _cache.clear()
+    return new_id
+
+
+def register(names: Iterable[str]) -> List[int]:
+    """Add places to the vocabulary (no-op for known ones); returns their ids."""
+    out = []
+    with _lock:
+        for name in names:
+            norm = normalize(name) if isinstance(name, str) else ""
+            out.append(_intern(norm) if norm else GENERIC_ID)
+    return out
+
+
+def register_catalog(snapshot) -> None:
+    """Add a catalog snapshot's locations, once per snapshot."""
+    global _catalog_seen
+    if snapshot is _catalog_seen:
+        return
+    register(set(snapshot.location.tolist()))
+    _catalog_seen = snapshot
+
+
+def _fuzzy(norm: str) -> Optional[int]:
+    grams = _trigrams(norm)
+    shared: Dict[int, int] = defaultdict(int)
+    for g in grams:
+        for i in _grams.get(g, ()):
+            shared[i] += 1
+    best, best_score = None, FUZZY_THRESHOLD
+    for i, n in shared.items():
+        score = 2.0 * n / (len(grams) + _gram_counts[i])
+        if score >= best_score:
+            best, best_score = i, score
+    return best
+
+
+def resolve(text: str) -> Optional[int]:
+    """Canonical id for a location string; empty → GENERIC_ID, unknown → None."""
+    with _lock:
+        if text in _cache:
+            _cache.move_to_end(text)
+            return _cache[text]
+        norm = normalize(text)
+        if not norm:
+            loc_id = GENERIC_ID
+        else:
+            loc_id = _ids.get(norm)
+            if loc_id is None:
+                loc_id = _fuzzy(norm)
+        _cache[text] = loc_id
+        while len(_cache) > MAX_CACHED:
+            _cache.popitem(last=False)
+        return loc_id
+
+
+def name_of(loc_id: int) -> str:
+    return _names[loc_id]
+
+
+def accepted_ids(requested: str, campus_areas: Iterable[str] = ()) -> Optional[FrozenSet[int]]:
+    """
+    Location ids an item may have to count as near `requested`: the place
+    itself, campus-wide locations and the known places the user's own campus
+    map areas name (an area matching no known place can't match an item's
+    location either, so it adds nothing).
+    None means no constraint (nothing requested, or a campus-wide request).
+    """
+    req_id = resolve(requested)
+    if req_id == GENERIC_ID:
+        return None
+    accepted = {GENERIC_ID}
+    if req_id is not None:
+        accepted.add(req_id)
+    for area in campus_areas or ():
+        area_id = resolve(area) if isinstance(area, str) else GENERIC_ID
+        if area_id is not None:
+            accepted.add(area_id)
+    return frozenset(accepted)
+
+
+register(LOCATION_DISTANCE)
@@ -8,7 +8,7 @@ Scores recommendations using weighted criteria:
   - diversity_score  (10%)
 """
 
-from typing import List, Dict, Any
+from typing import Any, Callable, Dict, List, Optional
 
 
 # ── Weights (must sum to 1.0) ─────────────────────────────────────────────────
@@ -29,6 +29,8 @@ LOCATION_DISTANCE: Dict[str, Dict[str, float]] = {
     "Auditorium":    {"Main Campus": 8, "Library Block": 6, "Canteen": 4, "Sports Complex":14,  "Auditorium": 0, "Hostel": 14},
     "Hostel":        {"Main Campus":12, "Library Block":15, "Canteen":10, "Sports Complex": 6,  "Auditorium":14, "Hostel": 0},
 }
+# Walk assumed between places missing from the graph
+DEFAULT_TRAVEL_MINUTES = 15
 
 
 def _budget_fit_score(cost: float, budget: float) -> float:
@@ -74,13 +76,22 @@ def _time_feasibility(
     return min(1.0, time_fit * (0.7 + 0.3 * (1 - slack)))
 
 
-def _proximity_score(item_location: str, user_location: str) -> float:
-    """Closer = higher score."""
-    dist = (
-        LOCATION_DISTANCE
-        .get(user_location, {})
-        .get(item_location, 20)
-    )
+def _proximity_score(
+    item_location: str,
+    user_location: str,
+    distance: Optional[Callable[[str, str], Optional[float]]] = None,
+) -> float:
+    """Closer = higher score. `distance` is a campus graph lookup (None = unknown place)."""
+    if distance is not None:
+        dist = distance(user_location, item_location)
+        if dist is None:
+            dist = 20
+    else:
+        dist = (
+            LOCATION_DISTANCE
+            .get(user_location, {})
+            .get(item_location, 20)
+        )
     return max(0.0, 1.0 - dist / 20.0)
 
 
@@ -93,10 +104,12 @@ def score_recommendation(
     time_of_day: str,
     diversity_score: float = 0.5,
     custom_weights: Dict[str, float] = None,
+    distance: Optional[Callable[[str, str], Optional[float]]] = None,
 ) -> Dict[str, Any]:
     """
     Compute weighted score for a recommendation.
-    Accepts optional custom_weights from user behavioral profile.
+    Accepts optional custom_weights from user behavioral profile and a
+    campus graph `distance` lookup for proximity.
     Returns {total_score, breakdown, explanation_data}.
     """
     w = dict(WEIGHTS)
@@ -115,7 +128,7 @@ def score_recommendation(
               rec.get("available_times", ["afternoon"]),
               time_of_day,
           )
-    prx = _proximity_score(rec.get("location", "Main Campus"), user_location)
+    prx = _proximity_score(rec.get("location", "Main Campus"), user_location, distance)
     div = diversity_score
 
     total = (
@@ -151,10 +164,12 @@ def rank_recommendations(
     diversity_scores: Dict[int, float],
     top_k: int = 5,
     custom_weights: Dict[str, float] = None,
+    distance: Optional[Callable[[str, str], Optional[float]]] = None,
 ) -> List[dict]:
     """
     Score, sort and return top_k recommendations with score metadata attached.
-    Accepts optional custom_weights from user behavioral profile.
+    Accepts optional custom_weights from user behavioral profile and a
+    campus graph `distance` lookup (campus_graph_service.CampusGraph.distance).
     """
     scored = []
     for rec in candidates:
@@ -162,7 +177,7 @@ def rank_recommendations(
         result = score_recommendation(
             rec, budget, free_time_minutes,
             user_preferences, user_location, time_of_day, div,
-            custom_weights=custom_weights,
+            custom_weights=custom_weights, distance=distance,
         )
         enriched = dict(rec)
         enriched["score"] = result["total_score"]
@@ -0,0 +1,156 @@
+"""
+Day Plan Optimizer
+Chooses at most one item per category and the order to visit them in,
+maximizing the summed recommendation score subject to:
+  - total cost <= budget
+  - every stop (travel + any wait + duration) finishing inside the free window
+  - each item starting in one of its `available_times` slots
+  - walking time between consecutive stops (travel_minutes callback)
+
+Branch-and-bound over the top candidates per category. A greedy plan seeds
+the incumbent, and the search stops at a hard deadline, returning the best
+plan found so far (flagged optimal=False if it was cut short).
+"""
+
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import settings
+
+# Slot boundaries in minutes after midnight – same buckets the planner uses
+# to derive time_of_day (morning < 12:00 <= afternoon < 17:00 <= evening)
+_SLOTS = (("morning", 0, 12 * 60), ("afternoon", 12 * 60, 17 * 60), ("evening", 17 * 60, 24 * 60))
+
+
+def _earliest_start(minute: int, available_times: List[str]) -> Optional[int]:
+    """First minute >= `minute` that falls in one of the item's slots (None if none left today)."""
+    if not available_times:
+        return minute
+    for name, lo, hi in _SLOTS:
+        if name in available_times and minute < hi:
+            return max(minute, lo)
+    return None
+
+
+class _Search:
+    def __init__(self, pools, budget, start_minute, end_minute, start_location, travel_minutes, deadline):
+        self.pools = pools                    # {category: [item, ...] sorted by score desc}
+        self.categories = list(pools)
+        self.end = end_minute
+        self.travel = travel_minutes
+        self.deadline = deadline
+        self.nodes = 0
+        self.timed_out = False
+        self.best_score = -1.0
+        self.best_path: List[Tuple[dict, int, int, int]] = []
+        self.root = (start_minute, start_location, budget)
+
+    def _place(self, item: dict, minute: int, location: str) -> Optional[Tuple[int, int, int]]:
+        """(travel, start, end) if the item can be done next from here, else None."""
+        travel = int(round(self.travel(location, item["location"])))
+        start = _earliest_start(minute + travel, item.get("available_times") or [])
+        if start is None:
+            return None
+        end = start + item["duration_minutes"]
+        return (travel, start, end) if end <= self.end else None
+
+    def _bound(self, used: frozenset, budget_left: float, minutes_left: int) -> float:
+        """Optimistic score still obtainable: best single item per unused category, ignoring travel."""
+        total = 0.0
+        for cat in self.categories:
+            if cat in used:
+                continue
+            for item in self.pools[cat]:
+                if item["cost"] <= budget_left and item["duration_minutes"] <= minutes_left:
+                    total += item["score"]
+                    break
+        return total
+
+    def _record(self, score: float, path: list):
+        if score > self.best_score:
+            self.best_score = score
+            self.best_path = list(path)
+
+    def greedy(self):
+        """Fixed category order, best feasible item each time – the old planner, travel-aware."""
+        minute, location, budget = self.root
+        path, score = [], 0.0
+        for cat in self.categories:
+            for item in self.pools[cat]:
+                if item["cost"] > budget:
+                    continue
+                placed = self._place(item, minute, location)
+                if placed:
+                    travel, start, end = placed
+                    path.append((item, travel, start, end))
+                    score += item["score"]
+                    minute, location, budget = end, item["location"], budget - item["cost"]
+                    break
+        self._record(score, path)
+
+    def run(self):
+        minute, location, budget = self.root
+        self._dfs(minute, location, budget, frozenset(), 0.0, [])
+
+    def _dfs(self, minute, location, budget_left, used, score, path):
+        self.nodes += 1
+        if self.nodes % 256 == 0 and time.perf_counter() > self.deadline:
+            self.timed_out = True
+        if self.timed_out:
+            return
+        self._record(score, path)
+        if score + self._bound(used, budget_left, self.end - minute) <= self.best_score + 1e-9:
+            return
+        for cat in self.categories:
+            if cat in used:
+                continue
+            for item in self.pools[cat]:
+                if item["cost"] > budget_left:
+                    continue
+                placed = self._place(item, minute, location)
+                if not placed:
+                    continue
+                travel, start, end = placed
+                path.append((item, travel, start, end))
+                self._dfs(end, item["location"], budget_left - item["cost"], used | {cat},
+                          score + item["score"], path)
+                path.pop()
+                if self.timed_out:
+                    return
+
+
+def optimize_plan(
+    candidates: Dict[str, List[dict]],
+    budget: float,
+    start_minute: int,
+    end_minute: int,
+    start_location: str,
+    travel_minutes: Callable[[str, str], float],
+    time_limit_ms: Optional[float] = None,
+    top_n: Optional[int] = None,
+) -> dict:
+    """
+    candidates: {category: scored items (need id, cost, duration_minutes, location,
+                 available_times, score)}. Minutes are minutes after midnight.
+    Returns {stops: [{item, travel_minutes, start, end}], score, optimal, nodes}.
+    """
+    time_limit_ms = settings.PLANNER_TIME_LIMIT_MS if time_limit_ms is None else time_limit_ms
+    top_n = top_n or settings.PLANNER_TOP_N
+    pools = {
+        cat: sorted(items, key=lambda r: r["score"], reverse=True)[:top_n]
+        for cat, items in candidates.items() if items
+    }
+    search = _Search(pools, budget, start_minute, end_minute, start_location, travel_minutes,
+                     deadline=time.perf_counter() + time_limit_ms / 1000.0)
+    search.greedy()
+    search.run()
+
+    return {
+        "stops": [
+            {"item": item, "travel_minutes": travel, "start": start, "end": end}
+            for item, travel, start, end in search.best_path
+        ],
+        "score": round(max(search.best_score, 0.0), 4),
+        "optimal": not search.timed_out,
+        "nodes": search.nodes,
+    }
@@ -0,0 +1,243 @@
+"""
+Sampling Profiler
+Opt-in, low-overhead CPU profiling of live requests. While at least one
+profiled request is in flight, a daemon thread snapshots every thread's
+Python stack (sys._current_frames) every PROFILE_INTERVAL_MS; nothing runs
+otherwise, and unprofiled requests pay only a random() call.
+
+Samples are attributed like this:
+  - event loop thread: only while the profiled request's own task is the one
+    running, so concurrent async requests don't leak into its profile
+  - worker threads (sync endpoints/dependencies, serialization, bcrypt,
+    background tasks): whenever they used CPU since the previous sample
+    (per-thread CPU clocks; threads blocked on a queue, lock or socket are
+    skipped). A thread can't be tied to a request from outside, so these
+    stacks (rooted at "thread:<name>") may include work for other requests
+    running at the same time
+
+Each profile is written in collapsed-stack format ("frame;frame;frame count"
+per line) to PROFILE_DIR, which flamegraph.pl, speedscope and inferno read
+directly, named <time>_<method>_<route slug>.<route hash>@<request id>.folded
+("@" can't occur in a slug or a request id, so names parse back unambiguously).
+The newest PROFILE_KEEP_PER_ROUTE files per method and route are kept; the
+hash keeps routes whose slugs collide ("/a_b" vs "/a-b") apart.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from config import settings
+
+MAX_DEPTH = 128
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+_NAME_RE = re.compile(r"^(\d{8}T\d{6}_\d{3})_([A-Z]+)_([\w.-]*)\.([0-9a-f]{8})@([A-Za-z0-9._:-]+)\.folded$")
+
+# Without per-thread CPU clocks (non-POSIX): innermost frames of a thread
+# that is waiting for work, not running it
+_IDLE = {
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),        # concurrent.futures pool, blocked in SimpleQueue.get
+}
+THREAD_CPU_CLOCKS = hasattr(time, "pthread_getcpuclockid")
+
+
+class Session:
+    """One profiled request: the task it runs in and the stacks sampled so far."""
+
+    __slots__ = ("task", "loop", "loop_thread", "stacks")
+
+    def __init__(self, task, loop, loop_thread: int):
+        self.task = task
+        self.loop = loop
+        self.loop_thread = loop_thread
+        self.stacks: Counter = Counter()
+
+
+_lock = threading.Lock()
+_sessions: List[Session] = []
+_sampler: Optional[threading.Thread] = None
+_labels: Dict[object, str] = {}            # code object → "module:function"
+
+
+def _label(code) -> str:
+    label = _labels.get(code)
+    if label is None:
+        path = code.co_filename
+        if path.startswith(_BACKEND_DIR):
+            path = path[len(_BACKEND_DIR):]
+        elif "site-packages" + os.sep in path:
+            path = path.split("site-packages" + os.sep, 1)[1]
+        else:
+            path = os.path.basename(path)
+        label = _labels[code] = f"{path[:-3] if path.endswith('.py') else path}:{code.co_name}"
+    return label
+
+
+def _stack(frame, root: str) -> str:
+    names = []
+    while frame is not None and len(names) < MAX_DEPTH:
+        names.append(_label(frame.f_code))
+        frame = frame.f_back
+    names.append(root)
+    return ";".join(reversed(names))
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in _IDLE
+
+
+def _busy_since_last(ident: int, cpu_seen: Dict[int, float]) -> bool:
+    """Did thread `ident` use CPU since the previous call? (False the first time.)"""
+    try:
+        cpu = time.clock_gettime(time.pthread_getcpuclockid(ident))
+    except (OSError, OverflowError):
+        return False                      # thread exited between snapshot and check
+    last = cpu_seen.get(ident)
+    cpu_seen[ident] = cpu
+    return last is not None and cpu > last
+
+
+def _sample_loop() -> None:
+    global _sampler
+    me = threading.get_ident()
+    interval = settings.PROFILE_INTERVAL_MS / 1000.0
+    cpu_seen: Dict[int, float] = {}
+    while True:
+        with _lock:
+            sessions = list(_sessions)
+            if not sessions:
+                _sampler = None
+                return
+        frames = sys._current_frames()
+        loop_threads = {s.loop_thread for s in sessions}
+        names = {t.ident: t.name for t in threading.enumerate()}
+        workers = []
+        for ident, frame in frames.items():
+            if ident == me or ident in loop_threads:
+                continue
+            busy = _busy_since_last(ident, cpu_seen) if THREAD_CPU_CLOCKS else not _is_idle(frame)
+            if busy:
+                workers.append(_stack(frame, f"thread:{names.get(ident, ident)}"))
+        for s in sessions:
+            if asyncio.current_task(s.loop) is s.task and s.loop_thread in frames:
+                s.stacks[_stack(frames[s.loop_thread], "loop")] += 1
+            for stack in workers:
+                s.stacks[stack] += 1
+        del frames
+        time.sleep(interval)
+
+
+def should_profile(token: Optional[str]) -> bool:
+    """Profile this request? A valid admin token forces it; otherwise sampled."""
+    if token and is_admin(token):
+        return True
+    rate = settings.PROFILE_SAMPLE_RATE
+    return rate > 0 and random.random() < rate
+
+
+def is_admin(token: Optional[str]) -> bool:
+    """Constant-time check against ADMIN_TOKEN; always False while it is unset."""
+    if not settings.ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode(), settings.ADMIN_TOKEN.encode())
+
+
+def start() -> Session:
+    """Begin profiling the calling task (call from inside the request)."""
+    global _sampler
+    session = Session(asyncio.current_task(), asyncio.get_running_loop(), threading.get_ident())
+    with _lock:
+        _sessions.append(session)
+        if _sampler is None:
+            _sampler = threading.Thread(target=_sample_loop, name="profiler", daemon=True)
+            _sampler.start()
+    return session
+
+
+def stop(session: Session) -> None:
+    with _lock:
+        if session in _sessions:
+            _sessions.remove(session)
+
+
+# ── Storage ──────────────────────────────────────────────────────────────────
+def _slug(route: str) -> str:
+    return re.sub(r"[^\w.-]+", "-", route.strip("/")) or "root"
+
+
+def _route_key(route: str) -> str:
+    return hashlib.sha1(route.encode()).hexdigest()[:8]
+
+
+def save(session: Session, method: str, route: str, request_id: str) -> Optional[str]:
+    """Write the session's stacks as a .folded file; returns its name (None if empty)."""
+    if not session.stacks:
+        return None
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S_%f")[:-3]
+    key = _route_key(route)
+    name = f"{stamp}_{method}_{_slug(route)}.{key}@{request_id}.folded"
+    path = os.path.join(settings.PROFILE_DIR, name)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        for stack, count in session.stacks.most_common():
+            f.write(f"{stack} {count}\n")
+    os.replace(tmp, path)
+    _prune(method, key)
+    return name
+
+
+def _prune(method: str, key: str) -> None:
+    mine = [p["name"] for p in list_profiles() if p["method"] == method and p["route_key"] == key]
+    for name in mine[settings.PROFILE_KEEP_PER_ROUTE:]:         # newest first
+        try:
+            os.remove(os.path.join(settings.PROFILE_DIR, name))
+        except FileNotFoundError:
+            pass                          # another worker pruned it first
+
+
+def list_profiles() -> List[dict]:
+    """Stored profiles, newest first."""
+    try:
+        names = os.listdir(settings.PROFILE_DIR)
+    except FileNotFoundError:
+        return []
+    out = []
+    for name in names:
+        m = _NAME_RE.match(name)
+        if not m:
+            continue
+        stamp, method, endpoint, route_key, request_id = m.groups()
+        created = datetime.strptime(stamp + "000", "%Y%m%dT%H%M%S_%f").replace(tzinfo=timezone.utc)
+        try:
+            size = os.path.getsize(os.path.join(settings.PROFILE_DIR, name))
+        except FileNotFoundError:
+            continue
+        out.append({
+            "name": name, "method": method, "endpoint": endpoint, "route_key": route_key,
+            "request_id": request_id,
+            "created_at": created.isoformat(), "bytes": size,
+        })
+    out.sort(key=lambda p: p["name"], reverse=True)
+    return out
+
+
+def profile_path(name: str) -> Optional[str]:
+    """Filesystem path of a stored profile, None for unknown or malformed names."""
+    if not _NAME_RE.match(name or ""):
+        return None
+    path = os.path.join(settings.PROFILE_DIR, name)
+    return path if os.path.isfile(path) else None
@@ -0,0 +1,51 @@
+"""
+Sliding-Window Rate Limiter
+In-memory, per-process attempt counters keyed by an arbitrary string
+(client IP, username). Keys are kept in an LRU so a flood of distinct
+keys cannot grow memory without bound.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Deque
+
+
+class SlidingWindowLimiter:
+    def __init__(self, limit: int, window_seconds: float, max_keys: int = 50_000):
+        self.limit = limit
+        self.window = window_seconds
+        self.max_keys = max_keys
+        self._hits: "OrderedDict[str, Deque[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _prune(self, key: str, now: float) -> Deque[float]:
+        hits = self._hits.get(key)
+        if hits is None:
+            hits = self._hits[key] = deque()
+            if len(self._hits) > self.max_keys:
+                self._hits.popitem(last=False)
+        else:
+            self._hits.move_to_end(key)
+        cutoff = now - self.window
+        while hits and hits[0] <= cutoff:
+            hits.popleft()
+        return hits
+
+    def retry_after(self, key: str) -> int:
+        """Seconds until `key` may try again (0 = not limited)."""
+        now = time.monotonic()
+        with self._lock:
+            hits = self._prune(key, now)
+            if len(hits) < self.limit:
+                return 0
+            return max(1, math.ceil(hits[0] + self.window - now))
+
+    def hit(self, key: str) -> None:
+        with self._lock:
+            self._prune(key, time.monotonic()).append(time.monotonic())
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._hits.pop(key, None)
@@ -0,0 +1,222 @@
+"""
+Semantic Response Cache
+Stores chat answers in a FAISS index keyed by the embedding of the normalized
+question plus the profile facets that shape the answer (college, city,
+persona). Near-duplicate questions from students with the same facets reuse
+a stored answer instead of paying for a full Ollama generation.
+
+Only enabled when sentence-transformers is available — the bag-of-chars
+fallback embedding is not semantic enough to decide that two questions match.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import re
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from config import settings
+from services import faiss_service, metrics_service
+from services.faiss_service import FAISS_AVAILABLE, SBERT_AVAILABLE
+
+if FAISS_AVAILABLE:
+    import faiss
+
+# Stored next to the catalog index (data/faiss_index.bin)
+CACHE_INDEX_PATH = "data/chat_cache_index.bin"
+CACHE_META_PATH  = "data/chat_cache_meta.pkl"
+
+# Neighbours inspected per lookup (hits from other scopes / expired entries are skipped)
+SEARCH_K = 16
+# Persist to disk after this many new answers
+SAVE_EVERY = 20
+
+_index = None                       # faiss.IndexFlatIP | np.ndarray (fallback)
+_entries: List[dict] = []           # [{scope, question, reply, extracted, created_at}]
+_lock = threading.Lock()
+_unsaved = 0
+_loaded = False
+
+
+def is_enabled() -> bool:
+    return settings.CHAT_CACHE_ENABLED and SBERT_AVAILABLE
+
+
+def _normalize(message: str) -> str:
+    text = message.lower().replace("₹", " rs ")
+    text = re.sub(r"[^\w\s]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _scope(profile: Optional[dict]) -> str:
+    """
+    Answers are only shared between students whose system prompt would be
+    identical: same college and city, and the same persona text
+    (personalization_summary + top_categories, kept as a digest).
+    """
+    profile = profile or {}
+    college = (profile.get("college_name") or "").strip().lower()
+    city = (profile.get("city") or "").strip().lower()
+    persona = json.dumps(
+        [profile.get("personalization_summary") or "", list(profile.get("top_categories") or [])],
+        ensure_ascii=False,
+    )
+    digest = hashlib.sha256(persona.encode("utf-8")).hexdigest()[:16]
+    return f"{college}|{city}|{digest}"
+
+
+def _cache_text(message: str, scope: str) -> str:
+    facets = scope.rsplit("|", 1)[0]          # the persona digest only gates exact scope matches
+    college, city = facets.split("|", 1)
+    return f"{_normalize(message)} | college: {college or 'any'} | city: {city or 'any'}"
+
+
+def _is_expired(entry: dict, now: float) -> bool:
+    return now - entry["created_at"] > settings.CHAT_CACHE_TTL_SECONDS
+
+
+def _new_index(dim: int):
+    if FAISS_AVAILABLE:
+        return faiss.IndexFlatIP(dim)
+    return np.zeros((0, dim), dtype="float32")
+
+
+def _vectors(index) -> np.ndarray:
+    if FAISS_AVAILABLE:
+        return index.reconstruct_n(0, index.ntotal) if index.ntotal else np.zeros((0, index.d), dtype="float32")
+    return index
+
+
+def _add(index, vecs: np.ndarray):
+    if FAISS_AVAILABLE:
+        index.add(vecs)
+        return index
+    return np.vstack([index, vecs])
+
+
+def _size(index) -> int:
+    if index is None:
+        return 0
+    return index.ntotal if FAISS_AVAILABLE else index.shape[0]
+
+
+def _load():
+    """Load the persisted cache once per process (caller holds _lock)."""
+    global _index, _entries, _loaded
+    _loaded = True
+    if not os.path.exists(CACHE_META_PATH):
+        return
+    with open(CACHE_META_PATH, "rb") as f:
+        _entries = pickle.load(f)
+    if FAISS_AVAILABLE and os.path.exists(CACHE_INDEX_PATH):
+        _index = faiss.read_index(CACHE_INDEX_PATH)
+    elif os.path.exists(CACHE_META_PATH + ".npy"):
+        with open(CACHE_META_PATH + ".npy", "rb") as f:
+            _index = np.load(f)
+    if _size(_index) != len(_entries):
+        _index, _entries = None, []
+
+
+def _save():
+    """Persist index + entries (caller holds _lock)."""
+    global _unsaved
+    _unsaved = 0
+    if _index is None:
+        return
+    os.makedirs("data", exist_ok=True)
+    if FAISS_AVAILABLE:
+        faiss.write_index(_index, CACHE_INDEX_PATH)
+    else:
+        with open(CACHE_META_PATH + ".npy", "wb") as f:
+            np.save(f, _index)
+    with open(CACHE_META_PATH, "wb") as f:
+        pickle.dump(_entries, f)
+
+
+def _compact(now: float):
+    """Drop expired entries and keep the newest CHAT_CACHE_MAX_ENTRIES (caller holds _lock)."""
+    global _index, _entries
+    keep = [i for i, e in enumerate(_entries) if not _is_expired(e, now)]
+    if len(keep) >= settings.CHAT_CACHE_MAX_ENTRIES:
+        keep = keep[-max(settings.CHAT_CACHE_MAX_ENTRIES // 2, 1):]
+    vecs = _vectors(_index)[keep]
+    _index = _add(_new_index(vecs.shape[1]), vecs)
+    _entries = [_entries[i] for i in keep]
+
+
+def lookup(message: str, user_profile: Optional[dict] = None) -> Optional[dict]:
+    """
+    Return the cached {reply, extracted} for a near-duplicate question in the
+    same profile scope, or None on a miss.
+    """
+    if not is_enabled():
+        return None
+    scope = _scope(user_profile)
+    q_vec = faiss_service.embed([_cache_text(message, scope)])
+    now = time.time()
+
+    with _lock:
+        if not _loaded:
+            _load()
+        n = _size(_index)
+        if n == 0:
+            metrics_service.cache_lookup("chat_answer", False)
+            return None
+        if FAISS_AVAILABLE:
+            scores, indices = _index.search(q_vec, min(SEARCH_K, n))
+            hits = zip(scores[0], indices[0])
+        else:
+            sims = (_index @ q_vec.T).flatten()
+            top = np.argsort(sims)[::-1][:SEARCH_K]
+            hits = ((sims[i], i) for i in top)
+
+        for score, idx in hits:
+            if idx < 0 or score < settings.CHAT_CACHE_THRESHOLD:
+                break
+            entry = _entries[idx]
+            if entry["scope"] == scope and not _is_expired(entry, now):
+                metrics_service.cache_lookup("chat_answer", True)
+                return {"reply": entry["reply"], "extracted": entry["extracted"], "similarity": float(score)}
+    metrics_service.cache_lookup("chat_answer", False)
+    return None
+
+
+def store(message: str, user_profile: Optional[dict], reply: str, extracted: dict) -> None:
+    """Add a freshly generated answer to the cache."""
+    global _index, _unsaved
+    if not is_enabled():
+        return
+    scope = _scope(user_profile)
+    vec = faiss_service.embed([_cache_text(message, scope)])
+    now = time.time()
+
+    with _lock:
+        if not _loaded:
+            _load()
+        if _index is None:
+            _index = _new_index(vec.shape[1])
+        _index = _add(_index, vec)
+        _entries.append({
+            "scope": scope,
+            "question": message,
+            "reply": reply,
+            "extracted": extracted,
+            "created_at": now,
+        })
+        if len(_entries) >= settings.CHAT_CACHE_MAX_ENTRIES:
+            _compact(now)
+        _unsaved += 1
+        if _unsaved >= SAVE_EVERY:
+            _save()
+
+
+def flush() -> None:
+    """Persist any unsaved answers (called on shutdown)."""
+    with _lock:
+        if _unsaved:
+            _save()
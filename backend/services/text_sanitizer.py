@@ -0,0 +1,239 @@
+"""
+LLM Output Sanitizer
+Strips markdown and leaked structured output from model replies in a single
+linear pass, either over a whole reply (sanitize) or incrementally over a
+token stream (StreamSanitizer.feed / finish).
+
+What is removed (same rules the old regex chain applied):
+  - <data>…</data> blocks, across lines (intent extraction leaking into replies)
+  - emphasis markers: *x*, **x**, ***x*** → x (pairs within a line)
+  - markdown headers: "## Title" → "Title"
+  - JSON-like blobs: from a line starting with { or [ through the first line
+    ending in } or ] (a lone line like "[1, 2]" included)
+  - bullet markers: "- item" / "• item" → "item"
+  - runs of 2+ blank lines collapse to one; leading/trailing whitespace trimmed
+
+Differences from the regexes, all on malformed output: an unclosed <data>
+block is dropped to the end (a stream can't take back what it withheld, and
+a truncated leak is still a leak); a line holding only a header or bullet
+marker is dropped instead of being joined to the next line.
+
+Every character is looked at a bounded number of times: <data> tags are
+found with str.find, lines are only split once complete, and a JSON blob that
+never closes is held (not rescanned) and released as text at finish().
+"""
+
+from typing import List
+
+_OPEN, _CLOSE = "<data>", "</data>"
+_MAX_EMPHASIS = 3            # *, **, ***
+_MAX_HEADER = 6              # # … ######
+_WS = " \t\r\f\v"
+
+
+def _strip_emphasis(line: str) -> str:
+    """Drop paired runs of 1–3 asterisks, keeping the text between them."""
+    if "*" not in line:
+        return line
+    out = []
+    i, n = 0, len(line)
+    while True:
+        start = line.find("*", i)
+        if start < 0:
+            out.append(line[i:])
+            break
+        end = start
+        while end < n and end - start < _MAX_EMPHASIS and line[end] == "*":
+            end += 1
+        close = line.find("*", end)
+        if close < 0:
+            # No closing marker: a run of 2+ still pairs with itself ("**" → "")
+            out.append(line[i:start])
+            if end - start == 1:
+                out.append(line[start:])
+                break
+            i = end
+            continue
+        close_end = close
+        while close_end < n and close_end - close < _MAX_EMPHASIS and line[close_end] == "*":
+            close_end += 1
+        out.append(line[i:start])
+        out.append(line[end:close])
+        i = close_end
+    return "".join(out)
+
+
+def _strip_marker(line: str, start: int, end: int, eol: bool):
+    """
+    Remove line[start:end] (a header/bullet marker) plus the whitespace after
+    it. None when nothing follows – the line held only the marker. `eol`: the
+    line ended in a newline (a bare "#" at the very end of the text is kept).
+    """
+    rest = line[end:]
+    if not rest:
+        return None if eol else line
+    if rest[0] not in _WS:
+        return line              # "#tag", "-1" – not a marker
+    rest = rest.lstrip(_WS)
+    return rest if rest else None
+
+
+def _strip_header(line: str, eol: bool):
+    n = 0
+    while n < len(line) and n <= _MAX_HEADER and line[n] == "#":
+        n += 1
+    if 1 <= n <= _MAX_HEADER:
+        return _strip_marker(line, 0, n, eol)
+    return line
+
+
+def _strip_bullet(line: str, eol: bool):
+    body = line.lstrip(_WS)
+    if body[:1] in ("-", "•"):
+        start = len(line) - len(body)
+        return _strip_marker(line, start, start + 1, eol)
+    return line
+
+
+def _is_blob_start(line: str) -> bool:
+    return line.lstrip()[:1] in ("{", "[")
+
+
+def _is_blob_end(line: str) -> bool:
+    return line.rstrip()[-1:] in ("}", "]")
+
+
+class StreamSanitizer:
+    """
+    Incremental sanitizer: feed() chunks as they arrive and get back the
+    cleaned text that is final so far; finish() returns the rest. Output is
+    held back only for an incomplete line, a possibly-split <data> tag, an
+    open JSON blob, and trailing whitespace.
+    """
+
+    def __init__(self):
+        self._tag_tail = ""          # end of input that may be the start of a tag
+        self._in_data = False
+        self._line: List[str] = []   # current incomplete line
+        self._blob: List[str] = []   # lines of an open JSON blob (dropped once it closes)
+        self._blank_run = 0
+        self._started = False        # any non-whitespace emitted yet
+        self._held_ws: List[str] = []  # trailing whitespace, emitted once more text follows
+
+    # ── Stage 1: <data> blocks ──────────────────────────────────────────────
+    def _strip_data(self, chunk: str, final: bool) -> str:
+        text = self._tag_tail + chunk
+        self._tag_tail = ""
+        out = []
+        pos = 0
+        while True:
+            tag = _CLOSE if self._in_data else _OPEN
+            found = text.find(tag, pos)
+            if found < 0:
+                keep = len(text)
+                if not final:
+                    # Hold a suffix that could be the first part of the tag
+                    for k in range(min(len(tag) - 1, len(text) - pos), 0, -1):
+                        if text.endswith(tag[:k]):
+                            keep = len(text) - k
+                            break
+                    self._tag_tail = text[keep:]
+                if not self._in_data:
+                    out.append(text[pos:keep])
+                break
+            if not self._in_data:
+                out.append(text[pos:found])
+            self._in_data = not self._in_data
+            pos = found + len(tag)
+        return "".join(out)
+
+    # ── Stage 2: per-line rules ─────────────────────────────────────────────
+    def _line_out(self, line: str, eol: bool = True) -> str:
+        """Apply the line rules to one complete line; returns text to emit."""
+        line = _strip_emphasis(line)
+        line = _strip_header(line, eol)
+        if line is None:
+            return ""
+        if self._blob:
+            self._blob.append(line)
+            if _is_blob_end(line):
+                self._blob = []
+            return ""
+        if _is_blob_start(line):
+            if not _is_blob_end(line):
+                self._blob = [line]
+            return ""
+        return self._finish_line(line, eol)
+
+    def _finish_line(self, line: str, eol: bool = True) -> str:
+        line = _strip_bullet(line, eol)
+        if line is None:
+            return ""
+        if line == "":
+            self._blank_run += 1
+            if self._blank_run > 1:
+                return ""
+        else:
+            self._blank_run = 0
+        return self._emit(line + "\n")
+
+    # ── Stage 3: trim leading / trailing whitespace ─────────────────────────
+    def _emit(self, text: str) -> str:
+        if not self._started:
+            text = text.lstrip()
+            if not text:
+                return ""
+            self._started = True
+        body = text.rstrip()
+        if not body:
+            # A list, joined once: a long run of whitespace-only lines would
+            # make repeated str += quadratic
+            self._held_ws.append(text)
+            return ""
+        self._held_ws.append(body)
+        out = "".join(self._held_ws)
+        self._held_ws = [text[len(body):]]
+        return out
+
+    def _lines(self, text: str) -> str:
+        out = []
+        start = 0
+        while True:
+            nl = text.find("\n", start)
+            if nl < 0:
+                if start < len(text):
+                    self._line.append(text[start:])
+                break
+            if self._line:
+                self._line.append(text[start:nl])
+                line = "".join(self._line)
+                self._line = []
+            else:
+                line = text[start:nl]
+            out.append(self._line_out(line))
+            start = nl + 1
+        return "".join(out)
+
+    def feed(self, chunk: str) -> str:
+        return self._lines(self._strip_data(chunk, final=False))
+
+    def finish(self) -> str:
+        """Flush everything held back; the sanitizer is spent afterwards."""
+        out = [self._lines(self._strip_data("", final=True))]
+        last = "".join(self._line)
+        self._line = []
+        if last:
+            out.append(self._line_out(last, eol=False))
+        if self._blob:
+            # Never closed – it was prose after all (emphasis/header rules
+            # already ran on these lines)
+            blob, self._blob = self._blob, []
+            for line in blob:
+                out.append(self._finish_line(line))
+        return "".join(out)
+
+
+def sanitize(text: str) -> str:
+    """Cleaned plain text of a complete LLM reply."""
+    s = StreamSanitizer()
+    return s.feed(text) + s.finish()